@@ -1,52 +1,165 @@
 import eventlet
 eventlet.monkey_patch()
+from eventlet import tpool
 
-from flask import Flask, render_template, request, jsonify
-from flask_socketio import SocketIO, emit
+from flask import Flask, render_template, request, jsonify, Response, stream_with_context
+from flask_socketio import SocketIO, emit, join_room
 import threading
 import time
 import os
+import logging
+import math
 from engine.network_engine import NetworkEngine, Device, DeviceType, Protocol, DeviceStatus
-from engine.export_service import ExportService
+from engine.export_service import ReportCache
 from engine.validation_engine import ValidationEngine
+from engine.bulk_io import BulkImporter, iter_rows, export_lines
+from engine.history import DEFAULT_TIERS, parse_tiers
+from engine.sessions import (SessionManager, DEFAULT_SESSION, SessionNameError, SessionLimitError,
+                             SessionNotFoundError, SessionExistsError)
+from engine.opcua_server import OpcUaFeed, DEFAULT_ENDPOINT
+from engine.link_model import LINK_SPEEDS_MBPS
 from flask import send_file
+import io
 
 app = Flask(__name__)
 app.config['SECRET_KEY'] = 'industrial-secret!'
 socketio = SocketIO(app, cors_allowed_origins="*", async_mode='eventlet', manage_session=False)
+logger = logging.getLogger(__name__)
 
-# Core engine instance
-engine = NetworkEngine()
+# Plant model survives restarts: reloaded from here on start, auto-saved on change
+SNAPSHOT_PATH = os.environ.get('NETSIM_SNAPSHOT', os.path.join(os.getcwd(), 'plant_snapshot.nsnap'))
+TICK_INTERVAL_S = 1.0
 
-# Initialize with a default PLC
-default_plc = Device(id="S7-1500_Main", type=DeviceType.PLC, ip="192.168.0.1", protocol=Protocol.PROFINET_IRT)
-engine.add_device(default_plc)
+def new_plant():
+    """A fresh plant: one default PLC."""
+    engine = NetworkEngine()
+    engine.add_device(Device(id="S7-1500_Main", type=DeviceType.PLC, ip="192.168.0.1", protocol=Protocol.PROFINET_IRT))
+    return engine
+
+# Named plants, each with its own engine (clients pick one with ?session=<name>). Idle
+# ones are evicted to <NETSIM_SESSION_DIR>/<name>.nsnap and reloaded on demand; the
+# default session keeps using NETSIM_SNAPSHOT. Per session: paths and jitter are
+# computed on a real OS thread against a frozen copy of the engine, mutations within
+# the debounce window share one emit and each client gets at most N updates/s.
+sessions = SessionManager(
+    snapshot_dir=os.environ.get('NETSIM_SESSION_DIR', os.path.join(os.getcwd(), 'sessions')),
+    new_engine=new_plant,
+    paths={DEFAULT_SESSION: SNAPSHOT_PATH},
+    idle_timeout_s=float(os.environ.get('NETSIM_SESSION_IDLE_S', '600')),
+    # One loop ticks every session; at most this many ticks run at once
+    max_concurrent=int(os.environ.get('NETSIM_SESSION_WORKERS', '4')),
+    max_sessions=int(os.environ.get('NETSIM_MAX_SESSIONS', '500')),
+    # Sessions in memory or on disk; POST /api/sessions answers 503 beyond this
+    max_stored=int(os.environ.get('NETSIM_MAX_STORED_SESSIONS', '1000')),
+    tick_interval_s=TICK_INTERVAL_S,
+    spawn=eventlet.spawn_n,
+    execute=tpool.execute,
+    session_options={
+        "broadcast_options": {
+            "window_s": float(os.environ.get('NETSIM_BROADCAST_WINDOW_MS', '50')) / 1000.0,
+            "max_delay_s": float(os.environ.get('NETSIM_BROADCAST_MAX_DELAY_MS', '250')) / 1000.0,
+            "client_max_rate_hz": float(os.environ.get('NETSIM_CLIENT_MAX_HZ', '10')),
+        },
+        # Latency/jitter/status trends in fixed-size ring buffers (1 s / 1 min / 1 h tiers)
+        "history_tiers": parse_tiers(os.environ['NETSIM_HISTORY_TIERS'])
+        if os.environ.get('NETSIM_HISTORY_TIERS') else DEFAULT_TIERS,
+        # Grouped, pre-laid-out topology for the browser (level of detail for large plants)
+        "view_auto_expand": int(os.environ.get('NETSIM_VIEW_AUTO_EXPAND', '300')),
+        # NETSIM_PROFILE_TICKS=1 keeps a cProfile of the slowest tick
+        "profile_ticks": os.environ.get('NETSIM_PROFILE_TICKS') == '1',
+    },
+)
+if os.path.exists(SNAPSHOT_PATH):
+    print(f"Plant model restored from {SNAPSHOT_PATH} "
+          f"({len(sessions.get(DEFAULT_SESSION).engine.devices)} devices)")
+
+# Socket.IO client -> its session name
+client_sessions = {}
+
+# PDF reports are built on tpool threads and cached per (session, topology version) for at most
+# NETSIM_REPORT_MAX_AGE_S: the result serial changes every tick, so keying on it would only share
+# concurrent builds
+reports = ReportCache(execute=tpool.execute, workers=int(os.environ.get('NETSIM_REPORT_WORKERS', '2')),
+                      max_age_s=float(os.environ.get('NETSIM_REPORT_MAX_AGE_S', '10')))
+
+# Optional OPC UA server (own process) fed with the default session's results: NETSIM_OPCUA=1
+opcua_feed = OpcUaFeed(endpoint=os.environ.get('NETSIM_OPCUA_ENDPOINT', DEFAULT_ENDPOINT),
+                       deadband_ms=float(os.environ.get('NETSIM_OPCUA_DEADBAND_MS', '0'))) \
+    if os.environ.get('NETSIM_OPCUA') == '1' else None
+
+def _emit_update(session, sid, payload):
+    # sid None = every client of the session, never the other sessions' clients
+    socketio.emit('network_update', payload, to=sid if sid is not None else session.room)
+
+def publish_update(session):
+    """Refreshes the session's computed state and emits the delta (if any) to its clients."""
+    engine = session.engine
+    result = session.compute.refresh()
+    with engine.timer.phase("history"):
+        session.history.record(result.performance, result.computed_at)
+    if opcua_feed is not None and session.name == DEFAULT_SESSION:
+        with engine.timer.phase("opcua"):
+            opcua_feed.publish(result.topology, result.performance, result.computed_at)
+    with engine.timer.phase("delta"):
+        delta = session.update_stream.publish(result.topology, result.performance, engine.safety_active)
+    if delta is not None:
+        with engine.timer.phase("emit"):
+            for sid, payload in session.broadcasts.dispatch(delta):
+                _emit_update(session, sid, payload)
+        session.tick_metrics.observe_emit(delta)
+
+def release_held_updates(session):
+    """Sends merged deltas to rate-limited clients whose interval has elapsed."""
+    for sid, payload in session.broadcasts.release_held():
+        _emit_update(session, sid, payload)
+
+def tick_session(session):
+    with session.tick_metrics.tick():
+        publish_update(session)
+        session.save_if_changed()
 
 def simulation_loop():
-    """Background thread to update performance metrics and push to UI."""
+    """Background task ticking every session (periodic or debounced) and evicting idle ones."""
     while True:
-        perf = engine.calculate_performance()
-        topo = engine.get_topology()
-        
-        socketio.emit('network_update', {
-            'performance': perf,
-            'topology': topo,
-            'safety_active': engine.safety_active,
-            'timestamp': time.time()
-        })
-        time.sleep(1.0)
-
-def broadcast_update():
-    """Triggers an immediate update to all clients."""
-    with app.app_context():
-        perf = engine.calculate_performance()
-        topo = engine.get_topology()
-        socketio.emit('network_update', {
-            'performance': perf,
-            'topology': topo,
-            'safety_active': engine.safety_active,
-            'timestamp': time.time()
-        })
+        try:
+            sessions.run_due(tick_session)
+            for session in sessions.active():
+                release_held_updates(session)
+            for name in sessions.evict_idle():
+                print(f"Session {name} idle, evicted to {sessions.snapshot_path(name)}")
+        except Exception:
+            # The loop serves every session: log and carry on rather than stop them all
+            logger.exception("Simulation loop iteration failed")
+        sessions.wait(sessions.next_event_in())
+
+def broadcast_update(session):
+    """Schedules a debounced update to the session's clients (does not compute inline)."""
+    session.broadcasts.note_mutation()
+    session.compute.request()
+
+def current_session():
+    """Session of an HTTP request: ?session=<name> or the X-Netsim-Session header."""
+    return sessions.get(request.args.get('session') or request.headers.get('X-Netsim-Session') or DEFAULT_SESSION)
+
+def client_session():
+    """Session the calling Socket.IO client joined on connect."""
+    return sessions.get(client_sessions.get(request.sid, DEFAULT_SESSION))
+
+@app.errorhandler(SessionNameError)
+def invalid_session(e):
+    return jsonify({"status": "error", "message": str(e)}), 400
+
+@app.errorhandler(SessionLimitError)
+def session_limit(e):
+    return jsonify({"status": "error", "message": str(e)}), 503
+
+@app.errorhandler(SessionNotFoundError)
+def unknown_session(e):
+    return jsonify({"status": "error", "message": f"{e.args[0]}: create it with POST /api/sessions"}), 404
+
+@app.errorhandler(SessionExistsError)
+def duplicate_session(e):
+    return jsonify({"status": "error", "message": str(e)}), 409
 
 @app.route('/')
 def index():
@@ -54,10 +167,96 @@ def index():
 
 @app.route('/api/devices', methods=['GET'])
 def get_devices():
-    return jsonify(engine.get_topology())
+    return jsonify(current_session().engine.get_topology())
+
+@app.route('/api/stats', methods=['GET'])
+def get_stats():
+    session = current_session()
+    engine, compute, broadcasts = session.engine, session.compute, session.broadcasts
+    latest = compute.latest
+    return jsonify({
+        "session": session.name,
+        "version": engine.version,
+        "cache": engine.cache_stats,
+        "compute": {
+            "published_version": latest.version if latest else None,
+            "last_duration_s": latest.duration_s if latest else None,
+            "recomputes": compute.recomputes,
+            "coalesced_requests": compute.coalesced,
+        },
+        "broadcast": {
+            "mutations": broadcasts.mutations,
+            "flushes": broadcasts.flushes,
+            "clients": len(broadcasts.clients),
+        },
+        "history": {"samples": session.history.samples, "bytes": session.history.nbytes()},
+        "sessions": {
+            "active": len(sessions.sessions),
+            "ticks_in_flight": sessions.in_flight,
+            "loads": sessions.loads,
+            "evictions": sessions.evictions,
+        },
+    })
+
+@app.route('/api/sessions', methods=['GET'])
+def list_sessions():
+    """Known sessions: the ones in memory plus the ones evicted to disk."""
+    active = {s.name: s for s in sessions.active()}
+    return jsonify({"status": "ok", "sessions": [
+        {"name": name, "loaded": name in active,
+         "clients": len(active[name].broadcasts.clients) if name in active else 0,
+         "devices": len(active[name].engine.devices) if name in active else None}
+        for name in sessions.names()
+    ]})
+
+@app.route('/api/sessions', methods=['POST'])
+def create_session():
+    """Creates a named session ({"name": ...}); every other endpoint only opens existing ones."""
+    data = request.get_json(silent=True) or {}
+    session = sessions.create(data.get('name'))
+    return jsonify({"status": "ok", "session": session.name}), 201
+
+@app.route('/api/history/<device_id>', methods=['GET'])
+def get_history(device_id):
+    """Latency/jitter/status buckets of one device; start/end in unix seconds (default: last 5 min)."""
+    now = time.time()
+    try:
+        end = request.args.get('end', now, type=float)
+        start = request.args.get('start', end - 300, type=float)
+        resolution = request.args.get('resolution', type=int)
+        if not (math.isfinite(start) and math.isfinite(end)):
+            raise ValueError("start and end must be finite unix timestamps")
+        series = current_session().history.query(device_id, start, end, resolution=resolution, now=now)
+    except ValueError as e:
+        return jsonify({"status": "error", "message": str(e)}), 400
+    return jsonify({"status": "ok", **series})
+
+@app.route('/api/redundancy', methods=['GET'])
+def get_redundancy():
+    """Protected/unprotected devices and single points of failure of the current cabling."""
+    session = current_session()
+    index = session.compute.redundancy_index()
+    if index is None or session.engine.redundancy_stale():
+        return jsonify({"status": "error", "message": "Topology changed while analysing, retry"}), 503
+    return jsonify({"status": "ok", "structure_version": index.structure_version, **index.report()})
+
+@app.route('/api/metrics', methods=['GET'])
+def get_metrics():
+    """Prometheus text exposition of tick, phase and payload metrics."""
+    session = current_session()
+    return Response(session.tick_metrics.render(session.engine), mimetype='text/plain; version=0.0.4')
+
+@app.route('/api/metrics/profile', methods=['GET'])
+def get_slowest_profile():
+    tick_metrics = current_session().tick_metrics
+    if tick_metrics.slowest_profile is None:
+        return jsonify({"status": "error", "message": "Profiling disabled (set NETSIM_PROFILE_TICKS=1)"}), 404
+    return Response(tick_metrics.slowest_profile, mimetype='text/plain')
 
 @app.route('/api/devices', methods=['POST'])
 def add_device():
+    session = current_session()
+    engine = session.engine
     data = request.json
     try:
         # 1. Topology Validation
@@ -65,7 +264,8 @@ def add_device():
             engine.graph, 
             data['id'], 
             data.get('connect_to'),
-            data['type']
+            data['type'],
+            index=engine.connectivity
         )
         
         if not validation['is_valid']:
@@ -77,7 +277,9 @@ def add_device():
             type=DeviceType(data['type']),
             ip=data.get('ip'),
             protocol=Protocol(data.get('protocol', Protocol.PROFINET_RT)),
-            cycle_time_ms=float(data.get('cycle_time', 1.0))
+            cycle_time_ms=float(data.get('cycle_time', 1.0)),
+            controller=data.get('controller'),
+            processing_delay_us=data.get('processing_delay_us')
         )
         engine.add_device(new_dev, connect_to=data.get('connect_to'))
         return jsonify({"status": "ok", "device": new_dev.model_dump()})
@@ -86,71 +288,197 @@ def add_device():
 
 @app.route('/api/devices/<device_id>', methods=['PATCH'])
 def rename_device(device_id):
+    session = current_session()
+    engine = session.engine
     data = request.json
+    if 'processing_delay_us' in data:
+        # Forwarding delay in microseconds (null = the type's default)
+        delay = data['processing_delay_us']
+        if not engine.set_processing_delay(device_id, None if delay is None else float(delay)):
+            return jsonify({"status": "error", "message": "Device not found"}), 404
+        if 'display_name' not in data and 'controller' not in data:
+            broadcast_update(session)
+            return jsonify({"status": "ok", "processing_delay_us": delay})
+    if 'controller' in data:
+        # Reassign the owning PLC (null = nearest PLC)
+        if device_id not in engine.devices:
+            return jsonify({"status": "error", "message": "Device not found"}), 404
+        if not engine.assign_controller(device_id, data['controller']):
+            return jsonify({"status": "error", "message": "controller must be an existing PLC"}), 400
+        if 'display_name' not in data:
+            broadcast_update(session)
+            return jsonify({"status": "ok", "controller": data['controller']})
+
     new_name = data.get('display_name')
     if not new_name:
         return jsonify({"status": "error", "message": "display_name is required"}), 400
     
     if engine.rename_device(device_id, new_name):
-        broadcast_update()
+        broadcast_update(session)
         return jsonify({"status": "ok", "new_name": new_name})
     return jsonify({"status": "error", "message": "Device not found"}), 404
 
 @app.route('/api/link', methods=['POST'])
 def manage_link():
+    session = current_session()
+    engine = session.engine
     data = request.json
-    engine.set_link_status(data['u'], data['v'], data['active'])
-    broadcast_update()
+    u, v = data['u'], data['v']
+    unknown = [dev_id for dev_id in (u, v) if dev_id not in engine.devices]
+    if unknown:
+        return jsonify({"status": "error", "message": f"Unknown device: {unknown[0]}"}), 404
+    if 'active' in data:
+        engine.set_link_status(u, v, data['active'])
+    if any(k in data for k in ('speed_mbps', 'length_m', 'utilization')):
+        # Link model: speed (100/1000 Mbps), cable length (m), utilization (0-1)
+        if not engine.graph.has_edge(u, v):
+            return jsonify({"status": "error", "message": "Link not found"}), 404
+        speed = data.get('speed_mbps')
+        if speed is not None and float(speed) not in LINK_SPEEDS_MBPS:
+            return jsonify({"status": "error", "message": "speed_mbps must be 100 or 1000"}), 400
+        utilization = data.get('utilization')
+        if utilization is not None and not 0.0 <= float(utilization) <= 1.0:
+            return jsonify({"status": "error", "message": "utilization must be between 0 and 1"}), 400
+        if speed is not None or 'length_m' in data:
+            engine.set_link_properties(u, v, speed, data.get('length_m'))
+        if utilization is not None:
+            engine.set_link_utilization(u, v, float(utilization))
+    broadcast_update(session)
     return jsonify({"status": "ok"})
+def _bulk_format():
+    fmt = request.args.get('format')
+    if fmt:
+        return fmt
+    return 'csv' if 'csv' in (request.content_type or '') else 'ndjson'
+
+@app.route('/api/topology/bulk', methods=['POST'])
+def bulk_import():
+    """Streams NDJSON/CSV device, link and ring rows into the engine with one broadcast at the end."""
+    lines = (raw.decode('utf-8') for raw in request.stream)
+    session = current_session()
+    report = BulkImporter(session.engine).apply(iter_rows(lines, _bulk_format()))
+    broadcast_update(session)
+    return jsonify(report)
+
+@app.route('/api/topology/view', methods=['GET'])
+def get_topology_view():
+    """Groups with server-side coordinates; ?expand=grp:A,grp:B also returns those groups' members (or expand=auto)."""
+    expand = [g for g in request.args.get('expand', '').split(',') if g]
+    return jsonify({"status": "ok", **current_session().topology_view.summary(expand)})
+
+@app.route('/api/topology/groups/<path:group_id>', methods=['GET'])
+def get_topology_group(group_id):
+    """Expands one group: members with coordinates, internal links and links to other groups."""
+    group = current_session().topology_view.group(group_id)
+    if group is None:
+        return jsonify({"status": "error", "message": f"Unknown group: {group_id}"}), 404
+    return jsonify({"status": "ok", **group})
+
+@app.route('/api/topology/export', methods=['GET'])
+def bulk_export():
+    fmt = request.args.get('format', 'ndjson')
+    mimetype = 'text/csv' if fmt == 'csv' else 'application/x-ndjson'
+    return Response(stream_with_context(export_lines(current_session().engine, fmt)), mimetype=mimetype)
+
+@app.route('/api/snapshot', methods=['POST'])
+def snapshot_now():
+    session = current_session()
+    session.save_if_changed()
+    return jsonify({"status": "ok", "path": session.snapshot_path, "version": session.engine.version})
+
+@app.route('/api/rings', methods=['POST'])
+def declare_ring():
+    """Declares an MRP/HSR ring segment so closing it is not flagged as a loop."""
+    data = request.json
+    try:
+        session = current_session()
+        session.engine.declare_ring(data['name'], data['members'], data.get('protocol', 'MRP'))
+        return jsonify({"status": "ok"})
+    except (KeyError, ValueError) as e:
+        return jsonify({"status": "error", "message": str(e)}), 400
+
 @app.route('/api/export', methods=['GET'])
 def export_report():
-    topo = engine.get_topology()
-    perf = engine.calculate_performance()
-    
-    report_path = os.path.join(os.getcwd(), "network_report.pdf")
-    ExportService.generate_pdf_report(topo, perf, report_path)
-    
-    return send_file(report_path, as_attachment=True)
+    session = current_session()
+    result = session.compute.current()
+    pdf = reports.get((session.name, result.version), result.topology, result.performance)
+    return send_file(io.BytesIO(pdf), mimetype='application/pdf', as_attachment=True,
+                     download_name=f"network_report_v{result.version}.pdf")
+
+@socketio.on('connect')
+def handle_connect():
+    """Joins the client to ?session=<name> (default session if omitted) and sends its snapshot."""
+    try:
+        session = sessions.get(request.args.get('session') or DEFAULT_SESSION)
+    except (SessionNameError, SessionLimitError, SessionNotFoundError):
+        return False
+    client_sessions[request.sid] = session.name
+    join_room(session.room)
+    emit('network_update', session.update_stream.snapshot())
+    session.broadcasts.add_client(request.sid, request.args.get('max_hz', type=float))
+
+@socketio.on('disconnect')
+def handle_disconnect():
+    name = client_sessions.pop(request.sid, None)
+    session = sessions.sessions.get(name)
+    if session is not None:
+        session.broadcasts.remove_client(request.sid)
+        session.last_active = sessions.clock()
+
+@socketio.on('request_resync')
+def handle_resync():
+    """Client missed a delta (seq gap): resend the full state to it only."""
+    session = client_session()
+    emit('network_update', session.update_stream.snapshot())
+    client = session.broadcasts.clients.get(request.sid)
+    session.broadcasts.add_client(request.sid, client.max_rate_hz if client else None)
+
+@socketio.on('set_update_rate')
+def handle_update_rate(data):
+    """Lets a slow client lower its own update rate (capped by NETSIM_CLIENT_MAX_HZ)."""
+    client_session().broadcasts.set_client_rate(request.sid, (data or {}).get('max_hz'))
 
 @socketio.on('trigger_fault')
 def handle_fault(data):
+    session = client_session()
+    engine = session.engine
     device_id = data.get('device_id')
     
     if data.get('random'):
         device_id = engine.trigger_random_fault()
         if device_id:
             print(f"Random fault triggered for {device_id}")
-            broadcast_update()
-            emit('fault_acknowledged', {'status': 'ok', 'device_id': device_id}, broadcast=True)
+            broadcast_update(session)
+            emit('fault_acknowledged', {'status': 'ok', 'device_id': device_id}, to=session.room)
         return
 
     if device_id in engine.devices:
         device = engine.devices[device_id]
         if device.status != DeviceStatus.OFFLINE:
-            device.status = DeviceStatus.OFFLINE
+            engine.set_device_status(device_id, DeviceStatus.OFFLINE)
             engine.safety_active = True
         else:
-            device.status = DeviceStatus.ONLINE
+            engine.set_device_status(device_id, DeviceStatus.ONLINE)
             # Check if any other device is offline before clearing safety_active
-            any_offline = any(d.status == DeviceStatus.OFFLINE for d in engine.devices.values() if d.type != DeviceType.PLC)
-            engine.safety_active = any_offline
+            engine.safety_active = engine.has_offline_devices()
             
         print(f"Fault toggled for {device_id}: {device.status}")
-        broadcast_update()
-        emit('fault_acknowledged', {'status': 'ok', 'device_id': device_id}, broadcast=True)
+        broadcast_update(session)
+        emit('fault_acknowledged', {'status': 'ok', 'device_id': device_id}, to=session.room)
 
 @socketio.on('restore_all')
 def handle_restore_all():
-    for device in engine.devices.values():
-        device.status = DeviceStatus.ONLINE
-    engine.safety_active = False
+    session = client_session()
+    session.engine.restore_all()
     print("System restored: All devices ONLINE")
-    broadcast_update()
-    emit('fault_acknowledged', {'status': 'ok', 'all': True}, broadcast=True)
+    broadcast_update(session)
+    emit('fault_acknowledged', {'status': 'ok', 'all': True}, to=session.room)
 
 if __name__ == '__main__':
     # Start simulation in a background task compatible with SocketIO/Eventlet
     socketio.start_background_task(simulation_loop)
+    if opcua_feed is not None:
+        socketio.start_background_task(opcua_feed.run)
     
     print("Industrial Network Simulator Backend running on http://localhost:5000")
     socketio.run(app, host='0.0.0.0', port=5000, debug=False)
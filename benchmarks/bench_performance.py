@@ -0,0 +1,78 @@
+"""
+Tick-cost benchmark for NetworkEngine.calculate_performance.
+
+Builds a plant of N devices (PLC -> tree of switches -> devices hanging off each
+switch) and times one performance tick. Cost per device should stay roughly flat as N grows.
+
+    python benchmarks/bench_performance.py
+    python benchmarks/bench_performance.py 100 1000 5000
+    python benchmarks/bench_performance.py --compact 50000
+"""
+import os
+import sys
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from engine.network_engine import NetworkEngine, Device, DeviceType, Protocol
+
+DEFAULT_SIZES = [100, 500, 1000, 2000, 5000, 10000]
+DEVICES_PER_SWITCH = 16
+SWITCH_FANOUT = 4
+
+
+def build_plant(n_devices, compact=False):
+    """PLC with a SWITCH_FANOUT-ary switch tree, each switch feeding DEVICES_PER_SWITCH field devices."""
+    engine = NetworkEngine(compact_devices=compact)
+    engine.add_device(Device(id="PLC", type=DeviceType.PLC, protocol=Protocol.PROFINET_IRT))
+
+    switch_idx = 0
+    added = 1
+    while added < n_devices:
+        switch_id = f"SW_{switch_idx}"
+        uplink = "PLC" if switch_idx == 0 else f"SW_{(switch_idx - 1) // SWITCH_FANOUT}"
+        engine.add_device(Device(id=switch_id, type=DeviceType.SWITCH), connect_to=uplink)
+        switch_idx += 1
+        added += 1
+        for i in range(DEVICES_PER_SWITCH):
+            if added >= n_devices:
+                break
+            engine.add_device(
+                Device(id=f"DR_{switch_idx}_{i}", type=DeviceType.DRIVE, cycle_time_ms=1000.0),
+                connect_to=switch_id
+            )
+            added += 1
+    return engine
+
+
+def time_tick(engine, repeat=3, cold=True):
+    """Best-of-`repeat` wall time for one calculate_performance call, in seconds.
+
+    cold=True invalidates the route cache first (full recompute), cold=False times a
+    clean tick that only re-samples jitter.
+    """
+    best = float('inf')
+    engine.calculate_performance()
+    for _ in range(repeat):
+        if cold:
+            engine.invalidate()
+        start = time.perf_counter()
+        engine.calculate_performance()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main(sizes, compact=False):
+    print(f"{'devices':>8} {'cold (ms)':>10} {'us/device':>10} {'clean (ms)':>11}")
+    for n in sizes:
+        engine = build_plant(n, compact=compact)
+        cold = time_tick(engine, cold=True)
+        clean = time_tick(engine, cold=False)
+        print(f"{n:>8} {cold * 1000:>10.2f} {cold * 1e6 / n:>10.2f} {clean * 1000:>11.2f}")
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    compact = "--compact" in args
+    sizes = [int(arg) for arg in args if arg != "--compact"] or DEFAULT_SIZES
+    main(sizes, compact=compact)
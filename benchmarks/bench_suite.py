@@ -0,0 +1,175 @@
+"""
+Benchmark suite for the engine hot paths, with baseline regression tracking.
+
+For every generated topology (benchmarks/topologies.py) and size it times:
+- calculate_performance: cold (structural change: redundancy index, CSR arrays
+  and routes rebuilt), indexed (after a fault: routes re-resolved from the index)
+  and clean (jitter only)
+- get_topology (cold serialisation)
+- validate_connection with the engine's ConnectivityIndex, per call
+- the emit path: DeltaStream.publish + JSON encoding of one tick's delta
+- the PDF report (ExportService.render_pdf), up to --pdf-max devices
+
+Results are written as JSON keyed "shape/size/operation" (seconds, best of
+--repeat). With --baseline the run is compared key by key and exits with status 1
+when any operation got slower than the baseline by more than --threshold.
+
+    python benchmarks/bench_suite.py --save results.json
+    python benchmarks/bench_suite.py --baseline benchmarks/baseline.json --threshold 0.3
+    python benchmarks/bench_suite.py --full --save benchmarks/baseline.json   # up to 100k nodes
+"""
+import argparse
+import gc
+import json
+import os
+import platform
+import sys
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import networkx as nx
+import numpy as np
+
+from engine.delta_stream import DeltaStream
+from engine.export_service import ExportService
+from engine.validation_engine import ValidationEngine
+from benchmarks.topologies import SHAPES, MAX_DEEP_NODES, build
+
+QUICK_SIZES = [10, 100, 1000, 10000]
+FULL_SIZES = QUICK_SIZES + [100000]
+VALIDATE_CALLS = 200
+
+
+def best_of(fn, repeat, setup=None):
+    best = float('inf')
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        # Collect up front so a GC pause triggered by earlier allocations is not timed
+        gc.collect()
+        gc.disable()
+        try:
+            start = time.perf_counter()
+            fn()
+            best = min(best, time.perf_counter() - start)
+        finally:
+            gc.enable()
+    return best
+
+
+def bench_plant(shape, n, repeat, pdf_max):
+    engine = build(shape, n)
+    results = {}
+    engine.calculate_performance()
+
+    def structural_change():
+        # As after adding a device or cable: redundancy index, CSR arrays and routes all rebuilt
+        engine.structure_version += 1
+        engine.invalidate()
+    results["calculate_performance_cold"] = best_of(engine.calculate_performance, repeat, setup=structural_change)
+    # As after a fault: routes re-resolved from the (still valid) redundancy index, no search
+    results["calculate_performance_indexed"] = best_of(engine.calculate_performance, repeat,
+                                                       setup=engine.invalidate)
+    results["calculate_performance_clean"] = best_of(engine.calculate_performance, repeat)
+    results["get_topology"] = best_of(engine.get_topology, repeat, setup=engine.invalidate)
+
+    # New drive hanging off the last device, checked against the live loop index
+    target = list(engine.devices)[-1]
+    engine.connectivity.refresh(engine.graph)
+
+    def validate():
+        for _ in range(VALIDATE_CALLS):
+            ValidationEngine.validate_connection(engine.graph, "BENCH_NEW", target, "Drive", index=engine.connectivity)
+    results["validate_connection"] = best_of(validate, repeat) / VALIDATE_CALLS
+
+    topology, performance = engine.get_topology(), engine.calculate_performance()
+    stream = DeltaStream()
+    stream.publish(topology, performance, False)
+
+    def emit():
+        delta = stream.publish(topology, engine.calculate_performance(), False)
+        json.dumps(delta)
+    results["emit_delta"] = best_of(emit, repeat)
+
+    if n <= pdf_max:
+        results["pdf_report"] = best_of(lambda: ExportService.render_pdf(topology, performance), max(3, repeat // 2))
+    return results
+
+
+def run(sizes, shapes, repeat, pdf_max, log=print):
+    results = {}
+    for shape in shapes:
+        for n in sizes:
+            if shape in ("line", "ring") and n > MAX_DEEP_NODES:
+                continue
+            start = time.perf_counter()
+            for op, seconds in bench_plant(shape, n, repeat, pdf_max).items():
+                results[f"{shape}/{n}/{op}"] = seconds
+            log(f"{shape:>5} {n:>7}  done in {time.perf_counter() - start:.1f}s")
+    return results
+
+
+def compare(results, baseline, threshold, min_delta_s):
+    """Keys slower than baseline * (1 + threshold) and by more than min_delta_s (noise floor)."""
+    regressions = []
+    for key, seconds in sorted(results.items()):
+        base = baseline.get(key)
+        if base is None:
+            continue
+        if seconds > base * (1 + threshold) and seconds - base > min_delta_s:
+            regressions.append((key, base, seconds))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark engine hot paths and compare to a baseline.")
+    parser.add_argument("--sizes", type=lambda s: [int(x) for x in s.split(",")], default=None,
+                        help="comma-separated node counts (default: 10,100,1000,10000)")
+    parser.add_argument("--full", action="store_true", help="include 100k-node plants")
+    parser.add_argument("--shapes", type=lambda s: s.split(","), default=list(SHAPES))
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--pdf-max", type=int, default=1000, help="largest plant to render a PDF for")
+    parser.add_argument("--save", help="write results JSON here")
+    parser.add_argument("--baseline", help="baseline JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=0.5, help="allowed slowdown (0.5 = 50%%)")
+    parser.add_argument("--min-delta-ms", type=float, default=0.5, help="ignore slowdowns smaller than this")
+    args = parser.parse_args(argv)
+
+    sizes = args.sizes or (FULL_SIZES if args.full else QUICK_SIZES)
+    results = run(sizes, args.shapes, args.repeat, args.pdf_max)
+    report = {
+        "meta": {
+            "timestamp": time.time(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "numpy": np.__version__,
+            "networkx": nx.__version__,
+            "repeat": args.repeat,
+        },
+        "results": results,
+    }
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(report, f, indent=2, sort_keys=True)
+
+    print(f"{'benchmark':<45} {'ms':>10}")
+    for key, seconds in sorted(results.items()):
+        print(f"{key:<45} {seconds * 1000:>10.3f}")
+
+    if not args.baseline:
+        return 0
+    with open(args.baseline) as f:
+        baseline = json.load(f)["results"]
+    regressions = compare(results, baseline, args.threshold, args.min_delta_ms / 1000.0)
+    if not regressions:
+        print(f"No regressions against {args.baseline} (threshold {args.threshold:.0%})")
+        return 0
+    print(f"{len(regressions)} regression(s) against {args.baseline}:")
+    for key, base, seconds in regressions:
+        print(f"  {key:<45} {base * 1000:>9.3f} -> {seconds * 1000:>9.3f} ms ({seconds / base - 1:+.0%})")
+    return 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,52 @@
+"""
+Wall-clock cost of the discrete-event cyclic traffic simulation.
+
+Simulates a cell of N devices (switch tree, gigabit links, mixed 2-32 ms cycle
+times) for a given amount of plant time.
+
+    python benchmarks/bench_traffic.py
+    python benchmarks/bench_traffic.py 1000 60
+"""
+import os
+import sys
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from benchmarks.bench_performance import build_plant
+from engine.network_engine import DeviceType
+from engine.traffic_simulator import TrafficSimulator
+
+CYCLE_TIMES_MS = [2.0, 4.0, 8.0, 16.0, 32.0]
+LINK_SPEED_MBPS = 1000.0  # 100M saturates the PLC uplink at 1,000 devices
+
+
+def build_cell(n_devices):
+    engine = build_plant(n_devices)
+    for i, dev_id in enumerate(engine.devices):
+        device = engine.devices[dev_id]
+        if device.type != DeviceType.PLC:
+            device.cycle_time_ms = CYCLE_TIMES_MS[i % len(CYCLE_TIMES_MS)]
+    engine.invalidate()
+    return engine
+
+
+def main(n_devices, plant_seconds):
+    engine = build_cell(n_devices)
+    sim = TrafficSimulator(engine, link_speed_mbps=LINK_SPEED_MBPS)
+    start = time.perf_counter()
+    results = sim.run(plant_seconds)
+    elapsed = time.perf_counter() - start
+
+    frames = sum(r['frames'] for r in results)
+    worst = max(results, key=lambda r: r['p99_ms'] or 0)
+    print(f"devices={n_devices} plant_time={plant_seconds}s wall={elapsed:.2f}s")
+    print(f"frames={frames} events={sim.events_processed} periods_skipped={sim.periods_skipped}"
+          f" simulated={sim.simulated_s}s truncated={sim.truncated}")
+    print(f"worst p99: {worst['id']} {worst['p99_ms']} ms (max {worst['max_ms']} ms)")
+
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    seconds = float(sys.argv[2]) if len(sys.argv) > 2 else 60.0
+    main(n, seconds)
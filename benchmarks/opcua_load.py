@@ -0,0 +1,165 @@
+"""
+Load test for the OPC UA server (engine/opcua_server.py).
+
+Starts the server through OpcUaFeed, exactly as app.py does, and feeds it from a
+generated plant (benchmarks/topologies.py) recomputed every --interval seconds.
+Then --clients asyncua clients connect, each with one subscription, and monitor
+--items variables in total (Status/LatencyMs/JitterMs, split evenly between
+clients). Publish latency is the time from the engine result (the value's
+SourceTimestamp) to the data change notification reaching the client.
+
+    python benchmarks/opcua_load.py
+    python benchmarks/opcua_load.py --devices 3400 --items 10000 --clients 200 --duration 60
+
+Requires asyncua.
+"""
+import argparse
+import asyncio
+import os
+import sys
+import threading
+import time
+from datetime import timezone
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from asyncua import Client, ua
+
+from engine.opcua_server import OpcUaFeed, NAMESPACE_URI, FIELDS, variable_id
+from benchmarks.topologies import build
+
+
+class LatencyRecorder:
+    """Subscription handler: notification latency against the value's SourceTimestamp."""
+
+    def __init__(self):
+        self.since = float('inf')
+        self.samples = []
+        self.initial = 0
+
+    def datachange_notification(self, node, val, data):
+        source = data.monitored_item.Value.SourceTimestamp
+        if source is None:
+            return
+        if source.tzinfo is None:
+            source = source.replace(tzinfo=timezone.utc)
+        sent_at = source.timestamp()
+        if sent_at < self.since:
+            self.initial += 1  # current value on subscribe, not a publish
+            return
+        self.samples.append(time.time() - sent_at)
+
+
+def feed_loop(engine, feed, interval_s, stop):
+    while not stop.is_set():
+        start = time.monotonic()
+        performance = engine.calculate_performance()
+        feed.publish(engine.get_topology(), performance, time.time())
+        stop.wait(max(0.0, interval_s - (time.monotonic() - start)))
+
+
+async def wait_for_server(url, probe, timeout_s):
+    """Until the server is up and holds the last device (creating 10k nodes takes a while)."""
+    deadline = time.monotonic() + timeout_s
+    while True:
+        try:
+            async with Client(url) as client:
+                ns = await client.get_namespace_index(NAMESPACE_URI)
+                await client.get_node(ua.NodeId(probe, ns)).read_value()
+                return ns
+        except Exception:
+            if time.monotonic() > deadline:
+                raise
+            await asyncio.sleep(0.5)
+
+
+async def subscriber(url, ns, node_ids, period_ms, recorder, ready, done, connect_slots):
+    client = Client(url)
+    async with connect_slots:
+        await client.connect()
+        subscription = await client.create_subscription(period_ms, recorder)
+        nodes = [client.get_node(ua.NodeId(nid, ns)) for nid in node_ids]
+        for i in range(0, len(nodes), 500):
+            await subscription.subscribe_data_change(nodes[i:i + 500])
+    ready()
+    await done.wait()
+    await subscription.delete()
+    await client.disconnect()
+
+
+def percentile(sorted_values, q):
+    if not sorted_values:
+        return float('nan')
+    return sorted_values[min(len(sorted_values) - 1, int(q * len(sorted_values)))]
+
+
+async def run(args):
+    engine = build(args.shape, args.devices)
+    engine.calculate_performance()
+    url = f"opc.tcp://127.0.0.1:{args.port}/netsim/"
+    feed = OpcUaFeed(endpoint=f"opc.tcp://0.0.0.0:{args.port}/netsim/", deadband_ms=args.deadband_ms)
+    stop = threading.Event()
+    threads = [threading.Thread(target=feed.run, daemon=True),
+               threading.Thread(target=feed_loop, args=(engine, feed, args.interval, stop), daemon=True)]
+    for thread in threads:
+        thread.start()
+
+    try:
+        start = time.perf_counter()
+        ns = await wait_for_server(url, variable_id(list(engine.devices)[-1], FIELDS[-1]), args.startup_timeout)
+        print(f"server ready with {len(engine.devices)} devices in {time.perf_counter() - start:.1f}s")
+
+        variables = [variable_id(dev_id, field) for dev_id in engine.devices for field in FIELDS][:args.items]
+        per_client = max(1, len(variables) // args.clients)
+        slices = [variables[i * per_client:(i + 1) * per_client] for i in range(args.clients)]
+        slices[-1].extend(variables[args.clients * per_client:])
+
+        recorder = LatencyRecorder()
+        done = asyncio.Event()
+        connected = []
+        connect_slots = asyncio.Semaphore(20)
+        start = time.perf_counter()
+        tasks = [asyncio.create_task(subscriber(url, ns, node_ids, args.period_ms, recorder,
+                                                lambda: connected.append(1), done, connect_slots))
+                 for node_ids in slices if node_ids]
+        while len(connected) < len(tasks):
+            await asyncio.sleep(0.1)
+            failed = [t for t in tasks if t.done() and t.exception()]
+            if failed:
+                raise failed[0].exception()
+        print(f"{len(tasks)} clients monitoring {len(variables)} items, subscribed in "
+              f"{time.perf_counter() - start:.1f}s")
+
+        recorder.since = time.time()
+        await asyncio.sleep(args.duration)
+        done.set()
+        await asyncio.gather(*tasks, return_exceptions=True)
+    finally:
+        stop.set()
+        feed.stop()
+
+    samples = sorted(recorder.samples)
+    print(f"notifications: {len(samples)} in {args.duration:.0f}s ({len(samples) / args.duration:.0f}/s); "
+          f"feed lines {feed.lines_sent}, items {feed.items_sent}")
+    print("publish latency ms: " + "  ".join(
+        f"{name} {percentile(samples, q) * 1000:.1f}" for name, q in
+        (("p50", 0.5), ("p95", 0.95), ("p99", 0.99), ("max", 1.0))))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Subscribe many OPC UA clients to the simulator and time publishes.")
+    parser.add_argument("--shape", default="tree")
+    parser.add_argument("--devices", type=int, default=3400, help="plant size (3 variables per device)")
+    parser.add_argument("--items", type=int, default=10000, help="monitored items across all clients")
+    parser.add_argument("--clients", type=int, default=200)
+    parser.add_argument("--period-ms", type=float, default=100.0, help="subscription publishing interval")
+    parser.add_argument("--interval", type=float, default=1.0, help="engine tick, seconds")
+    parser.add_argument("--deadband-ms", type=float, default=0.0)
+    parser.add_argument("--duration", type=float, default=30.0)
+    parser.add_argument("--port", type=int, default=4841)
+    parser.add_argument("--startup-timeout", type=float, default=120.0)
+    asyncio.run(run(parser.parse_args(argv)))
+
+
+if __name__ == "__main__":
+    main()
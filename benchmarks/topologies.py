@@ -0,0 +1,74 @@
+"""
+Generated plant topologies for the benchmarks.
+
+- line: PLC followed by a daisy chain of drives (EtherCAT/PROFINET line)
+- star: PLC -> one core switch -> every other device
+- ring: PLC and switches closed into one declared MRP ring, a drive on every switch
+- tree: PLC -> SWITCH_FANOUT-ary switch tree, DEVICES_PER_SWITCH drives per switch
+"""
+import os
+import sys
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from engine.network_engine import NetworkEngine, Device, DeviceType, Protocol
+from benchmarks.bench_performance import build_plant
+
+SHAPES = ("line", "star", "ring", "tree")
+
+# Every device reports its full path, so deep shapes cost O(N^2) by definition;
+# line and ring are only generated up to this size
+MAX_DEEP_NODES = 2000
+
+
+def _plc(engine):
+    engine.add_device(Device(id="PLC", type=DeviceType.PLC, protocol=Protocol.PROFINET_IRT))
+
+
+def build_line(n):
+    engine = NetworkEngine()
+    _plc(engine)
+    previous = "PLC"
+    for i in range(1, n):
+        device_id = f"DR_{i}"
+        engine.add_device(Device(id=device_id, type=DeviceType.DRIVE, cycle_time_ms=1000.0), connect_to=previous)
+        previous = device_id
+    return engine
+
+
+def build_star(n):
+    engine = NetworkEngine()
+    _plc(engine)
+    if n > 1:
+        engine.add_device(Device(id="SW_CORE", type=DeviceType.SWITCH), connect_to="PLC")
+    for i in range(2, n):
+        engine.add_device(Device(id=f"DR_{i}", type=DeviceType.DRIVE, cycle_time_ms=1000.0), connect_to="SW_CORE")
+    return engine
+
+
+def build_ring(n):
+    engine = NetworkEngine()
+    _plc(engine)
+    switches = []
+    previous = "PLC"
+    added = 1
+    while added < n:
+        switch_id = f"SW_{len(switches)}"
+        engine.add_device(Device(id=switch_id, type=DeviceType.SWITCH), connect_to=previous)
+        switches.append(switch_id)
+        previous = switch_id
+        added += 1
+        if added < n:
+            engine.add_device(Device(id=f"DR_{len(switches)}", type=DeviceType.DRIVE, cycle_time_ms=1000.0),
+                              connect_to=switch_id)
+            added += 1
+    if len(switches) > 1:
+        engine.declare_ring("bench_ring", ["PLC"] + switches, "MRP")
+        engine.set_link_status(switches[-1], "PLC", True)
+    return engine
+
+
+def build(shape, n):
+    if shape == "tree":
+        return build_plant(n)
+    return {"line": build_line, "star": build_star, "ring": build_ring}[shape](n)
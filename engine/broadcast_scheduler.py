@@ -0,0 +1,179 @@
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+from engine.delta_stream import link_key
+
+
+def _merge_keyed(older: Dict, newer: Dict, key) -> Dict:
+    upsert = {key(item): item for item in older["upsert"]}
+    remove = {key(item): item for item in older["remove"]}
+    for item in newer["remove"]:
+        k = key(item)
+        upsert.pop(k, None)
+        remove[k] = item
+    for item in newer["upsert"]:
+        k = key(item)
+        remove.pop(k, None)
+        upsert[k] = item
+    return {"upsert": list(upsert.values()), "remove": list(remove.values())}
+
+
+def _merge_performance(older: Dict, newer: Dict) -> Dict:
+    # Upserts after the first one only carry changed fields, so fields are merged
+    upsert = {entry["id"]: dict(entry) for entry in older["upsert"]}
+    remove = dict.fromkeys(older["remove"])
+    for dev_id in newer["remove"]:
+        upsert.pop(dev_id, None)
+        remove[dev_id] = None
+    for entry in newer["upsert"]:
+        if entry["id"] in remove:
+            # Re-added after a removal: the stream sends the full entry
+            del remove[entry["id"]]
+            upsert[entry["id"]] = dict(entry)
+        elif entry["id"] in upsert:
+            upsert[entry["id"]].update(entry)
+        else:
+            upsert[entry["id"]] = dict(entry)
+    return {"upsert": list(upsert.values()), "remove": list(remove)}
+
+
+def merge_deltas(older: Dict, newer: Dict) -> Dict:
+    """
+    One delta equivalent to applying `older` then `newer`.
+
+    The result keeps `newer`'s seq and carries base_seq, the seq a client must be at
+    to apply it (older's base), so clients accept a merged delta that skips numbers.
+    """
+    return {
+        "type": "delta",
+        "seq": newer["seq"],
+        "base_seq": older.get("base_seq", older["seq"] - 1),
+        "nodes": _merge_keyed(older["nodes"], newer["nodes"], lambda node: node if isinstance(node, str) else node["id"]),
+        "links": _merge_keyed(older["links"], newer["links"], lambda link: (
+            link_key(*link) if isinstance(link, list) else link_key(link["source"], link["target"])
+        )),
+        "performance": _merge_performance(older["performance"], newer["performance"]),
+        "safety_active": newer["safety_active"],
+        "timestamp": newer["timestamp"],
+    }
+
+
+class _Client:
+    __slots__ = ("max_rate_hz", "last_sent", "held")
+
+    def __init__(self, max_rate_hz: float):
+        self.max_rate_hz = max_rate_hz
+        self.last_sent = float("-inf")
+        self.held: Optional[Dict] = None
+
+
+class BroadcastScheduler:
+    """
+    Debounces mutation-triggered broadcasts and rate-limits each client.
+
+    Debounce: note_mutation() opens a window; the broadcast is due `window_s` after
+    the last mutation, but never later than `max_delay_s` after the first one, so a
+    burst of 500 scripted faults becomes a handful of emits instead of 500.
+
+    Rate limit: dispatch() sends a delta to every client that has not received one in
+    the last 1 / max_rate_hz seconds. Clients still inside their interval keep one
+    held delta that later deltas are merged into (merge_deltas), and release_held()
+    sends it once the interval is over; a slow browser never sees more than its rate
+    and never builds a backlog.
+    """
+
+    def __init__(self, window_s: float = 0.05, max_delay_s: float = 0.25, client_max_rate_hz: float = 10.0,
+                 clock: Callable[[], float] = time.monotonic):
+        self.window_s = window_s
+        self.max_delay_s = max_delay_s
+        self.client_max_rate_hz = client_max_rate_hz
+        self.clock = clock
+        self.clients: Dict[str, _Client] = {}
+        self.mutations = 0
+        self.flushes = 0
+        self._first_mutation: Optional[float] = None
+        self._last_mutation: Optional[float] = None
+
+    # --- Debounce ---
+
+    def note_mutation(self):
+        now = self.clock()
+        self.mutations += 1
+        if self._first_mutation is None:
+            self._first_mutation = now
+        self._last_mutation = now
+
+    def due_in(self) -> Optional[float]:
+        """Seconds until the pending mutations should be broadcast (<= 0: now), None if none pending."""
+        if self._first_mutation is None:
+            return None
+        due = min(self._last_mutation + self.window_s, self._first_mutation + self.max_delay_s)
+        return due - self.clock()
+
+    def flushed(self):
+        """Marks the pending mutations as broadcast."""
+        if self._first_mutation is not None:
+            self.flushes += 1
+        self._first_mutation = self._last_mutation = None
+
+    # --- Per-client rate limit ---
+
+    def add_client(self, sid: str, max_rate_hz: Optional[float] = None):
+        """Registers a client that was just sent a snapshot (drops anything held for it)."""
+        self.clients[sid] = _Client(self._clamp(max_rate_hz))
+        self.clients[sid].last_sent = self.clock()
+
+    def set_client_rate(self, sid: str, max_rate_hz: Optional[float]):
+        if sid in self.clients:
+            self.clients[sid].max_rate_hz = self._clamp(max_rate_hz)
+
+    def remove_client(self, sid: str):
+        self.clients.pop(sid, None)
+
+    def dispatch(self, delta: Dict) -> List[Tuple[Optional[str], Dict]]:
+        """
+        (sid, payload) pairs to emit now for a freshly published delta.
+
+        sid None means "broadcast to everyone": used when no client is held back, so
+        the common case costs one emit regardless of the number of clients.
+        """
+        now = self.clock()
+        if all(c.held is None and self._allowed(c, now) for c in self.clients.values()):
+            for client in self.clients.values():
+                client.last_sent = now
+            return [(None, delta)]
+
+        out = []
+        for sid, client in self.clients.items():
+            client.held = delta if client.held is None else merge_deltas(client.held, delta)
+            if self._allowed(client, now):
+                out.append((sid, client.held))
+                client.held = None
+                client.last_sent = now
+        return out
+
+    def release_held(self) -> List[Tuple[str, Dict]]:
+        """Held deltas whose client interval has elapsed."""
+        now = self.clock()
+        out = []
+        for sid, client in self.clients.items():
+            if client.held is not None and self._allowed(client, now):
+                out.append((sid, client.held))
+                client.held = None
+                client.last_sent = now
+        return out
+
+    def next_release_in(self) -> Optional[float]:
+        """Seconds until the next held delta may be sent, None if nothing is held."""
+        now = self.clock()
+        waits = [client.last_sent + 1.0 / client.max_rate_hz - now
+                 for client in self.clients.values() if client.held is not None]
+        return min(waits) if waits else None
+
+    def _allowed(self, client: _Client, now: float) -> bool:
+        return now - client.last_sent >= 1.0 / client.max_rate_hz
+
+    def _clamp(self, max_rate_hz: Optional[float]) -> float:
+        if not max_rate_hz or max_rate_hz <= 0:
+            return self.client_max_rate_hz
+        return min(float(max_rate_hz), self.client_max_rate_hz)
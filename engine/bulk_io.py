@@ -0,0 +1,216 @@
+import csv
+import io
+import json
+import math
+from typing import Dict, Iterable, Iterator, List, Tuple
+
+from engine.models import Device, DeviceType, DeviceStatus, Protocol
+from engine.validation_engine import ValidationEngine
+from engine.link_model import LINK_SPEEDS_MBPS, DEFAULT_SPEED_MBPS
+
+# Column order for CSV import/export; a row only fills the columns of its kind
+CSV_FIELDS = [
+    "kind", "id", "type", "protocol", "ip", "status", "cycle_time", "display_name", "controller",
+    "processing_delay_us", "connect_to", "source", "target", "active", "weight", "speed_mbps", "length_m",
+    "utilization", "name", "members",
+]
+
+
+def iter_rows(lines: Iterable[str], fmt: str = "ndjson") -> Iterator[Tuple[int, Dict]]:
+    """Parses an NDJSON or CSV line stream lazily into (line number, row dict)."""
+    if fmt == "csv":
+        reader = csv.DictReader(lines)
+        for row in reader:
+            # Empty cells mean "not given"
+            yield reader.line_num, {k: v for k, v in row.items() if k and v not in (None, "")}
+        return
+    for line_no, line in enumerate(lines, start=1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            row = json.loads(line)
+        except json.JSONDecodeError as e:
+            yield line_no, {"_error": f"Invalid JSON: {e.msg}"}
+            continue
+        yield line_no, row if isinstance(row, dict) else {"_error": "Row must be a JSON object"}
+
+
+def _row_kind(row: Dict) -> str:
+    if "kind" in row:
+        return row["kind"]
+    if "members" in row:
+        return "ring"
+    if "source" in row or "u" in row:
+        return "link"
+    return "device"
+
+
+def as_bool(value) -> bool:
+    if isinstance(value, str):
+        return value.strip().lower() in ("1", "true", "yes")
+    return bool(value)
+
+
+class BulkImporter:
+    """
+    Applies a stream of device / link / ring rows to an engine in one pass.
+
+    Each row is validated against the state built so far (loop checks go through
+    the engine's ConnectivityIndex), valid rows are applied immediately and bad
+    rows are reported with their line number. The caller broadcasts once at the end.
+    """
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.applied = {"devices": 0, "links": 0, "rings": 0}
+        self.errors: List[Dict] = []
+
+    def apply(self, rows: Iterable[Tuple[int, Dict]]) -> Dict:
+        for line_no, row in rows:
+            try:
+                if "_error" in row:
+                    raise ValueError(row["_error"])
+                kind = _row_kind(row)
+                if kind == "device":
+                    self._apply_device(row)
+                elif kind == "link":
+                    self._apply_link(row)
+                elif kind == "ring":
+                    self._apply_ring(row)
+                else:
+                    raise ValueError(f"Unknown row kind: {kind}")
+            except (KeyError, ValueError, TypeError) as e:
+                message = f"Missing field: {e.args[0]}" if isinstance(e, KeyError) else str(e)
+                self.errors.append({"row": line_no, "error": message})
+        return self.report()
+
+    def report(self) -> Dict:
+        return {
+            "status": "ok" if not self.errors else "partial",
+            "applied": self.applied,
+            "errors": self.errors,
+        }
+
+    def _apply_device(self, row: Dict):
+        engine = self.engine
+        if row["id"] in engine.devices:
+            raise ValueError(f"Duplicate device id: {row['id']}")
+        connect_to = row.get("connect_to")
+        if connect_to and connect_to not in engine.devices:
+            raise ValueError(f"connect_to references unknown device: {connect_to}")
+
+        device = Device(
+            id=row["id"],
+            type=DeviceType(row["type"]),
+            ip=row.get("ip"),
+            status=DeviceStatus(row.get("status", DeviceStatus.ONLINE)),
+            protocol=Protocol(row.get("protocol", Protocol.PROFINET_RT)),
+            cycle_time_ms=float(row.get("cycle_time", row.get("cycle_time_ms", 1.0))),
+            display_name=row.get("display_name"),
+            controller=row.get("controller"),
+            processing_delay_us=float(row["processing_delay_us"]) if "processing_delay_us" in row else None,
+        )
+        validation = ValidationEngine.validate_connection(
+            engine.graph, device.id, connect_to, device.type, index=engine.connectivity
+        )
+        if not validation["is_valid"]:
+            raise ValueError(validation["errors"][0])
+        engine.add_device(device, connect_to=connect_to)
+        self.applied["devices"] += 1
+
+    def _apply_link(self, row: Dict):
+        engine = self.engine
+        u, v = row.get("source", row.get("u")), row.get("target", row.get("v"))
+        if u is None or v is None:
+            raise ValueError("Link rows need source and target")
+        for node in (u, v):
+            if node not in engine.devices:
+                raise ValueError(f"Link references unknown device: {node}")
+        # Parse and check every field before touching the engine: a bad row changes nothing
+        active = as_bool(row.get("active", True))
+        weight = float(row["weight"]) if "weight" in row else None
+        if weight is not None and not (math.isfinite(weight) and weight >= 0.0):
+            raise ValueError("weight must be a finite, non-negative delay in ms")
+        speed = float(row["speed_mbps"]) if "speed_mbps" in row else None
+        if speed is not None and speed not in LINK_SPEEDS_MBPS:
+            raise ValueError(f"speed_mbps must be one of {', '.join(f'{s:g}' for s in LINK_SPEEDS_MBPS)}")
+        length = float(row["length_m"]) if "length_m" in row else None
+        if length is not None and not (math.isfinite(length) and length >= 0.0):
+            raise ValueError("length_m must be a finite, non-negative length")
+        utilization = float(row["utilization"]) if "utilization" in row else None
+        if utilization is not None and not 0.0 <= utilization <= 1.0:
+            raise ValueError("utilization must be between 0 and 1")
+        if not engine.graph.has_edge(u, v):
+            engine.connectivity.refresh(engine.graph)
+            if engine.connectivity.check_edge(u, v) == "loop":
+                raise ValueError("RIESGO: Bucle infinito detectado (Tormenta de broadcast). Use un Switch con STP/MRP.")
+
+        engine.set_link_status(u, v, active)
+        if weight is not None:
+            engine.set_link_weight(u, v, weight)
+        if speed is not None or length is not None:
+            engine.set_link_properties(u, v, speed, length)
+        if utilization is not None:
+            engine.set_link_utilization(u, v, utilization)
+        self.applied["links"] += 1
+
+    def _apply_ring(self, row: Dict):
+        members = row["members"]
+        if isinstance(members, str):
+            members = [m for m in members.split(";") if m]
+        self.engine.declare_ring(row["name"], members, row.get("protocol", "MRP"))
+        self.applied["rings"] += 1
+
+
+def export_rows(engine) -> Iterator[Dict]:
+    """Current engine state as import-compatible rows: rings, then devices, then links."""
+    for name, ring in engine.connectivity.rings.items():
+        yield {"kind": "ring", "name": name, "members": ring["members"], "protocol": ring["protocol"]}
+    for dev_id in engine.devices:
+        device = engine.devices[dev_id]
+        yield {
+            "kind": "device",
+            "id": device.id,
+            "type": device.type.value,
+            "protocol": device.protocol.value,
+            "ip": device.ip,
+            "status": device.status.value,
+            "cycle_time": device.cycle_time_ms,
+            "display_name": device.display_name,
+            "controller": device.controller,
+            "processing_delay_us": device.processing_delay_us,
+        }
+    for u, v, d in engine.graph.edges(data=True):
+        yield {
+            "kind": "link",
+            "source": u,
+            "target": v,
+            "active": d.get("active", True),
+            "weight": d.get("weight", 0.1),
+            "speed_mbps": d.get("speed_mbps", DEFAULT_SPEED_MBPS),
+            "length_m": d.get("length_m", 0.0),
+            "utilization": d.get("utilization", 0.0),
+        }
+
+
+def export_lines(engine, fmt: str = "ndjson") -> Iterator[str]:
+    """Streams export_rows() as NDJSON or CSV text, one line at a time."""
+    if fmt != "csv":
+        for row in export_rows(engine):
+            yield json.dumps({k: v for k, v in row.items() if v is not None}) + "\n"
+        return
+
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=CSV_FIELDS, lineterminator="\n")
+    writer.writeheader()
+    yield buffer.getvalue()
+    buffer.seek(0)
+    buffer.truncate()
+    for row in export_rows(engine):
+        if row["kind"] == "ring":
+            row = dict(row, members=";".join(row["members"]))
+        writer.writerow(row)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
@@ -0,0 +1,116 @@
+import threading
+import time
+import networkx as nx
+from typing import Callable, Dict, List, Optional
+
+from engine.latency_model import RouteTable
+from engine.network_engine import build_route_table
+from engine.redundancy import RedundancyIndex
+
+
+def _run_inline(fn, *args):
+    return fn(*args)
+
+
+class ComputeResult:
+    """One published computation: performance + topology for a single engine version."""
+
+    def __init__(self, version: int, performance: List[Dict], topology: Dict, duration_s: float, serial: int = 0):
+        self.version = version
+        # Increases with every published result (jitter changes even when version does not)
+        self.serial = serial
+        self.performance = performance
+        self.topology = topology
+        self.duration_s = duration_s
+        self.computed_at = time.time()
+
+
+class ComputeWorker:
+    """
+    Moves path computation and jitter evaluation off the request path.
+
+    Handlers read `latest` (never blocks) and call request() after a mutation. A
+    single background task calls refresh(): it takes a frozen copy of the engine's
+    route inputs and runs the heavy work through `execute`, e.g. eventlet's
+    tpool.execute so it runs on a real OS thread while the hub keeps serving
+    requests. Faults that the redundancy index can absorb (primary -> backup)
+    need no search at all; only structural changes rebuild the index off-thread. Any number of mutations between two refresh() calls costs one
+    recompute; mutations made while a recompute runs are picked up by the next one.
+    Workers of several engines can share one `wakeup` event so a single loop serves them all.
+    """
+
+    def __init__(self, engine, execute: Optional[Callable] = None, wakeup: Optional[threading.Event] = None):
+        self.engine = engine
+        self.execute = execute or _run_inline
+        self.latest: Optional[ComputeResult] = None
+        self.wakeup = wakeup if wakeup is not None else threading.Event()
+        self.recomputes = 0
+        self.published = 0
+        self.coalesced = 0
+        self._pending = 0
+        self._table: Optional[RouteTable] = None
+        self._table_version: Optional[int] = None
+
+    def request(self):
+        """Signals that the engine changed; cheap enough to call from any handler."""
+        self._pending += 1
+        self.wakeup.set()
+
+    def wait(self, timeout: float) -> bool:
+        """Sleeps until request() or `timeout`; True if woken by a request."""
+        woken = self.wakeup.wait(timeout)
+        self.wakeup.clear()
+        return woken
+
+    def refresh(self) -> ComputeResult:
+        """Recomputes paths if the engine changed, re-samples jitter, and publishes the result."""
+        engine = self.engine
+        start = time.perf_counter()
+        version = engine.version
+        if self._pending > 1:
+            self.coalesced += self._pending - 1
+        self._pending = 0
+        # Topology reads live device objects, so it stays here (cached per version)
+        topology = engine.get_topology()
+
+        if self._table is None or self._table_version != version:
+            inputs = engine.route_inputs()
+            with engine.timer.phase("paths"):
+                if engine.redundancy_stale():
+                    # Structural change: snapshot first, the index rebuild yields to the hub
+                    if inputs.csr is None:
+                        inputs = inputs._replace(graph=nx.freeze(inputs.graph.copy()))
+                    self.redundancy_index()
+                # Only valid if nothing changed while the index was rebuilt
+                table = engine.routes_from_index(inputs) if engine.version == version else None
+                if table is None:
+                    if inputs.csr is None and not nx.is_frozen(inputs.graph):
+                        # Copy on this thread (cheap, O(N+E)); Dijkstra runs on the worker
+                        inputs = inputs._replace(graph=nx.freeze(inputs.graph.copy()))
+                    table = self.execute(build_route_table, inputs)
+                    engine.annotate_routes(table)
+            self._table = table
+            self._table_version = version
+            self.recomputes += 1
+        engine.apply_link_load(self._table)
+        with engine.timer.phase("jitter"):
+            performance = self.execute(engine.evaluate_routes, self._table)
+
+        self.published += 1
+        self.latest = ComputeResult(version, performance, topology, time.perf_counter() - start, self.published)
+        return self.latest
+
+    def redundancy_index(self) -> Optional[RedundancyIndex]:
+        """The engine's redundancy index, rebuilt through `execute` after a structural change."""
+        engine = self.engine
+        if engine.redundancy_stale():
+            inputs = engine.route_inputs()
+            index = self.execute(RedundancyIndex.build, engine.structure_version, nx.freeze(engine.graph.copy()),
+                                 inputs.controllers, inputs.ids, inputs.owners)
+            # Dropped if the structure changed meanwhile; the next refresh builds it again
+            engine.install_redundancy(index)
+        return engine.redundancy
+
+    def current(self) -> ComputeResult:
+        """The latest result, computing one inline only if nothing was published yet."""
+        return self.latest if self.latest is not None else self.refresh()
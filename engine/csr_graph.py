@@ -0,0 +1,238 @@
+"""
+The cabling as CSR arrays, for route searches on large plants.
+
+CsrGraph stores the physical graph in compressed sparse row form. The neighbours
+of node i are indices[indptr[i]:indptr[i + 1]]. `weights` holds the link cost of
+each half-edge and `edge_of` the undirected link it belongs to. Faults do not touch
+the arrays: `online` (per node) and `active` (per link) masks select the live part,
+so the structure is only rebuilt after a structural change (structure_version).
+
+shortest_paths() runs one multi-source Dijkstra over the live half-edges. It uses
+scipy.sparse.csgraph (compiled) when SciPy is installed, and otherwise a binary
+heap over plain lists that explores in networkx's order, so ties resolve the same
+way. The compiled kernel picks another predecessor on equal-cost paths, so its
+result is only kept when no node has two shortest-path predecessors (then the
+tree is unique and identical to networkx's); otherwise the heap kernel reruns. ShortestPathTree accumulates the latency and builds paths lazily from the
+predecessor array.
+"""
+import copy
+import heapq
+import math
+from itertools import count
+from typing import Dict, Hashable, List, Optional, Sequence
+
+import networkx as nx
+import numpy as np
+
+try:
+    from scipy.sparse import csr_matrix
+    from scipy.sparse.csgraph import dijkstra as csgraph_dijkstra
+except ImportError:
+    csr_matrix = csgraph_dijkstra = None
+
+
+class ShortestPathTree:
+    """Distances and predecessors from one search; paths are built on first use and shared."""
+
+    def __init__(self, ids: List[str], index: Dict[str, int], dist: List[float], pred: List[int],
+                 sources: Sequence[int]):
+        self.ids = ids
+        self.index = index
+        # Sum(link cost) from the nearest source, inf when unreachable
+        self.dist = dist
+        self.pred = pred
+        self._paths: Dict[int, List[str]] = {s: [ids[s]] for s in sources}
+
+    def distance(self, node_id: str) -> float:
+        """Sum(link cost) along path(node_id), NaN when unreachable."""
+        d = self.dist[self.index[node_id]]
+        return math.nan if d == math.inf else d
+
+    def path(self, node_id: str) -> Optional[List[str]]:
+        """Node ids from the nearest source to `node_id`, None when unreachable."""
+        node = self.index[node_id]
+        paths = self._paths
+        path = paths.get(node)
+        if path is not None or self.dist[node] == math.inf:
+            return path
+        pred, chain = self.pred, []
+        while node not in paths:
+            chain.append(node)
+            node = pred[node]
+        path = paths[node]
+        for node in reversed(chain):
+            path = path + [self.ids[node]]
+            paths[node] = path
+        return path
+
+
+class CsrGraph:
+    """Physical cabling as CSR arrays plus online (per node) and active (per link) masks."""
+
+    def __init__(self, structure_version: int, ids: List[str], indptr: np.ndarray, indices: np.ndarray,
+                 edge_of: np.ndarray, link_sources: np.ndarray, link_targets: np.ndarray, costs: np.ndarray,
+                 delays: np.ndarray, online: np.ndarray, active: np.ndarray):
+        self.structure_version = structure_version
+        self.ids = ids
+        self.index = {node: i for i, node in enumerate(ids)}
+        self.indptr = indptr
+        self.indices = indices
+        self.edge_of = edge_of
+        self.weights = costs[edge_of]
+        # Owning node of every half-edge (the row of indices)
+        self.rows = np.repeat(np.arange(len(ids), dtype=np.int32), np.diff(indptr))
+        # Links in graph.edges() order: endpoints, routing cost, fixed delay ('weight')
+        self.link_sources = link_sources
+        self.link_targets = link_targets
+        self.costs = costs
+        self.delays = delays
+        self.online = online
+        self.active = active
+        # Compiled searches rerun on the heap kernel because of equal-cost paths
+        self.tied_searches = 0
+
+    @classmethod
+    def from_graph(cls, structure_version: int, graph: nx.Graph, active_graph: nx.Graph) -> "CsrGraph":
+        """Arrays from the physical graph (link costs in 'cost'); masks from the active view."""
+        ids = list(graph)
+        index = {node: i for i, node in enumerate(ids)}
+        indptr = [0]
+        indices, edge_of = [], []
+        sources, targets, costs, delays, active = [], [], [], [], []
+        # Both half-edges share one attribute dict, which identifies the link
+        link_of: Dict[int, int] = {}
+        for u, neighbors in graph.adjacency():
+            i = index[u]
+            for v, d in neighbors.items():
+                link = link_of.get(id(d))
+                if link is None:
+                    link = link_of[id(d)] = len(sources)
+                    sources.append(i)
+                    targets.append(index[v])
+                    costs.append(d['cost'])
+                    delays.append(d.get('weight', 0.1))
+                    active.append(d.get('active', True))
+                indices.append(index[v])
+                edge_of.append(link)
+            indptr.append(len(indices))
+        return cls(
+            structure_version, ids,
+            np.array(indptr, dtype=np.int64), np.array(indices, dtype=np.int32), np.array(edge_of, dtype=np.int32),
+            np.array(sources, dtype=np.int32), np.array(targets, dtype=np.int32),
+            np.array(costs, dtype=np.float64), np.array(delays, dtype=np.float64),
+            np.fromiter((node in active_graph for node in ids), dtype=bool, count=len(ids)),
+            np.array(active, dtype=bool),
+        )
+
+    def __len__(self):
+        return len(self.ids)
+
+    def snapshot(self) -> "CsrGraph":
+        """Shares the (immutable) structure, copies the masks: safe to hand to another thread."""
+        view = copy.copy(self)
+        view.online = self.online.copy()
+        view.active = self.active.copy()
+        return view
+
+    # --- Masks ---
+
+    def link_index(self, u: str, v: str) -> Optional[int]:
+        i, j = self.index.get(u), self.index.get(v)
+        if i is None or j is None:
+            return None
+        start = self.indptr[i]
+        hits = np.flatnonzero(self.indices[start:self.indptr[i + 1]] == j)
+        return int(self.edge_of[start + hits[0]]) if hits.size else None
+
+    def set_down(self, element: Hashable, down: bool):
+        """A device id or an edge_key went down / came back (same elements as RedundancyIndex)."""
+        if isinstance(element, tuple):
+            link = self.link_index(*element)
+            if link is not None:
+                self.active[link] = not down
+        else:
+            node = self.index.get(element)
+            if node is not None:
+                self.online[node] = not down
+
+    def is_online(self, node_id: str) -> bool:
+        node = self.index.get(node_id)
+        return node is not None and bool(self.online[node])
+
+    def live(self) -> np.ndarray:
+        """Half-edges of the active view: link active and both ends online."""
+        return self.active[self.edge_of] & self.online[self.rows] & self.online[self.indices]
+
+    # --- Searches ---
+
+    def shortest_paths(self, sources: Sequence[str], compiled: bool = True) -> ShortestPathTree:
+        """Multi-source Dijkstra over the live half-edges from the (online) `sources`."""
+        starts = [self.index[s] for s in sources]
+        dist = pred = None
+        if compiled and csgraph_dijkstra is not None:
+            dist, pred = self._dijkstra_compiled(starts)
+        if dist is None:
+            dist, pred = self._dijkstra_heap(starts)
+        return ShortestPathTree(self.ids, self.index, dist, pred, starts)
+
+    def _dijkstra_compiled(self, starts: List[int]):
+        n = len(self.ids)
+        live = self.live()
+        indptr = np.zeros(n + 1, dtype=np.int64)
+        np.cumsum(np.bincount(self.rows[live], minlength=n), out=indptr[1:])
+        matrix = csr_matrix((self.weights[live], self.indices[live], indptr), shape=(n, n))
+        dist, pred, _ = csgraph_dijkstra(matrix, directed=True, indices=starts, return_predecessors=True,
+                                         min_only=True)
+        # Tight half-edges (dist[u] + w == dist[v]): two into one node is a tie, and
+        # networkx's choice then depends on its exploration order
+        sources, targets = self.rows[live], self.indices[live]
+        reached = np.isfinite(dist[targets])
+        tight = reached & (dist[sources] + self.weights[live] == dist[targets])
+        if np.bincount(targets[tight], minlength=n).max(initial=0) > 1:
+            self.tied_searches += 1
+            return None, None
+        return dist.tolist(), pred.tolist()
+
+    def _dijkstra_heap(self, starts: List[int]):
+        # Same exploration order and tie-breaking as networkx's _dijkstra_multisource
+        indptr = self.indptr.tolist()
+        indices = self.indices.tolist()
+        weights = self.weights.tolist()
+        live = self.live().tolist()
+        n = len(self.ids)
+        seen = [math.inf] * n
+        pred = [-1] * n
+        done = bytearray(n)
+        dist = [math.inf] * n
+        push, pop, c = heapq.heappush, heapq.heappop, count()
+        fringe = []
+        for s in starts:
+            seen[s] = 0.0
+            push(fringe, (0.0, next(c), s))
+        while fringe:
+            d, _, v = pop(fringe)
+            if done[v]:
+                continue
+            done[v] = 1
+            dist[v] = d
+            for e in range(indptr[v], indptr[v + 1]):
+                u = indices[e]
+                if not live[e] or done[u]:
+                    continue
+                vu = d + weights[e]
+                if vu < seen[u]:
+                    seen[u] = vu
+                    pred[u] = v
+                    push(fringe, (vu, next(c), u))
+        return dist, pred
+
+    # --- Topology ---
+
+    def links(self) -> List[Dict]:
+        """JSON-friendly links in graph.edges() order (same shape as get_topology)."""
+        ids = self.ids
+        return [
+            {"source": ids[u], "target": ids[v], "active": a, "weight": w}
+            for u, v, a, w in zip(self.link_sources.tolist(), self.link_targets.tolist(),
+                                  self.active.tolist(), self.delays.tolist())
+        ]
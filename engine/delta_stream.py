@@ -0,0 +1,113 @@
+import time
+from typing import Dict, List, Optional
+
+
+def link_key(source: str, target: str) -> str:
+    """Orientation-independent key for an undirected link."""
+    return "|".join(sorted((source, target)))
+
+
+class DeltaStream:
+    """
+    Turns successive (topology, performance) results into a numbered stream of deltas.
+
+    The stream remembers the last state it published. A client joins with snapshot()
+    and then applies every delta whose seq is exactly its last seq + 1; on a gap it
+    asks for a new snapshot.
+    """
+
+    def __init__(self):
+        self.seq = 0
+        self.safety_active = False
+        self._topology = None  # last topology object seen (engine caches it by version)
+        self._nodes: Dict[str, Dict] = {}
+        self._links: Dict[str, Dict] = {}
+        self._performance: Dict[str, Dict] = {}
+
+    def snapshot(self) -> Dict:
+        """Full state as of the current seq."""
+        return {
+            "type": "snapshot",
+            "seq": self.seq,
+            "topology": {
+                "nodes": list(self._nodes.values()),
+                "links": list(self._links.values()),
+            },
+            "performance": list(self._performance.values()),
+            "safety_active": self.safety_active,
+            "timestamp": time.time(),
+        }
+
+    def publish(self, topology: Dict, performance: List[Dict], safety_active: bool) -> Optional[Dict]:
+        """Records a new state and returns the delta from the previous one, or None if nothing changed."""
+        delta = {
+            "type": "delta",
+            "seq": self.seq + 1,
+            "nodes": {"upsert": [], "remove": []},
+            "links": {"upsert": [], "remove": []},
+            "performance": {"upsert": [], "remove": []},
+            "safety_active": safety_active,
+            "timestamp": time.time(),
+        }
+
+        # Same cached object => topology untouched since last publish, skip the diff
+        if topology is not self._topology:
+            self._diff_nodes(topology["nodes"], delta["nodes"])
+            self._diff_links(topology["links"], delta["links"])
+            self._topology = topology
+        self._diff_performance(performance, delta["performance"])
+
+        changed = (
+            safety_active != self.safety_active
+            or any(section["upsert"] or section["remove"]
+                   for section in (delta["nodes"], delta["links"], delta["performance"]))
+        )
+        if not changed:
+            return None
+
+        self.safety_active = safety_active
+        self.seq += 1
+        return delta
+
+    def _diff_nodes(self, nodes: List[Dict], out: Dict):
+        seen = set()
+        for node in nodes:
+            node_id = node["id"]
+            seen.add(node_id)
+            if self._nodes.get(node_id) != node:
+                self._nodes[node_id] = node
+                out["upsert"].append(node)
+        for node_id in [n for n in self._nodes if n not in seen]:
+            del self._nodes[node_id]
+            out["remove"].append(node_id)
+
+    def _diff_links(self, links: List[Dict], out: Dict):
+        seen = set()
+        for link in links:
+            key = link_key(link["source"], link["target"])
+            seen.add(key)
+            if self._links.get(key) != link:
+                self._links[key] = link
+                out["upsert"].append(link)
+        for key in [k for k in self._links if k not in seen]:
+            link = self._links.pop(key)
+            out["remove"].append([link["source"], link["target"]])
+
+    def _diff_performance(self, performance: List[Dict], out: Dict):
+        # Only changed fields are sent; jitter alone usually touches latency_ms/jitter_ms
+        seen = set()
+        for entry in performance:
+            dev_id = entry["id"]
+            seen.add(dev_id)
+            previous = self._performance.get(dev_id)
+            if previous is None:
+                out["upsert"].append(entry)
+            else:
+                changed = {k: v for k, v in entry.items() if previous.get(k) != v}
+                if changed:
+                    changed["id"] = dev_id
+                    out["upsert"].append(changed)
+            self._performance[dev_id] = entry
+        for dev_id in [d for d in self._performance if d not in seen]:
+            del self._performance[dev_id]
+            out["remove"].append(dev_id)
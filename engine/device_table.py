@@ -0,0 +1,171 @@
+import numpy as np
+from collections.abc import Mapping
+from typing import Dict, Iterator, List, Optional
+
+from engine.models import (
+    Device, DeviceStatus, DeviceType, PROTOCOL_CODES, DEVICE_TYPE_CODES, DEVICE_STATUS_CODES,
+    PROTOCOLS, DEVICE_TYPES, DEVICE_STATUSES,
+)
+
+
+class DeviceTable(Mapping):
+    """
+    Columnar device store: one typed array per field plus an id -> row index map.
+
+    Behaves like a read-only Dict[str, Device] (Device objects are built on access,
+    i.e. only at the API boundary). All writes go through the explicit setters.
+    Removed rows are tombstoned so iteration keeps insertion order, and the table
+    compacts itself once more than half of the rows are dead.
+    """
+
+    def __init__(self, capacity: int = 64):
+        self.index: Dict[str, int] = {}
+        self.ids: List[Optional[str]] = []
+        self.ips: List[Optional[str]] = []
+        self.display_names: List[Optional[str]] = []
+        self.controllers: List[Optional[str]] = []
+        self.types = np.zeros(capacity, dtype=np.int8)
+        self.protocols = np.zeros(capacity, dtype=np.int8)
+        self.statuses = np.zeros(capacity, dtype=np.int8)
+        self.cycle_times = np.zeros(capacity, dtype=np.float64)
+        # NaN = the type's default processing delay
+        self.processing_delays = np.full(capacity, np.nan, dtype=np.float64)
+        self.alive = np.zeros(capacity, dtype=bool)
+        self._dead = 0
+
+    # --- Mapping interface (API boundary) ---
+
+    def __getitem__(self, device_id: str) -> Device:
+        return self.device(self.index[device_id])
+
+    def __contains__(self, device_id) -> bool:
+        return device_id in self.index
+
+    def __iter__(self) -> Iterator[str]:
+        for i in self.rows().tolist():
+            yield self.ids[i]
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+    def device(self, row: int) -> Device:
+        return Device(
+            id=self.ids[row],
+            type=DEVICE_TYPES[self.types[row]],
+            ip=self.ips[row],
+            status=DEVICE_STATUSES[self.statuses[row]],
+            protocol=PROTOCOLS[self.protocols[row]],
+            cycle_time_ms=float(self.cycle_times[row]),
+            display_name=self.display_names[row],
+            controller=self.controllers[row],
+            processing_delay_us=self.processing_delay_of_row(row),
+        )
+
+    # --- Column access ---
+
+    def rows(self) -> np.ndarray:
+        """Indices of live rows, in insertion order."""
+        return np.flatnonzero(self.alive[:len(self.ids)])
+
+    def type_of(self, device_id: str) -> DeviceType:
+        return DEVICE_TYPES[self.types[self.index[device_id]]]
+
+    def status_of(self, device_id: str) -> DeviceStatus:
+        return DEVICE_STATUSES[self.statuses[self.index[device_id]]]
+
+    def processing_delay_of_row(self, row: int) -> Optional[float]:
+        value = float(self.processing_delays[row])
+        return None if np.isnan(value) else value
+
+    # --- Writes ---
+
+    def add(self, device: Device) -> int:
+        """Inserts (or overwrites in place) a device and returns its row."""
+        row = self.index.get(device.id)
+        if row is None:
+            row = len(self.ids)
+            if row == len(self.alive):
+                self._grow()
+            self.ids.append(device.id)
+            self.ips.append(device.ip)
+            self.display_names.append(device.display_name)
+            self.controllers.append(device.controller)
+            self.index[device.id] = row
+        else:
+            self.ips[row] = device.ip
+            self.display_names[row] = device.display_name
+            self.controllers[row] = device.controller
+        self.types[row] = DEVICE_TYPE_CODES[device.type]
+        self.protocols[row] = PROTOCOL_CODES[device.protocol]
+        self.statuses[row] = DEVICE_STATUS_CODES[device.status]
+        self.cycle_times[row] = device.cycle_time_ms
+        self.processing_delays[row] = np.nan if device.processing_delay_us is None else device.processing_delay_us
+        self.alive[row] = True
+        return row
+
+    def remove(self, device_id: str):
+        row = self.index.pop(device_id)
+        self.alive[row] = False
+        self.ids[row] = self.ips[row] = self.display_names[row] = self.controllers[row] = None
+        self._dead += 1
+        if self._dead > 32 and self._dead * 2 > len(self.ids):
+            self.compact()
+
+    def set_status(self, device_id: str, status: DeviceStatus):
+        self.statuses[self.index[device_id]] = DEVICE_STATUS_CODES[status]
+
+    def set_display_name(self, device_id: str, name: Optional[str]):
+        self.display_names[self.index[device_id]] = name
+
+    def set_controller(self, device_id: str, controller: Optional[str]):
+        self.controllers[self.index[device_id]] = controller
+
+    def set_processing_delay(self, device_id: str, delay_us: Optional[float]):
+        self.processing_delays[self.index[device_id]] = np.nan if delay_us is None else delay_us
+
+    def load_columns(self, ids: List[str], ips: List[Optional[str]], display_names: List[Optional[str]],
+                     types, protocols, statuses, cycle_times, controllers: Optional[List[Optional[str]]] = None,
+                     processing_delays=None):
+        """Replaces the whole table with the given columns (codes as in engine.models)."""
+        n = len(ids)
+        self.ids = list(ids)
+        self.ips = list(ips)
+        self.display_names = list(display_names)
+        self.controllers = list(controllers) if controllers is not None else [None] * n
+        self.index = {device_id: row for row, device_id in enumerate(self.ids)}
+        capacity = max(64, n * 2)
+        for name, values in (("types", types), ("protocols", protocols), ("statuses", statuses),
+                             ("cycle_times", cycle_times)):
+            column = np.zeros(capacity, dtype=getattr(self, name).dtype)
+            column[:n] = values
+            setattr(self, name, column)
+        self.processing_delays = np.full(capacity, np.nan, dtype=np.float64)
+        if processing_delays is not None:
+            self.processing_delays[:n] = processing_delays
+        self.alive = np.zeros(capacity, dtype=bool)
+        self.alive[:n] = True
+        self._dead = 0
+
+    def compact(self):
+        """Drops tombstoned rows, preserving order."""
+        keep = self.rows()
+        self.ids = [self.ids[i] for i in keep.tolist()]
+        self.ips = [self.ips[i] for i in keep.tolist()]
+        self.display_names = [self.display_names[i] for i in keep.tolist()]
+        self.controllers = [self.controllers[i] for i in keep.tolist()]
+        capacity = max(64, len(keep) * 2)
+        for name in ("types", "protocols", "statuses", "cycle_times", "processing_delays", "alive"):
+            column = getattr(self, name)
+            resized = np.full(capacity, np.nan if name == "processing_delays" else 0, dtype=column.dtype)
+            resized[:len(keep)] = column[keep]
+            setattr(self, name, resized)
+        self.index = {device_id: row for row, device_id in enumerate(self.ids)}
+        self._dead = 0
+
+    def _grow(self):
+        capacity = max(64, len(self.alive) * 2)
+        for name in ("types", "protocols", "statuses", "cycle_times", "processing_delays", "alive"):
+            column = getattr(self, name)
+            resized = np.full(capacity, np.nan if name == "processing_delays" else 0, dtype=column.dtype)
+            resized[:len(column)] = column
+            setattr(self, name, resized)
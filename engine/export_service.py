@@ -2,12 +2,27 @@ from reportlab.lib.pagesizes import A4
 from reportlab.lib import colors
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
+from collections import OrderedDict
 from datetime import datetime
-import os
+from typing import Callable, Hashable, Optional
+import io
+import threading
+import time
+
+# Device rows per reportlab Table: splitting one huge table across pages is quadratic
+TABLE_CHUNK_ROWS = 200
 
 class ExportService:
+    @staticmethod
+    def render_pdf(topology, performance) -> bytes:
+        """Builds the report in memory and returns the PDF bytes."""
+        buffer = io.BytesIO()
+        ExportService.generate_pdf_report(topology, performance, buffer)
+        return buffer.getvalue()
+
     @staticmethod
     def generate_pdf_report(topology, performance, output_path):
+        """Writes the report to `output_path` (a file path or a binary file object)."""
         doc = SimpleDocTemplate(output_path, pagesize=A4)
         styles = getSampleStyleSheet()
         
@@ -30,9 +45,10 @@ class ExportService:
         
         # Summary Section
         elements.append(Paragraph("Network Performance Summary", styles['Heading2']))
-        if performance:
-            avg_latency = sum(p['latency_ms'] for p in performance if p['latency_ms'] > 0) / len([p for p in performance if p['latency_ms'] > 0])
-            max_latency = max(p['latency_ms'] for p in performance)
+        reachable = [p['latency_ms'] for p in performance if p['latency_ms'] > 0]
+        if reachable:
+            avg_latency = sum(reachable) / len(reachable)
+            max_latency = max(reachable)
             elements.append(Paragraph(f"Average Latency: {avg_latency:.3f} ms", styles['Normal']))
             elements.append(Paragraph(f"Maximum Latency: {max_latency:.3f} ms", styles['Normal']))
         else:
@@ -43,10 +59,12 @@ class ExportService:
         # Device Table
         elements.append(Paragraph("Connected Devices", styles['Heading2']))
         
-        data = [["ID", "Tipo", "Protocolo", "Estado", "Latencia (ms)"]]
+        header = ["ID", "Tipo", "Protocolo", "Estado", "Latencia (ms)"]
+        rows = []
+        # One pass over performance instead of a scan per node
+        perf_by_id = {p['id']: p for p in performance}
         for node in topology['nodes']:
-            # Find performance for this node
-            perf = next((p for p in performance if p['id'] == node['id']), None)
+            perf = perf_by_id.get(node['id'])
             latency = f"{perf['latency_ms']}" if perf and perf['latency_ms'] > 0 else "N/A"
             
             # Clean up potentially Enum-style strings
@@ -54,7 +72,7 @@ class ExportService:
             protocol = str(node['protocol']).split('.')[-1]
             status = str(node['status']).split('.')[-1]
 
-            data.append([
+            rows.append([
                 node['display_name'] or node['id'],
                 dev_type,
                 protocol,
@@ -62,8 +80,7 @@ class ExportService:
                 latency
             ])
             
-        table = Table(data, colWidths=[120, 70, 110, 80, 80])
-        table.setStyle(TableStyle([
+        table_style = TableStyle([
             ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor("#161b22")),
             ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
             ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
@@ -76,9 +93,13 @@ class ExportService:
             ('FONTSIZE', (0, 1), (-1, -1), 10),
             ('TOPPADDING', (0, 1), (-1, -1), 8),
             ('BOTTOMPADDING', (0, 1), (-1, -1), 8),
-        ]))
-        
-        elements.append(table)
+        ])
+        # Fixed-size tables keep layout linear in the number of devices
+        for start in range(0, max(len(rows), 1), TABLE_CHUNK_ROWS):
+            table = Table([header] + rows[start:start + TABLE_CHUNK_ROWS],
+                          colWidths=[120, 70, 110, 80, 80], repeatRows=1)
+            table.setStyle(table_style)
+            elements.append(table)
         elements.append(Spacer(1, 40))
         
         # Methodology Footer
@@ -87,3 +108,68 @@ class ExportService:
         
         doc.build(elements)
         return output_path
+
+
+class _PendingReport:
+    def __init__(self):
+        self.done = threading.Event()
+        self.created = time.monotonic()
+        self.pdf: Optional[bytes] = None
+        self.error: Optional[BaseException] = None
+
+
+class ReportCache:
+    """
+    PDF reports keyed by the caller (e.g. session and topology version), built off the request path.
+
+    `execute` runs the build (e.g. eventlet's tpool.execute, a pool of real OS threads);
+    at most `workers` builds run at once. Concurrent requests for the same key wait
+    for one shared build, and the last `max_entries` reports are kept in memory. A
+    finished report older than `max_age_s` is rebuilt, so a key that outlives many
+    result updates still serves reasonably fresh figures.
+    """
+
+    def __init__(self, execute: Optional[Callable] = None, workers: int = 2, max_entries: int = 4,
+                 max_age_s: float = float("inf")):
+        self.execute = execute or (lambda fn, *args: fn(*args))
+        self.max_entries = max_entries
+        self.max_age_s = max_age_s
+        self.builds = 0
+        self.hits = 0
+        self._slots = threading.BoundedSemaphore(workers)
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[Hashable, _PendingReport]" = OrderedDict()
+
+    def get(self, key: Hashable, topology, performance) -> bytes:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.done.is_set() and time.monotonic() - entry.created > self.max_age_s:
+                del self._entries[key]
+                entry = None
+            owner = entry is None
+            if owner:
+                entry = self._entries[key] = _PendingReport()
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+            else:
+                self._entries.move_to_end(key)
+                self.hits += 1
+
+        if owner:
+            try:
+                with self._slots:
+                    entry.pdf = self.execute(ExportService.render_pdf, topology, performance)
+                self.builds += 1
+            except BaseException as e:
+                entry.error = e
+                with self._lock:
+                    if self._entries.get(key) is entry:
+                        del self._entries[key]
+            finally:
+                entry.done.set()
+        else:
+            entry.done.wait()
+
+        if entry.error is not None:
+            raise entry.error
+        return entry.pdf
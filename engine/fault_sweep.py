@@ -0,0 +1,167 @@
+"""
+Monte Carlo "what-if" fault sweep.
+
+Evaluates every single (N-1) link/device failure plus a random sample of double
+(N-2) failures against a copy of the plant and ranks them by how many devices
+end up OFFLINE or in ALARM. The live engine is never touched: its state is
+serialised once with to_state() and every worker rebuilds its own engine.
+
+    python -m engine.fault_sweep plant.json --workers 8 --n2-samples 500
+"""
+import argparse
+import itertools
+import json
+import os
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+from engine.network_engine import NetworkEngine, DeviceStatus, DeviceType
+
+# A failure is ("link", u, v) or ("device", device_id)
+Failure = Tuple[str, ...]
+
+# Per-process engine copy (set once by _init_worker)
+_worker_engine: Optional[NetworkEngine] = None
+_worker_baseline: Dict[str, DeviceStatus] = {}
+_worker_seed: int = 0
+
+
+def _init_worker(state: Dict, seed: int):
+    global _worker_engine, _worker_baseline, _worker_seed
+    _worker_engine = NetworkEngine.from_state(state)
+    _worker_seed = seed
+    _worker_baseline = _statuses(_worker_engine, seed)
+
+
+def _statuses(engine: NetworkEngine, seed: int) -> Dict[str, DeviceStatus]:
+    # Same jitter draws for every scenario, so only the failure changes the outcome
+    engine.latency_model.rng = np.random.default_rng(seed)
+    return {p['id']: p['status'] for p in engine.calculate_performance()}
+
+
+def _evaluate(failures: Tuple[Failure, ...]) -> Dict:
+    """Applies `failures` to the worker engine, measures, then reverts them."""
+    engine = _worker_engine
+    failed_devices = set()
+    previous_status = {}
+    for failure in failures:
+        if failure[0] == "link":
+            engine.set_link_status(failure[1], failure[2], False)
+        else:
+            failed_devices.add(failure[1])
+            previous_status[failure[1]] = engine.devices[failure[1]].status
+            engine.set_device_status(failure[1], DeviceStatus.OFFLINE)
+
+    offline, alarm = [], []
+    for dev_id, status in _statuses(engine, _worker_seed).items():
+        if dev_id in failed_devices or status == _worker_baseline.get(dev_id):
+            continue
+        if status == DeviceStatus.OFFLINE:
+            offline.append(dev_id)
+        elif status == DeviceStatus.ALARM:
+            alarm.append(dev_id)
+
+    for failure in failures:
+        if failure[0] == "link":
+            engine.set_link_status(failure[1], failure[2], True)
+        else:
+            engine.set_device_status(failure[1], previous_status[failure[1]])
+
+    return {
+        "failures": [list(f) for f in failures],
+        "order": f"N-{len(failures)}",
+        "offline_count": len(offline),
+        "alarm_count": len(alarm),
+        "offline": offline,
+        "alarm": alarm,
+    }
+
+
+class FaultSweep:
+    """Builds the failure scenarios for a plant and evaluates them on a process pool."""
+
+    def __init__(self, engine: NetworkEngine, workers: Optional[int] = None, seed: int = 0):
+        # Copy now: later mutations of the live engine do not leak into the sweep
+        self.state = engine.to_state()
+        self.workers = workers or os.cpu_count() or 1
+        self.seed = seed
+
+    def single_failures(self) -> List[Failure]:
+        """Every currently active link and every online non-PLC device."""
+        failures: List[Failure] = []
+        online = set()
+        for data in self.state["devices"]:
+            if data["status"] != DeviceStatus.OFFLINE:
+                online.add(data["id"])
+                if data["type"] != DeviceType.PLC:
+                    failures.append(("device", data["id"]))
+        for link in self.state["links"]:
+            if link["active"] and link["source"] in online and link["target"] in online:
+                failures.append(("link", link["source"], link["target"]))
+        return failures
+
+    def scenarios(self, n2_samples: int = 0) -> List[Tuple[Failure, ...]]:
+        singles = self.single_failures()
+        scenarios = [(f,) for f in singles]
+        total_pairs = len(singles) * (len(singles) - 1) // 2
+        if n2_samples >= total_pairs:
+            scenarios.extend(itertools.combinations(singles, 2))
+        elif n2_samples > 0:
+            rng = np.random.default_rng(self.seed)
+            pairs = set()
+            while len(pairs) < n2_samples:
+                i, j = rng.choice(len(singles), size=2, replace=False)
+                pairs.add((min(i, j), max(i, j)))
+            scenarios.extend((singles[i], singles[j]) for i, j in sorted(pairs))
+        return scenarios
+
+    def run(self, n2_samples: int = 0, top: Optional[int] = None) -> Dict:
+        """Evaluates N-1 plus `n2_samples` random N-2 scenarios and returns the ranked report."""
+        scenarios = self.scenarios(n2_samples)
+        if self.workers <= 1:
+            _init_worker(self.state, self.seed)
+            results = [_evaluate(s) for s in scenarios]
+        else:
+            chunksize = max(1, len(scenarios) // (self.workers * 4))
+            with ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker,
+                                     initargs=(self.state, self.seed)) as pool:
+                results = list(pool.map(_evaluate, scenarios, chunksize=chunksize))
+
+        ranking = sorted(results, key=lambda r: (r["offline_count"], r["alarm_count"]), reverse=True)
+        # Single points of failure: one element whose loss cuts other devices off the PLC
+        spof = [r["failures"][0] for r in ranking if r["order"] == "N-1" and r["offline_count"] > 0]
+        return {
+            "scenarios_evaluated": len(results),
+            "single_points_of_failure": spof,
+            "ranking": ranking[:top] if top else ranking,
+        }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Rank N-1 / sampled N-2 failures of a plant.")
+    parser.add_argument("state", help="JSON file with a NetworkEngine.to_state() dump")
+    parser.add_argument("--workers", type=int, default=None, help="process pool size (default: all cores)")
+    parser.add_argument("--n2-samples", type=int, default=0, help="random double failures to evaluate")
+    parser.add_argument("--top", type=int, default=20, help="scenarios to show")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", action="store_true", help="print the full report as JSON")
+    args = parser.parse_args(argv)
+
+    with open(args.state) as f:
+        engine = NetworkEngine.from_state(json.load(f))
+    report = FaultSweep(engine, workers=args.workers, seed=args.seed).run(args.n2_samples, top=args.top)
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+    print(f"Scenarios evaluated: {report['scenarios_evaluated']}")
+    print(f"Single points of failure: {len(report['single_points_of_failure'])}")
+    print(f"{'order':<6} {'offline':>7} {'alarm':>6}  failures")
+    for r in report["ranking"]:
+        failures = ", ".join(":".join(f) for f in r["failures"])
+        print(f"{r['order']:<6} {r['offline_count']:>7} {r['alarm_count']:>6}  {failures}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,232 @@
+import time
+import numpy as np
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from engine.models import DeviceStatus
+
+# Downsampled tiers as (resolution seconds, slots): 5 min of 1 s, 12 h of 1 min, 14 days of 1 h.
+# Every slot costs SLOT_BYTES per device column, so these 1356 slots take ~17.6 KB per device
+# in every loaded session (~176 MB for a 10k-device plant); NETSIM_HISTORY_TIERS trims them.
+DEFAULT_TIERS: Tuple[Tuple[int, int], ...] = ((1, 300), (60, 720), (3600, 336))
+# latency_sum, jitter_sum (float32) + latency_max (float16) + reachable (uint16) + status (int8)
+SLOT_BYTES = 4 + 4 + 2 + 2 + 1
+# Peaks are stored as float16 (~0.05 % precision); anything above saturates here
+_MAX_PEAK_MS = float(np.finfo(np.float16).max)
+
+# Status severity: a bucket keeps the worst status seen in it (-1 = no sample)
+STATUS_SEVERITY: Dict[DeviceStatus, int] = {
+    DeviceStatus.ONLINE: 0,
+    DeviceStatus.ALARM: 1,
+    DeviceStatus.SAFETY_MODE: 2,
+    DeviceStatus.OFFLINE: 3,
+}
+_STATUS_BY_SEVERITY = sorted(STATUS_SEVERITY, key=STATUS_SEVERITY.get)
+
+
+def parse_tiers(spec: str) -> Tuple[Tuple[int, int], ...]:
+    """'1:300,60:720,3600:336' -> ((1, 300), (60, 720), (3600, 336))."""
+    tiers = []
+    for part in spec.split(","):
+        resolution, slots = part.split(":")
+        tiers.append((int(resolution), int(slots)))
+    return tuple(sorted(tiers))
+
+
+class _Tier:
+    """Fixed ring of time buckets x device columns for one resolution."""
+
+    def __init__(self, resolution: int, slots: int, capacity: int):
+        self.resolution = resolution
+        self.slots = slots
+        # Absolute bucket number (timestamp // resolution) stored in each slot, -1 = empty
+        self.epochs = np.full(slots, -1, dtype=np.int64)
+        self.latency_sum = np.zeros((slots, capacity), dtype=np.float32)
+        self.latency_max = np.zeros((slots, capacity), dtype=np.float16)
+        self.jitter_sum = np.zeros((slots, capacity), dtype=np.float32)
+        # Samples in which the device was reachable (latency/jitter are averaged over these)
+        self.reachable = np.zeros((slots, capacity), dtype=np.uint16)
+        self.status = np.full((slots, capacity), -1, dtype=np.int8)
+
+    def columns(self):
+        return ("latency_sum", "latency_max", "jitter_sum", "reachable", "status")
+
+    def grow(self, capacity: int):
+        for name in self.columns():
+            column = getattr(self, name)
+            resized = np.full((self.slots, capacity), -1 if name == "status" else 0, dtype=column.dtype)
+            resized[:, :column.shape[1]] = column
+            setattr(self, name, resized)
+
+    def clear(self, cols: np.ndarray):
+        """Empties the given device columns in every slot (before they are handed to another device)."""
+        for name in self.columns():
+            getattr(self, name)[:, cols] = -1 if name == "status" else 0
+
+    def record(self, epoch: int, cols: np.ndarray, latency: np.ndarray, jitter: np.ndarray,
+               severity: np.ndarray, reachable: np.ndarray):
+        slot = epoch % self.slots
+        if self.epochs[slot] != epoch:
+            # Slot still holds a bucket from one full ring ago: recycle it
+            self.epochs[slot] = epoch
+            for name in self.columns():
+                getattr(self, name)[slot] = -1 if name == "status" else 0
+        live = cols[reachable]
+        self.latency_sum[slot, live] += latency[reachable]
+        peak = np.minimum(latency[reachable], _MAX_PEAK_MS).astype(np.float16)
+        self.latency_max[slot, live] = np.maximum(self.latency_max[slot, live], peak)
+        self.jitter_sum[slot, live] += jitter[reachable]
+        counts = self.reachable[slot, live]
+        self.reachable[slot, live] = np.minimum(counts.astype(np.int64) + 1, np.iinfo(np.uint16).max)
+        self.status[slot, cols] = np.maximum(self.status[slot, cols], severity)
+
+    def nbytes(self) -> int:
+        return self.epochs.nbytes + sum(getattr(self, name).nbytes for name in self.columns())
+
+
+class HistoryStore:
+    """
+    In-process time series of per-device latency, jitter and status.
+
+    Every recorded sample is folded into each tier's current bucket (mean and max
+    latency, mean jitter, worst status). Each tier is a fixed ring of buckets, so
+    memory is slots x devices regardless of uptime. A device that stops reporting
+    (e.g. removed) gives its column back once its data has aged out of the longest
+    tier, so memory follows the devices seen within that retention, not every id ever seen.
+    """
+
+    def __init__(self, tiers: Sequence[Tuple[int, int]] = DEFAULT_TIERS, capacity: int = 64):
+        self.index: Dict[str, int] = {}
+        self.tiers = [_Tier(resolution, slots, capacity) for resolution, slots in sorted(tiers)]
+        self.capacity = capacity
+        # Device id of every allocated column (None = free), and when it last reported
+        self.owners: List[Optional[str]] = []
+        self.last_seen = np.full(capacity, -np.inf)
+        self.free: List[int] = []
+        self.retention_s = max(tier.resolution * tier.slots for tier in self.tiers)
+        self.samples = 0
+        self.last_timestamp: Optional[float] = None
+
+    def _columns_for(self, ids: List[str], timestamp: float) -> np.ndarray:
+        index = self.index
+        cols = np.empty(len(ids), dtype=np.int64)
+        for i, dev_id in enumerate(ids):
+            col = index.get(dev_id)
+            if col is None:
+                if not self.free and len(self.owners) == self.capacity:
+                    # Columns already handed out in this batch are in use, whatever their age
+                    self.last_seen[cols[:i]] = timestamp
+                    self._reclaim(timestamp)
+                if self.free:
+                    col = self.free.pop()
+                    self.owners[col] = dev_id
+                else:
+                    col = len(self.owners)
+                    self.owners.append(dev_id)
+                    if col == self.capacity:
+                        self._grow()
+                index[dev_id] = col
+            cols[i] = col
+        return cols
+
+    def _grow(self):
+        self.capacity *= 2
+        for tier in self.tiers:
+            tier.grow(self.capacity)
+        last_seen = np.full(self.capacity, -np.inf)
+        last_seen[:len(self.last_seen)] = self.last_seen
+        self.last_seen = last_seen
+
+    def _reclaim(self, timestamp: float):
+        """Frees the columns of devices whose newest sample is older than the longest tier keeps."""
+        stale = np.flatnonzero(self.last_seen[:len(self.owners)] < timestamp - self.retention_s)
+        stale = [col for col in stale.tolist() if self.owners[col] is not None]
+        if not stale:
+            return
+        for tier in self.tiers:
+            tier.clear(np.array(stale))
+        for col in stale:
+            del self.index[self.owners[col]]
+            self.owners[col] = None
+            self.last_seen[col] = -np.inf
+        # Lowest columns first (pop() takes from the end)
+        self.free.extend(reversed(stale))
+
+    def record(self, performance: List[Dict], timestamp: Optional[float] = None):
+        """Adds one calculate_performance() result taken at `timestamp` (unix seconds)."""
+        if not performance:
+            return
+        timestamp = time.time() if timestamp is None else timestamp
+        n = len(performance)
+        cols = self._columns_for([p["id"] for p in performance], timestamp)
+        self.last_seen[cols] = timestamp
+        latency = np.fromiter((p["latency_ms"] for p in performance), dtype=np.float32, count=n)
+        jitter = np.fromiter((p["jitter_ms"] for p in performance), dtype=np.float32, count=n)
+        severity = np.fromiter((STATUS_SEVERITY[p["status"]] for p in performance), dtype=np.int8, count=n)
+        # Unreachable devices report latency -1; they count for status only
+        reachable = latency >= 0
+        for tier in self.tiers:
+            tier.record(int(timestamp // tier.resolution), cols, latency, jitter, severity, reachable)
+        self.samples += 1
+        self.last_timestamp = timestamp
+
+    def pick_tier(self, start: float, now: float, resolution: Optional[int] = None) -> _Tier:
+        """The requested resolution, else the finest tier whose retention still covers `start`."""
+        if resolution is not None:
+            for tier in self.tiers:
+                if tier.resolution == resolution:
+                    return tier
+            raise ValueError(f"No tier with resolution {resolution}s (have {[t.resolution for t in self.tiers]})")
+        for tier in self.tiers:
+            if now - tier.resolution * tier.slots <= start:
+                return tier
+        return self.tiers[-1]
+
+    def query(self, device_id: str, start: float, end: float, resolution: Optional[int] = None,
+              now: Optional[float] = None) -> Dict:
+        """Buckets of `device_id` between `start` and `end` (unix seconds), oldest first."""
+        now = time.time() if now is None else now
+        tier = self.pick_tier(start, now, resolution)
+        points = []
+        col = self.index.get(device_id)
+        if col is not None and end >= start:
+            first, last = int(start // tier.resolution), int(end // tier.resolution)
+            # Older than one ring is already overwritten
+            first = max(first, last - tier.slots + 1)
+            epochs = np.arange(first, last + 1, dtype=np.int64)
+            slots = epochs % tier.slots
+            present = (tier.epochs[slots] == epochs) & (tier.status[slots, col] >= 0)
+            epochs, slots = epochs[present], slots[present]
+            counts = tier.reachable[slots, col].astype(np.float64)
+            with np.errstate(invalid="ignore", divide="ignore"):
+                latency = tier.latency_sum[slots, col] / counts
+                jitter = tier.jitter_sum[slots, col] / counts
+            for epoch, mean, peak, jit, count, severity in zip(
+                epochs.tolist(), latency.tolist(), tier.latency_max[slots, col].tolist(), jitter.tolist(),
+                counts.tolist(), tier.status[slots, col].tolist()
+            ):
+                reachable = count > 0
+                points.append({
+                    "t": epoch * tier.resolution,
+                    "latency_ms": round(mean, 3) if reachable else None,
+                    "latency_max_ms": round(peak, 3) if reachable else None,
+                    "jitter_ms": round(jit, 3) if reachable else None,
+                    "status": _STATUS_BY_SEVERITY[severity],
+                })
+        return {
+            "id": device_id,
+            "resolution_s": tier.resolution,
+            "points": points,
+            "transitions": self._transitions(points),
+        }
+
+    @staticmethod
+    def _transitions(points: List[Dict]) -> List[Dict]:
+        """Status changes between consecutive buckets (answers "when did X start alarming?")."""
+        out = []
+        for previous, point in zip(points, points[1:]):
+            if point["status"] != previous["status"]:
+                out.append({"t": point["t"], "from": previous["status"], "to": point["status"]})
+        return out
+
+    def nbytes(self) -> int:
+        return sum(tier.nbytes() for tier in self.tiers)
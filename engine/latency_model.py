@@ -0,0 +1,88 @@
+import numpy as np
+from typing import Dict, List, Optional, Tuple
+
+from engine.models import Protocol, JITTER_BOUNDS
+
+# Jitter bounds as arrays indexed by PROTOCOL_CODES (enum declaration order)
+JITTER_LOW = np.array([JITTER_BOUNDS[p][0] for p in Protocol])
+JITTER_HIGH = np.array([JITTER_BOUNDS[p][1] for p in Protocol])
+_NO_ROWS = np.zeros(0, dtype=np.int64)
+
+
+class RouteTable:
+    """
+    Per-device routing state relative to each device's controller, stored as parallel arrays.
+
+    Built once per topology version; every tick only draws new jitter on top of it.
+    """
+
+    def __init__(self, ids: List[str], paths: List[Optional[List[str]]], base_latency: List[float],
+                 protocols: List[int], cycle_times: List[float], controllers: Optional[List[Optional[str]]] = None,
+                 failover=None, protected=None):
+        self.ids = ids
+        self.paths = paths
+        # Owning PLC per device (None when unassigned and unreachable)
+        self.controllers = controllers if controllers is not None else [None] * len(ids)
+        self.reachable = np.array([p is not None for p in paths], dtype=bool)
+        # Sum(PropDelay) along each path, NaN when unreachable
+        self.base_latency = np.array(base_latency, dtype=np.float64)
+        self.protocols = np.array(protocols, dtype=np.int8)
+        self.cycle_times = np.array(cycle_times, dtype=np.float64)
+        # Reached over its backup route (primary broken) / has an edge-disjoint backup at all
+        self.failover = np.zeros(len(ids), dtype=bool) if failover is None else np.asarray(failover, dtype=bool)
+        self.protected = np.zeros(len(ids), dtype=bool) if protected is None else np.asarray(protected, dtype=bool)
+        # Queueing delay along each path from loaded links, kept up to date by NetworkEngine.apply_link_load
+        self.load_delay = np.zeros(len(ids), dtype=np.float64)
+        self.load_seen = -1
+        self._load_applied: Dict[Tuple[str, str], float] = {}
+        self._rows_by_link: Optional[Dict[Tuple[str, str], np.ndarray]] = None
+
+    def __len__(self):
+        return len(self.ids)
+
+    def rows_through(self, key: Tuple[str, str]) -> np.ndarray:
+        """Rows whose path crosses link `key` (an edge_key); the index is built on first use."""
+        if self._rows_by_link is None:
+            rows_by_link: Dict[Tuple[str, str], List[int]] = {}
+            for row, path in enumerate(self.paths):
+                if path is None:
+                    continue
+                for u, v in zip(path, path[1:]):
+                    rows_by_link.setdefault((u, v) if u <= v else (v, u), []).append(row)
+            self._rows_by_link = {k: np.array(rows, dtype=np.int64) for k, rows in rows_by_link.items()}
+        return self._rows_by_link.get(key, _NO_ROWS)
+
+    def set_link_load(self, key: Tuple[str, str], delay_ms: float):
+        """Adds the change in one link's queueing delay to the devices routed over it."""
+        previous = self._load_applied.get(key, 0.0)
+        if delay_ms == previous:
+            return
+        self.load_delay[self.rows_through(key)] += delay_ms - previous
+        if delay_ms:
+            self._load_applied[key] = delay_ms
+        else:
+            del self._load_applied[key]
+
+    def reset_load(self):
+        self.load_delay[:] = 0.0
+        self._load_applied = {}
+
+
+class LatencyModel:
+    """Batched jitter + latency evaluation over a RouteTable, driven by a seedable generator."""
+
+    def __init__(self, rng: Optional[np.random.Generator] = None):
+        self.rng = rng if rng is not None else np.random.default_rng()
+
+    def sample_jitter(self, protocols: np.ndarray) -> np.ndarray:
+        """One uniform draw per device within its protocol's jitter bounds."""
+        return self.rng.uniform(JITTER_LOW[protocols], JITTER_HIGH[protocols])
+
+    def evaluate(self, table: RouteTable):
+        """Returns (total_latency, jitter, alarm) arrays for the reachable devices of `table`."""
+        reachable = table.reachable
+        jitter = self.sample_jitter(table.protocols[reachable])
+        total = table.base_latency[reachable] + table.load_delay[reachable] + jitter
+        # Running on the backup route (primary broken); or latency over 2x cycle
+        alarm = table.failover[reachable] | (total >= table.cycle_times[reachable] * 2)
+        return total, jitter, alarm
@@ -0,0 +1,72 @@
+"""
+Per-link cost model.
+
+A link's routing cost (ms) is the one-way delay of a cyclic frame across it:
+
+    cost = delay_ms                              fixed per-link delay (the `weight` attribute, 0.1 by default)
+         + length_m * PROPAGATION_MS_PER_M       propagation over the cable
+         + REFERENCE_FRAME_BITS / speed          store-and-forward transmission
+         + (proc(u) + proc(v)) / 2               processing delay of both ends
+
+Splitting each device's processing delay over its links charges every forwarding
+node once along a path (the two ends get half). The cost is cached on the edge as
+`cost` and only recomputed when one of its inputs changes; routes follow it.
+
+Utilization does not re-route (neither STP nor MRP do): it adds a queueing delay
+to the links that carry it, and that delay is added to the latency of the devices
+whose current path crosses them (see RouteTable.rows_through).
+"""
+from typing import Dict, Optional
+
+from engine.models import DeviceType
+
+# Link speeds offered by the plant's ports (Fast Ethernet / Gigabit)
+LINK_SPEEDS_MBPS = (100.0, 1000.0)
+DEFAULT_SPEED_MBPS = 100.0
+# Signal speed in copper/fibre is about 2/3 c: 5 ns per metre
+PROPAGATION_MS_PER_M = 5e-6
+# Cyclic RT frame on the wire (see traffic_simulator.FRAME_BYTES) and a full-size background frame
+REFERENCE_FRAME_BITS = 84 * 8
+BACKGROUND_FRAME_BITS = 1538 * 8
+# Queueing grows without bound at 100 % load; clamp so a saturated link stays finite
+MAX_UTILIZATION = 0.95
+
+# Forwarding delay per device type when the device does not set its own (microseconds)
+DEFAULT_PROCESSING_DELAY_US: Dict[DeviceType, float] = {
+    DeviceType.SWITCH: 3.0,
+}
+
+
+def processing_delay_ms(device_type: DeviceType, processing_delay_us: Optional[float]) -> float:
+    if processing_delay_us is None:
+        processing_delay_us = DEFAULT_PROCESSING_DELAY_US.get(device_type, 0.0)
+    return processing_delay_us / 1000.0
+
+
+def transmission_ms(bits, speed_mbps):
+    return bits / (speed_mbps * 1000.0)
+
+
+def link_cost(delay_ms, length_m, speed_mbps, proc_u_ms, proc_v_ms):
+    """Static routing cost of one link in ms (works element-wise on numpy arrays too)."""
+    return (delay_ms + length_m * PROPAGATION_MS_PER_M + transmission_ms(REFERENCE_FRAME_BITS, speed_mbps)
+            + (proc_u_ms + proc_v_ms) / 2)
+
+
+def queue_delay_ms(utilization: float, speed_mbps: float) -> float:
+    """Mean wait behind background traffic (M/M/1: rho / (1 - rho) full-size frames)."""
+    rho = min(max(utilization, 0.0), MAX_UTILIZATION)
+    if rho == 0.0:
+        return 0.0
+    return transmission_ms(BACKGROUND_FRAME_BITS, speed_mbps) * rho / (1.0 - rho)
+
+
+def edge_cost(d: Dict, proc_u_ms: float, proc_v_ms: float) -> float:
+    """link_cost() from a graph edge's attributes."""
+    return link_cost(d.get('weight', 0.1), d.get('length_m', 0.0), d.get('speed_mbps', DEFAULT_SPEED_MBPS),
+                     proc_u_ms, proc_v_ms)
+
+
+def propagation_ms(d: Dict) -> float:
+    """Fixed delay plus cable propagation of a graph edge (no transmission or processing)."""
+    return d.get('weight', 0.1) + d.get('length_m', 0.0) * PROPAGATION_MS_PER_M
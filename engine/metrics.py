@@ -0,0 +1,176 @@
+import cProfile
+import io
+import json
+import pstats
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Sequence
+
+# Default buckets (seconds): 100 us .. 5 s, covering idle ticks up to blown deadlines
+TIME_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+# Payload buckets (bytes): 256 B .. 16 MB
+SIZE_BUCKETS = tuple(256 * 4 ** i for i in range(9))
+
+
+class Histogram:
+    """Cumulative-bucket histogram in the Prometheus sense."""
+
+    def __init__(self, buckets: Sequence[float]):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * len(self.buckets)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.sum += value
+        self.count += 1
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+
+    def render(self, name: str, labels: str = "") -> List[str]:
+        sep = "," if labels else ""
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.buckets, self.counts):
+            cumulative += count
+            lines.append(f'{name}_bucket{{{labels}{sep}le="{bound:g}"}} {cumulative}')
+        lines.append(f'{name}_bucket{{{labels}{sep}le="+Inf"}} {self.count}')
+        suffix = f"{{{labels}}}" if labels else ""
+        lines.append(f"{name}_sum{suffix} {self.sum:.9g}")
+        lines.append(f"{name}_count{suffix} {self.count}")
+        return lines
+
+
+class PhaseTimer:
+    """
+    Accumulates wall time per named phase until drained.
+
+    The engine wraps its expensive sections (active view upkeep, path computation,
+    jitter, topology serialisation) in phase(); the tick loop drains the totals.
+    """
+
+    def __init__(self):
+        self.totals: Dict[str, float] = {}
+
+    @contextmanager
+    def phase(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.totals[name] = self.totals.get(name, 0.0) + time.perf_counter() - start
+
+    def drain(self) -> Dict[str, float]:
+        totals, self.totals = self.totals, {}
+        return totals
+
+
+# One cProfile at a time per process: concurrent session ticks share the OS thread,
+# and a second active profiler fails (3.12+) or mixes their frames (older versions)
+_profiling = threading.Lock()
+
+
+class TickMetrics:
+    """
+    Per-tick instrumentation of the simulation loop, rendered as Prometheus text.
+
+    Phases accumulated on the engine's PhaseTimer between two ticks are attributed
+    to the tick that publishes them, so work done by REST/Socket.IO mutations shows
+    up in the next tick. With profile_slowest=True ticks run under cProfile (one
+    profiled tick per process at a time; a tick that overlaps one is timed but not
+    profiled) and the stats of the slowest profiled one are kept.
+    """
+
+    PHASES = ("active_view", "paths", "jitter", "topology", "history", "opcua", "delta", "emit", "snapshot")
+
+    def __init__(self, timer: PhaseTimer, budget_s: float = 1.0, profile_slowest: bool = False,
+                 payload_sample_every: int = 10):
+        self.timer = timer
+        # Encoding a delta only to size it costs as much as emitting it: size every Nth one
+        self.payload_sample_every = max(1, payload_sample_every)
+        self.budget_s = budget_s
+        self.profile_slowest = profile_slowest
+        self.tick_seconds = Histogram(TIME_BUCKETS)
+        self.phase_seconds: Dict[str, Histogram] = {name: Histogram(TIME_BUCKETS) for name in self.PHASES}
+        self.payload_bytes = Histogram(SIZE_BUCKETS)
+        self.emits = 0
+        self.missed_deadlines = 0
+        self.slowest_tick_s = 0.0
+        self.slowest_profile: Optional[str] = None
+        self.slowest_profiled_s = 0.0
+
+    @contextmanager
+    def tick(self):
+        profiler = cProfile.Profile() if self.profile_slowest and _profiling.acquire(blocking=False) else None
+        start = time.perf_counter()
+        if profiler:
+            profiler.enable()
+        try:
+            yield
+        finally:
+            if profiler:
+                profiler.disable()
+                _profiling.release()
+            elapsed = time.perf_counter() - start
+            self.tick_seconds.observe(elapsed)
+            if elapsed > self.budget_s:
+                self.missed_deadlines += 1
+            for name, seconds in self.timer.drain().items():
+                self.phase_seconds.setdefault(name, Histogram(TIME_BUCKETS)).observe(seconds)
+            self.slowest_tick_s = max(self.slowest_tick_s, elapsed)
+            if profiler and elapsed > self.slowest_profiled_s:
+                self.slowest_profiled_s = elapsed
+                out = io.StringIO()
+                pstats.Stats(profiler, stream=out).sort_stats("cumulative").print_stats(40)
+                self.slowest_profile = out.getvalue()
+
+    def observe_emit(self, payload: Dict):
+        """Counts one emitted delta; every payload_sample_every-th one is JSON-encoded to record its size."""
+        if self.emits % self.payload_sample_every == 0:
+            self.payload_bytes.observe(len(json.dumps(payload)))
+        self.emits += 1
+
+    def render(self, engine=None) -> str:
+        lines = [
+            "# HELP netsim_tick_seconds Wall time of one simulation loop tick.",
+            "# TYPE netsim_tick_seconds histogram",
+            *self.tick_seconds.render("netsim_tick_seconds"),
+            "# HELP netsim_phase_seconds Wall time per tick spent in each phase.",
+            "# TYPE netsim_phase_seconds histogram",
+        ]
+        for name, histogram in self.phase_seconds.items():
+            lines.extend(histogram.render("netsim_phase_seconds", f'phase="{name}"'))
+        lines += [
+            "# HELP netsim_payload_bytes Serialized size of sampled network_update emits (1 in N).",
+            "# TYPE netsim_payload_bytes histogram",
+            *self.payload_bytes.render("netsim_payload_bytes"),
+            "# HELP netsim_emits_total network_update messages emitted.",
+            "# TYPE netsim_emits_total counter",
+            f"netsim_emits_total {self.emits}",
+            "# HELP netsim_missed_deadlines_total Ticks that took longer than the loop budget.",
+            "# TYPE netsim_missed_deadlines_total counter",
+            f"netsim_missed_deadlines_total {self.missed_deadlines}",
+            "# HELP netsim_slowest_tick_seconds Slowest tick observed so far.",
+            "# TYPE netsim_slowest_tick_seconds gauge",
+            f"netsim_slowest_tick_seconds {self.slowest_tick_s:.9g}",
+        ]
+        if engine is not None:
+            lines += [
+                "# HELP netsim_cache_requests_total Result cache lookups by cache and outcome.",
+                "# TYPE netsim_cache_requests_total counter",
+            ]
+            for key, value in engine.cache_stats.items():
+                cache, outcome = key.rsplit("_", 1)
+                lines.append(f'netsim_cache_requests_total{{cache="{cache}",outcome="{outcome}"}} {value}')
+            lines += [
+                "# HELP netsim_devices Devices in the plant model.",
+                "# TYPE netsim_devices gauge",
+                f"netsim_devices {len(engine.devices)}",
+                "# HELP netsim_links Physical links in the plant model.",
+                "# TYPE netsim_links gauge",
+                f"netsim_links {engine.graph.number_of_edges()}",
+            ]
+        return "\n".join(lines) + "\n"
@@ -0,0 +1,56 @@
+from enum import Enum
+from typing import Dict, Optional
+from pydantic import BaseModel
+
+class Protocol(str, Enum):
+    PROFINET_RT = "PROFINET_RT"
+    PROFINET_IRT = "PROFINET_IRT"
+    ETHERCAT = "EtherCAT"
+    MODBUS_TCP = "Modbus TCP"
+    OPC_UA = "OPC-UA"
+
+class DeviceType(str, Enum):
+    PLC = "PLC"
+    DRIVE = "Drive"
+    IOLINK = "IO-Link"
+    SWITCH = "Switch"
+    SCADA = "SCADA"
+
+class DeviceStatus(str, Enum):
+    ONLINE = "Online"
+    OFFLINE = "Offline"
+    ALARM = "Alarm"
+    SAFETY_MODE = "Safety Mode"
+
+class Device(BaseModel):
+    id: str
+    type: DeviceType
+    ip: Optional[str] = None
+    status: DeviceStatus = DeviceStatus.ONLINE
+    protocol: Protocol = Protocol.PROFINET_RT
+    cycle_time_ms: float = 1.0  # Configured cycle time
+    display_name: Optional[str] = None
+    # Owning PLC; None means whichever PLC is nearest over the active network
+    controller: Optional[str] = None
+    # Forwarding delay in microseconds; None = the type's default (see engine.link_model)
+    processing_delay_us: Optional[float] = None
+
+
+# Stable enum <-> small-int codes for array-backed code paths
+PROTOCOL_CODES: Dict[Protocol, int] = {protocol: code for code, protocol in enumerate(Protocol)}
+
+# Protocol-specific jitter bounds in ms (low, high)
+JITTER_BOUNDS: Dict[Protocol, tuple] = {
+    Protocol.PROFINET_RT: (0.01, 0.05),
+    Protocol.PROFINET_IRT: (0.001, 0.005),  # Very low jitter
+    Protocol.ETHERCAT: (0.001, 0.005),
+    Protocol.MODBUS_TCP: (0.1, 0.5),
+    Protocol.OPC_UA: (0.5, 5.0),  # TCP/IP pub-sub, lower priority than hard RT
+}
+DEVICE_TYPE_CODES: Dict[DeviceType, int] = {device_type: code for code, device_type in enumerate(DeviceType)}
+DEVICE_STATUS_CODES: Dict[DeviceStatus, int] = {status: code for code, status in enumerate(DeviceStatus)}
+
+# Code -> enum lookups (index with the codes above)
+PROTOCOLS = list(Protocol)
+DEVICE_TYPES = list(DeviceType)
+DEVICE_STATUSES = list(DeviceStatus)
@@ -1,177 +1,804 @@
 import networkx as nx
-import random
 import time
-from enum import Enum
-from typing import List, Dict, Optional
-from pydantic import BaseModel
-
-class Protocol(str, Enum):
-    PROFINET_RT = "PROFINET_RT"
-    PROFINET_IRT = "PROFINET_IRT"
-    ETHERCAT = "EtherCAT"
-    MODBUS_TCP = "Modbus TCP"
-    OPC_UA = "OPC-UA"
-
-class DeviceType(str, Enum):
-    PLC = "PLC"
-    DRIVE = "Drive"
-    IOLINK = "IO-Link"
-    SWITCH = "Switch"
-    SCADA = "SCADA"
-
-class DeviceStatus(str, Enum):
-    ONLINE = "Online"
-    OFFLINE = "Offline"
-    ALARM = "Alarm"
-    SAFETY_MODE = "Safety Mode"
-
-class Device(BaseModel):
-    id: str
-    type: DeviceType
-    ip: Optional[str] = None
-    status: DeviceStatus = DeviceStatus.ONLINE
-    protocol: Protocol = Protocol.PROFINET_RT
-    cycle_time_ms: float = 1.0  # Configured cycle time
-    display_name: Optional[str] = None
+import numpy as np
+from typing import Iterable, List, Dict, NamedTuple, Optional, Sequence, Tuple
+
+from engine.models import (
+    Protocol, DeviceType, DeviceStatus, Device, PROTOCOL_CODES, DEVICE_TYPE_CODES, DEVICE_STATUS_CODES,
+    PROTOCOLS, DEVICE_TYPES, DEVICE_STATUSES,
+)
+from engine.latency_model import LatencyModel, RouteTable
+from engine.device_table import DeviceTable
+from engine.validation_engine import ConnectivityIndex
+from engine.metrics import PhaseTimer
+from engine.redundancy import RedundancyIndex, edge_key
+from engine.csr_graph import CsrGraph
+from engine.link_model import (
+    DEFAULT_SPEED_MBPS, DEFAULT_PROCESSING_DELAY_US, edge_cost, link_cost, processing_delay_ms, queue_delay_ms,
+)
+
+# Plants with at least this many devices route over CSR arrays instead of networkx
+CSR_MIN_NODES = 5000
+
+def _bulk_fill(graph: nx.Graph, nodes, edges):
+    """
+    Fills an empty nx.Graph straight through its adjacency dicts.
+
+    add_nodes_from/add_edges_from spend most of their time on per-element checks and
+    attribute merging, which dominates reloading a 100k-node plant.
+    """
+    node_attrs, adj = graph._node, graph._adj
+    for node, attrs in nodes:
+        node_attrs[node] = attrs
+        adj[node] = {}
+    for u, v, attrs in edges:
+        adj[u][v] = attrs
+        adj[v][u] = attrs
+
+
+class RouteInputs(NamedTuple):
+    """Inputs of build_route_table: active view, PLC ids and per-device (non-PLC) columns."""
+    graph: nx.Graph
+    controllers: List[str]
+    ids: List[str]
+    owners: List[Optional[str]]
+    protocols: Sequence[int]
+    cycle_times: Sequence[float]
+    # CSR arrays of the cabling with a private copy of the masks (large plants); when
+    # set, routes are searched on it and `graph` is not read
+    csr: Optional[CsrGraph] = None
+
+
+def build_route_table(inputs: RouteInputs) -> RouteTable:
+    """
+    Paths and base latency of every device from its controller.
+
+    Pure function of `inputs`, so it can run on a worker thread against a frozen copy.
+    """
+    if inputs.csr is not None:
+        csr = inputs.csr
+        is_online = csr.is_online
+
+        def search(sources):
+            tree = csr.shortest_paths(sources)
+            return tree.distance, tree.path
+    else:
+        # Live view of the graph with only ACTIVE edges AND ONLINE nodes
+        active_graph = inputs.graph
+        is_online = active_graph.__contains__
+
+        def search(sources):
+            distances, tree_paths = nx.multi_source_dijkstra(active_graph, sources, weight='weight')
+            return (lambda dev_id: distances.get(dev_id, np.nan)), tree_paths.get
+
+    online = [c for c in inputs.controllers if is_online(c)]
+
+    # Every controller down: nothing can be measured
+    if not online:
+        return RouteTable([], [], [], [], [], [])
+
+    # One multi-source Dijkstra from all online PLCs: every device gets the path from
+    # its nearest controller, and the shared switch fabric is only explored once.
+    # distance(dev) is already Sum(link cost) along path_of(dev)
+    distance, path_of = search(online)
+    online = set(online)
+    # Devices pinned to a PLC that is not their nearest one need that PLC's own tree
+    pinned_trees = {}
+
+    paths, base_latency, owners = [], [], []
+    for dev_id, owner in zip(inputs.ids, inputs.owners):
+        path = path_of(dev_id)
+        if owner is None:
+            latency = distance(dev_id)
+            owner = path[0] if path else None
+        elif path is not None and path[0] == owner:
+            latency = distance(dev_id)
+        elif owner not in online:
+            path, latency = None, np.nan
+        else:
+            if owner not in pinned_trees:
+                pinned_trees[owner] = search([owner])
+            owner_distance, owner_path = pinned_trees[owner]
+            path, latency = owner_path(dev_id), owner_distance(dev_id)
+        paths.append(path)
+        base_latency.append(latency)
+        owners.append(owner)
+
+    return RouteTable(inputs.ids, paths, base_latency, inputs.protocols, inputs.cycle_times, owners)
+
 
 class NetworkEngine:
-    def __init__(self):
+    def __init__(self, seed: Optional[int] = None, compact_devices: bool = False,
+                 csr_min_nodes: Optional[int] = CSR_MIN_NODES):
+        # Single seedable generator for jitter and random faults => reproducible runs
+        self.rng = np.random.default_rng(seed)
+        self.latency_model = LatencyModel(self.rng)
         self.graph = nx.Graph()
-        self.devices: Dict[str, Device] = {}
+        # Live view of the topology with only ONLINE nodes and ACTIVE links, kept in
+        # sync by every mutation so ticks never have to rebuild it
+        self.active_graph = nx.Graph()
+        # compact_devices=True keeps devices in a columnar DeviceTable (for very large
+        # plants); it still reads like a Dict[str, Device] but must be written through
+        # the engine methods below
+        self.device_table: Optional[DeviceTable] = DeviceTable() if compact_devices else None
+        self.devices: Dict[str, Device] = self.device_table if compact_devices else {}
+        # Primary PLC (first one added); every PLC acts as a controller for its own devices
         self.controller_id: Optional[str] = None
         self.safety_active: bool = False
+        # Union-find over the physical cabling for O(α(N)) loop checks on new links
+        self.connectivity = ConnectivityIndex()
+
+        # Result cache: bumped by every mutation, compared against on every read
+        self.version: int = 0
+        self._routes_cache = None  # (version, RouteTable)
+        self._topology_cache = None  # (version, topology dict)
+        # Bumped only by structural changes (devices, links, weights, controller
+        # assignment), not by faults; the redundancy index is keyed by it
+        self.structure_version: int = 0
+        self.redundancy: Optional[RedundancyIndex] = None
+        # From csr_min_nodes devices on (None = never), route searches and the link list
+        # of get_topology run over CSR arrays, rebuilt per structure_version; faults only
+        # flip its masks
+        self.csr_min_nodes = csr_min_nodes
+        self._csr: Optional[CsrGraph] = None
+        # Queueing delay (ms) of every link that carries traffic, by edge_key. Load
+        # changes are journaled so a route table only re-applies the links that changed
+        self.link_load: Dict[Tuple[str, str], float] = {}
+        self._load_log: List[Tuple[str, str]] = []
+        self._load_log_base = 0
+        # Utilization changes (they leave `version` alone but still have to be saved)
+        self.load_version: int = 0
+        # Per-phase wall time (active_view, paths, jitter, topology), drained by the tick loop
+        self.timer = PhaseTimer()
+        self.cache_stats: Dict[str, int] = {
+            "performance_hits": 0,
+            "performance_misses": 0,
+            "topology_hits": 0,
+            "topology_misses": 0,
+        }
+
+    def invalidate(self):
+        """Marks cached performance/topology as stale. Call after mutating a Device directly."""
+        self.version += 1
+
+    @property
+    def state_version(self) -> Tuple[int, int]:
+        """Changes since the last snapshot: every mutation plus utilization-only ones."""
+        return self.version, self.load_version
 
     def rename_device(self, device_id: str, new_name: str):
         if device_id in self.devices:
-            self.devices[device_id].display_name = new_name
+            if self.device_table is not None:
+                self.device_table.set_display_name(device_id, new_name)
+            else:
+                self.devices[device_id].display_name = new_name
+            self.invalidate()
             return True
         return False
         
     def trigger_random_fault(self):
         # Exclude PLC from random faults to avoid total network death unless desired
-        eligible = [d_id for d_id, d in self.devices.items() if d.type != DeviceType.PLC]
+        if self.device_table is not None:
+            table = self.device_table
+            rows = table.rows()
+            rows = rows[table.types[rows] != DEVICE_TYPE_CODES[DeviceType.PLC]]
+            eligible = [table.ids[i] for i in rows.tolist()]
+        else:
+            eligible = [d_id for d_id, d in self.devices.items() if d.type != DeviceType.PLC]
         if eligible:
-            target = random.choice(eligible)
-            self.devices[target].status = DeviceStatus.OFFLINE
+            target = eligible[self.rng.integers(len(eligible))]
+            self.set_device_status(target, DeviceStatus.OFFLINE)
             self.safety_active = True
             return target
         return None
 
     def add_device(self, device: Device, connect_to: Optional[str] = None):
         """Adds a device to the topology and connects it to an existing node."""
-        self.devices[device.id] = device
-        self.graph.add_node(device.id, data=device)
+        self.structure_version += 1
+        if self.device_table is not None:
+            self.device_table.add(device)
+            self.graph.add_node(device.id)
+        else:
+            self.devices[device.id] = device
+            self.graph.add_node(device.id, data=device)
+        if device.status != DeviceStatus.OFFLINE:
+            self._activate_node(device.id)
+        else:
+            self._deactivate_node(device.id)
         
-        if device.type == DeviceType.PLC:
+        if device.type == DeviceType.PLC and self.controller_id is None:
             self.controller_id = device.id
 
         if connect_to and connect_to in self.devices:
-            # Base propagation delay 0.1ms per link
+            # Fixed 0.1 ms per link, plus transmission and switch processing (engine.link_model)
             self.graph.add_edge(device.id, connect_to, weight=0.1, active=True)
+            self._recost(device.id, connect_to)
+            self._sync_active_edge(device.id, connect_to)
+            self.connectivity.add_edge(device.id, connect_to)
+        self.invalidate()
 
     def remove_device(self, device_id: str):
         if device_id in self.devices:
+            self.structure_version += 1
+            for neighbor in self.graph.neighbors(device_id):
+                self._set_load(edge_key(device_id, neighbor), 0.0)
             self.graph.remove_node(device_id)
-            del self.devices[device_id]
+            self._deactivate_node(device_id)
+            self.connectivity.stale = True
+            if self.device_table is not None:
+                self.device_table.remove(device_id)
+            else:
+                del self.devices[device_id]
             if self.controller_id == device_id:
-                self.controller_id = None
+                self.controller_id = next(iter(self.controller_ids()), None)
+            self.invalidate()
 
-    def set_link_status(self, u: str, v: str, active: bool):
-        """Simulates physical cable connection/disconnection. Adds link if it doesn't exist."""
+    def set_link_status(self, u: str, v: str, active: bool) -> bool:
+        """Simulates physical cable connection/disconnection. Adds link if it doesn't exist.
+
+        Returns False (and changes nothing) when either end is not a known device.
+        """
+        if u not in self.devices or v not in self.devices:
+            return False
         if not self.graph.has_edge(u, v):
+            self.structure_version += 1
             self.graph.add_edge(u, v, weight=0.1, active=active)
+            self._recost(u, v)
+            self.connectivity.add_edge(u, v)
         else:
             self.graph[u][v]['active'] = active
+            self._element_changed(edge_key(u, v), not active)
+        self._sync_active_edge(u, v)
+        self.invalidate()
+        return True
 
-    def calculate_performance(self) -> List[Dict]:
-        """Calculates latency and status for all devices relative to the PLC."""
-        if not self.controller_id:
-            return []
+    def set_link_weight(self, u: str, v: str, weight: float):
+        """Changes the fixed delay (ms) of an existing link."""
+        self.graph[u][v]['weight'] = weight
+        if self._recost(u, v):
+            self.structure_version += 1
+        self._sync_active_edge(u, v)
+        self.invalidate()
 
-        results = []
-        
-        # Create a view of the graph with only ACTIVE edges AND ONLINE nodes
-        online_nodes = [node_id for node_id, dev in self.devices.items() if dev.status != DeviceStatus.OFFLINE]
-        active_edges = [
-            (u, v) for u, v, d in self.graph.edges(data=True) 
-            if d.get('active', True) and u in online_nodes and v in online_nodes
-        ]
-        
-        active_graph = nx.Graph()
-        active_graph.add_nodes_from(online_nodes)
-        active_graph.add_edges_from(active_edges)
+    def set_link_properties(self, u: str, v: str, speed_mbps: Optional[float] = None,
+                            length_m: Optional[float] = None):
+        """Changes the speed and/or cable length of an existing link (re-costs only that link)."""
+        d = self.graph[u][v]
+        if speed_mbps is not None:
+            d['speed_mbps'] = float(speed_mbps)
+        if length_m is not None:
+            d['length_m'] = float(length_m)
+        if self._recost(u, v):
+            self.structure_version += 1
+        # Queueing depends on the speed too
+        self._set_load(edge_key(u, v), queue_delay_ms(d.get('utilization', 0.0),
+                                                      d.get('speed_mbps', DEFAULT_SPEED_MBPS)))
+        self._sync_active_edge(u, v)
+        self.invalidate()
+
+    def set_link_loads(self, loads: Iterable[Tuple[str, str, float]]) -> int:
+        """
+        Sets the utilization (0-1) of existing links; returns how many queueing delays changed.
 
+        Traffic does not re-route and does not bump `version`: only the changed links
+        are re-costed, and each route table adds the difference to the devices whose
+        path crosses them on its next evaluation. `load_version` records the change
+        for snapshots (state_version).
+        """
+        changed = 0
+        for u, v, utilization in loads:
+            d = self.graph[u][v]
+            if d.get('utilization', 0.0) != float(utilization):
+                self.load_version += 1
+            d['utilization'] = float(utilization)
+            changed += self._set_load(edge_key(u, v), queue_delay_ms(d['utilization'],
+                                                                     d.get('speed_mbps', DEFAULT_SPEED_MBPS)))
+        return changed
+
+    def set_link_utilization(self, u: str, v: str, utilization: float) -> bool:
+        return self.set_link_loads([(u, v, utilization)]) > 0
+
+    def set_device_status(self, device_id: str, status: DeviceStatus) -> bool:
+        """Changes a device status and keeps the active view in sync."""
+        if device_id not in self.devices:
+            return False
+        if self.device_table is not None:
+            self.device_table.set_status(device_id, status)
+        else:
+            self.devices[device_id].status = status
+        if status == DeviceStatus.OFFLINE:
+            self._deactivate_node(device_id)
+        else:
+            self._activate_node(device_id)
+        self.invalidate()
+        return True
+
+    def assign_controller(self, device_id: str, controller_id: Optional[str]) -> bool:
+        """Makes `controller_id` (a PLC) own `device_id`; None falls back to the nearest PLC."""
+        if device_id not in self.devices:
+            return False
+        if controller_id is not None and (
+            controller_id not in self.devices or self._type_of(controller_id) != DeviceType.PLC
+        ):
+            return False
+        if self.device_table is not None:
+            self.device_table.set_controller(device_id, controller_id)
+        else:
+            self.devices[device_id].controller = controller_id
+        self.structure_version += 1
+        self.invalidate()
+        return True
+
+    def set_processing_delay(self, device_id: str, delay_us: Optional[float]) -> bool:
+        """Sets a device's forwarding delay (None = its type's default) and re-costs its links."""
+        if device_id not in self.devices:
+            return False
+        if self.device_table is not None:
+            self.device_table.set_processing_delay(device_id, delay_us)
+        else:
+            self.devices[device_id].processing_delay_us = delay_us
+        changed = False
+        for neighbor in list(self.graph.neighbors(device_id)):
+            changed = self._recost(device_id, neighbor) or changed
+            self._sync_active_edge(device_id, neighbor)
+        if changed:
+            self.structure_version += 1
+        self.invalidate()
+        return True
+
+    def controller_ids(self) -> List[str]:
+        """Ids of every PLC in the plant, in insertion order."""
+        if self.device_table is not None:
+            table = self.device_table
+            rows = table.rows()
+            rows = rows[table.types[rows] == DEVICE_TYPE_CODES[DeviceType.PLC]]
+            return [table.ids[i] for i in rows.tolist()]
+        return [dev_id for dev_id, d in self.devices.items() if d.type == DeviceType.PLC]
+
+    def _type_of(self, device_id: str) -> DeviceType:
+        if self.device_table is not None:
+            return self.device_table.type_of(device_id)
+        return self.devices[device_id].type
+
+    def _processing_ms(self, device_id: str) -> float:
+        if self.device_table is not None:
+            table = self.device_table
+            row = table.index[device_id]
+            return processing_delay_ms(DEVICE_TYPES[table.types[row]], table.processing_delay_of_row(row))
+        device = self.devices[device_id]
+        return processing_delay_ms(device.type, device.processing_delay_us)
+
+    # --- Link costs and load ---
+
+    def _recost(self, u: str, v: str) -> bool:
+        """Recomputes the cached routing cost of one link; True if it changed."""
+        d = self.graph[u][v]
+        cost = edge_cost(d, self._processing_ms(u), self._processing_ms(v))
+        if d.get('cost') == cost:
+            return False
+        d['cost'] = cost
+        return True
+
+    def _set_load(self, key: Tuple[str, str], delay_ms: float) -> bool:
+        if self.link_load.get(key, 0.0) == delay_ms:
+            return False
+        if delay_ms:
+            self.link_load[key] = delay_ms
+        else:
+            self.link_load.pop(key, None)
+        self._load_log.append(key)
+        if len(self._load_log) > max(1024, 4 * len(self.link_load)):
+            # Tables that have not caught up re-apply every loaded link instead
+            self._load_log_base += len(self._load_log)
+            self._load_log = []
+        return True
+
+    def apply_link_load(self, table: RouteTable):
+        """Brings table.load_delay up to date with the links whose load changed since its last call."""
+        end = self._load_log_base + len(self._load_log)
+        if table.load_seen == end:
+            return
+        if table.load_seen < self._load_log_base:
+            table.reset_load()
+            keys = set(self.link_load)
+        else:
+            keys = set(self._load_log[table.load_seen - self._load_log_base:])
+        for key in keys:
+            table.set_link_load(key, self.link_load.get(key, 0.0))
+        table.load_seen = end
+
+    def declare_ring(self, name: str, members: List[str], protocol: str = "MRP"):
+        """Declares an MRP/HSR ring segment whose single loop closure is allowed by validation."""
+        self.connectivity.declare_ring(name, members, protocol)
+
+    def restore_all(self):
+        """Brings every device back ONLINE and clears safety mode."""
+        for dev_id in self.devices:
+            self.set_device_status(dev_id, DeviceStatus.ONLINE)
+        self.safety_active = False
+
+    def has_offline_devices(self) -> bool:
+        """True if any non-PLC device is OFFLINE (drives safety mode)."""
+        if self.device_table is not None:
+            table = self.device_table
+            rows = table.rows()
+            return bool(np.any(
+                (table.statuses[rows] == DEVICE_STATUS_CODES[DeviceStatus.OFFLINE])
+                & (table.types[rows] != DEVICE_TYPE_CODES[DeviceType.PLC])
+            ))
+        return any(d.status == DeviceStatus.OFFLINE for d in self.devices.values() if d.type != DeviceType.PLC)
+
+    def to_state(self) -> Dict:
+        """Plain, picklable copy of the plant (devices, links, controller, safety flag)."""
+        return {
+            "controller_id": self.controller_id,
+            "safety_active": self.safety_active,
+            "devices": [self.devices[dev_id].model_dump(mode='json') for dev_id in self.devices],
+            "links": [
+                {"source": u, "target": v, "weight": d.get('weight', 0.1), "active": d.get('active', True),
+                 "speed_mbps": d.get('speed_mbps', DEFAULT_SPEED_MBPS), "length_m": d.get('length_m', 0.0),
+                 "utilization": d.get('utilization', 0.0)}
+                for u, v, d in self.graph.edges(data=True)
+            ],
+            "rings": {
+                name: {"members": ring["members"], "protocol": ring["protocol"]}
+                for name, ring in self.connectivity.rings.items()
+            },
+        }
+
+    @classmethod
+    def from_state(cls, state: Dict, **kwargs) -> "NetworkEngine":
+        """Builds a new engine from a to_state() dict. Extra kwargs go to the constructor."""
+        engine = cls(**kwargs)
+        for name, ring in state.get("rings", {}).items():
+            engine.declare_ring(name, ring["members"], ring["protocol"])
+        for data in state["devices"]:
+            engine.add_device(Device(**data))
+        for link in state["links"]:
+            if not engine.set_link_status(link["source"], link["target"], link.get("active", True)):
+                # Dangling link (an endpoint is not a device): nothing to cost or save
+                continue
+            engine.set_link_weight(link["source"], link["target"], link.get("weight", 0.1))
+            if "speed_mbps" in link or "length_m" in link:
+                engine.set_link_properties(link["source"], link["target"], link.get("speed_mbps"), link.get("length_m"))
+            if link.get("utilization"):
+                engine.set_link_utilization(link["source"], link["target"], link["utilization"])
+        engine.controller_id = state.get("controller_id")
+        engine.safety_active = state.get("safety_active", False)
+        engine.invalidate()
+        return engine
+
+    @classmethod
+    def from_columns(cls, columns: Dict, **kwargs) -> "NetworkEngine":
+        """
+        Bulk-builds an engine from parallel arrays, skipping per-device bookkeeping.
+
+        Expected keys: ids, ips, display_names (lists, None allowed), types, protocols,
+        statuses (enum code arrays), cycle_times, link_sources, link_targets (row
+        indices into ids), link_weights, link_active, controller_id, and optionally
+        controllers (owning PLC per device), processing_delays (us, NaN = type
+        default), link_speeds, link_lengths, link_utilization, safety_active and rings.
+        """
+        engine = cls(**kwargs)
+        ids = columns["ids"]
+        types = np.asarray(columns["types"])
+        statuses = np.asarray(columns["statuses"])
+        controllers = columns.get("controllers") or [None] * len(ids)
+        processing_delays = columns.get("processing_delays")
+        processing_delays = (np.full(len(ids), np.nan) if processing_delays is None
+                             else np.asarray(processing_delays, dtype=np.float64))
+
+        if engine.device_table is not None:
+            engine.device_table.load_columns(
+                ids, columns["ips"], columns["display_names"], types,
+                columns["protocols"], statuses, columns["cycle_times"], controllers, processing_delays
+            )
+            graph_nodes = ((dev_id, {}) for dev_id in ids)
+        else:
+            # Arrays were written by us, so skip pydantic validation on the way back in
+            for dev_id, ip, name, t, p, st, cycle, owner, delay in zip(
+                ids, columns["ips"], columns["display_names"], types.tolist(),
+                np.asarray(columns["protocols"]).tolist(), statuses.tolist(),
+                np.asarray(columns["cycle_times"]).tolist(), controllers, processing_delays.tolist()
+            ):
+                engine.devices[dev_id] = Device.model_construct(
+                    id=dev_id, type=DEVICE_TYPES[t], ip=ip, status=DEVICE_STATUSES[st],
+                    protocol=PROTOCOLS[p], cycle_time_ms=cycle, display_name=name, controller=owner,
+                    processing_delay_us=None if np.isnan(delay) else delay
+                )
+            graph_nodes = ((dev_id, {"data": engine.devices[dev_id]}) for dev_id in ids)
+
+        sources = np.asarray(columns["link_sources"], dtype=np.int64)
+        targets = np.asarray(columns["link_targets"], dtype=np.int64)
+        weights = np.asarray(columns["link_weights"], dtype=np.float64)
+        active = np.asarray(columns["link_active"], dtype=bool)
+        n_links = len(sources)
+        speeds = np.asarray(columns.get("link_speeds", np.full(n_links, DEFAULT_SPEED_MBPS)), dtype=np.float64)
+        lengths = np.asarray(columns.get("link_lengths", np.zeros(n_links)), dtype=np.float64)
+        utilization = np.asarray(columns.get("link_utilization", np.zeros(n_links)), dtype=np.float64)
+
+        # Every link's cost in one vectorised pass (same formula as _recost)
+        type_delay_us = np.array([DEFAULT_PROCESSING_DELAY_US.get(t, 0.0) for t in DEVICE_TYPES])
+        processing = np.where(np.isnan(processing_delays), type_delay_us[types], processing_delays) / 1000.0
+        costs = link_cost(weights, lengths, speeds, processing[sources], processing[targets])
+        _bulk_fill(engine.graph, graph_nodes, (
+            (ids[u], ids[v], {"weight": w, "active": a, "cost": c})
+            for u, v, w, a, c in zip(sources.tolist(), targets.tolist(), weights.tolist(), active.tolist(),
+                                     costs.tolist())
+        ))
+        # Only links that differ from the defaults carry the attributes
+        for i in np.flatnonzero((speeds != DEFAULT_SPEED_MBPS) | (lengths != 0)).tolist():
+            d = engine.graph[ids[sources[i]]][ids[targets[i]]]
+            d['speed_mbps'], d['length_m'] = float(speeds[i]), float(lengths[i])
+        engine.set_link_loads((ids[sources[i]], ids[targets[i]], float(utilization[i]))
+                              for i in np.flatnonzero(utilization).tolist())
+
+        # Active view straight from the masks instead of node-by-node activation
+        online = statuses != DEVICE_STATUS_CODES[DeviceStatus.OFFLINE]
+        live = active & online[sources] & online[targets]
+        _bulk_fill(engine.active_graph, ((ids[i], {}) for i in np.flatnonzero(online).tolist()), (
+            (ids[u], ids[v], {"weight": c})
+            for u, v, c in zip(sources[live].tolist(), targets[live].tolist(), costs[live].tolist())
+        ))
+
+        for name, ring in (columns.get("rings") or {}).items():
+            engine.declare_ring(name, ring["members"], ring["protocol"])
+        # Union-find is rebuilt lazily on the first loop check
+        engine.connectivity.stale = True
+        engine.controller_id = columns.get("controller_id")
+        engine.safety_active = columns.get("safety_active", False)
+        engine.structure_version += 1
+        engine.invalidate()
+        return engine
+
+    # --- Active view maintenance ---
+
+    def _activate_node(self, node_id: str):
+        if node_id in self.active_graph:
+            return
+        with self.timer.phase("active_view"):
+            self.active_graph.add_node(node_id)
+            for neighbor in self.graph.neighbors(node_id):
+                self._mirror_edge(node_id, neighbor)
+        self._element_changed(node_id, False)
+
+    def _deactivate_node(self, node_id: str):
+        if node_id in self.active_graph:
+            with self.timer.phase("active_view"):
+                self.active_graph.remove_node(node_id)
+            self._element_changed(node_id, True)
+
+    def _sync_active_edge(self, u: str, v: str):
+        """Mirrors a single physical link into the active view."""
+        with self.timer.phase("active_view"):
+            self._mirror_edge(u, v)
+
+    def _mirror_edge(self, u: str, v: str):
+        d = self.graph.get_edge_data(u, v)
+        if d is not None and d.get('active', True) and u in self.active_graph and v in self.active_graph:
+            # The active view routes on the cached cost
+            self.active_graph.add_edge(u, v, weight=d['cost'])
+        elif self.active_graph.has_edge(u, v):
+            self.active_graph.remove_edge(u, v)
+
+    # --- Redundancy (primary/backup routes) ---
+
+    def _element_changed(self, element, down: bool):
+        """Feeds a fault/repair into the redundancy index and CSR masks while they match the structure."""
+        index = self.redundancy
+        if index is not None and index.structure_version == self.structure_version:
+            index.set_down(element, down)
+        csr = self._csr
+        if csr is not None and csr.structure_version == self.structure_version:
+            csr.set_down(element, down)
+
+    # --- CSR backend (large plants) ---
+
+    def csr_view(self) -> Optional[CsrGraph]:
+        """The cabling as CSR arrays, or None below csr_min_nodes devices."""
+        if self.csr_min_nodes is None or len(self.graph) < self.csr_min_nodes:
+            return None
+        if self._csr is None or self._csr.structure_version != self.structure_version:
+            with self.timer.phase("active_view"):
+                self._csr = CsrGraph.from_graph(self.structure_version, self.graph, self.active_graph)
+        return self._csr
+
+    def _down_elements(self) -> set:
+        down = {node for node in self.graph if node not in self.active_graph}
+        down.update(edge_key(u, v) for u, v, d in self.graph.edges(data=True) if not d.get('active', True))
+        return down
+
+    def redundancy_stale(self) -> bool:
+        return self.redundancy is None or self.redundancy.structure_version != self.structure_version
+
+    def install_redundancy(self, index: RedundancyIndex) -> bool:
+        """Adopts an index (possibly built on another thread) and loads the current faults into it."""
+        if index.structure_version != self.structure_version:
+            return False
+        index.sync(self._down_elements())
+        self.redundancy = index
+        return True
+
+    def redundancy_index(self) -> RedundancyIndex:
+        """Primary/backup route index, rebuilt inline only after a structural change."""
+        if self.redundancy_stale():
+            inputs = self.route_inputs()
+            self.install_redundancy(RedundancyIndex.build(
+                self.structure_version, self.graph, inputs.controllers, inputs.ids, inputs.owners
+            ))
+        return self.redundancy
+
+    def routes_from_index(self, inputs: "RouteInputs") -> Optional[RouteTable]:
+        """
+        Route table picked from the redundancy index without any shortest-path search.
+
+        None when the index is stale or some device lost both its primary and backup
+        route; the caller then runs build_route_table and annotates the result.
+        """
+        if self.redundancy_stale():
+            return None
+        index = self.redundancy
+        resolved = index.resolve(inputs.ids)
+        if resolved is None:
+            return None
+        paths, base_latency, owners, failover = resolved
+        return RouteTable(inputs.ids, paths, base_latency, inputs.protocols, inputs.cycle_times, owners,
+                          failover=failover, protected=index.protected)
+
+    def annotate_routes(self, table: RouteTable):
+        """Failover/protected flags for a table found by a full search."""
+        if not self.redundancy_stale():
+            self.redundancy.annotate(table)
+
+    def _get_routes(self) -> RouteTable:
+        """Per-device paths and base latency relative to each controller, cached by version."""
+        if self._routes_cache is not None and self._routes_cache[0] == self.version:
+            self.cache_stats["performance_hits"] += 1
+            return self._routes_cache[1]
+        self.cache_stats["performance_misses"] += 1
+
+        with self.timer.phase("paths"):
+            table = self._build_routes()
+        self._routes_cache = (self.version, table)
+        return table
+
+    def route_inputs(self, frozen: bool = False) -> "RouteInputs":
+        """
+        Everything path computation needs, gathered from the live state.
+
+        frozen=True copies the active view and freezes it, so the result can be handed
+        to another thread while the engine keeps mutating. Large plants carry a CSR
+        snapshot instead, which is always safe to hand over (the graph is not copied).
+        """
+        graph = self.active_graph
+        csr = self.csr_view()
+        if csr is not None:
+            csr = csr.snapshot()
+        elif frozen:
+            graph = nx.freeze(graph.copy())
+        if self.device_table is not None:
+            table = self.device_table
+            rows = table.rows()
+            rows = rows[table.types[rows] != DEVICE_TYPE_CODES[DeviceType.PLC]]
+            return RouteInputs(
+                graph, self.controller_ids(),
+                [table.ids[i] for i in rows.tolist()],
+                [table.controllers[i] for i in rows.tolist()],
+                # Fancy indexing already copies the columns
+                table.protocols[rows], table.cycle_times[rows], csr,
+            )
+        ids, owners, protocols, cycle_times = [], [], [], []
         for dev_id, device in self.devices.items():
-            if dev_id == self.controller_id:
+            if device.type == DeviceType.PLC:
                 continue
+            ids.append(dev_id)
+            owners.append(device.controller)
+            protocols.append(PROTOCOL_CODES[device.protocol])
+            cycle_times.append(device.cycle_time_ms)
+        return RouteInputs(graph, self.controller_ids(), ids, owners, protocols, cycle_times, csr)
 
-            try:
-                # 1. Connectivity Check
-                if nx.has_path(active_graph, self.controller_id, dev_id):
-                    path = nx.shortest_path(active_graph, self.controller_id, dev_id, weight='weight')
-                    
-                    # 2. Latency Logic
-                    # L = Sum(PropDelay) + Sum(SwitchProcDelay) + ProtocolOverhead
-                    base_latency = 0.0
-                    for i in range(len(path) - 1):
-                        base_latency += self.graph[path[i]][path[i+1]]['weight']
-                    
-                    # Protocol-specific Jitter
-                    jitter = 0.0
-                    if device.protocol == Protocol.PROFINET_RT:
-                        jitter = random.uniform(0.01, 0.05)
-                    elif device.protocol == Protocol.MODBUS_TCP:
-                        jitter = random.uniform(0.1, 0.5)
-                    elif device.protocol == Protocol.PROFINET_IRT or device.protocol == Protocol.ETHERCAT:
-                        jitter = random.uniform(0.001, 0.005)  # Very low jitter
-                    elif device.protocol == Protocol.OPC_UA:
-                        jitter = random.uniform(0.5, 5.0)  # TCP/IP pub-sub, lower priority than hard RT
-
-                    total_latency = base_latency + jitter
-                    
-                    # Resilience logic: if path is longer than original, it's a backup path
-                    # (Simplified: if we have to use more than 1 hop for a simple connection)
-                    status = DeviceStatus.ONLINE
-                    if len(path) > 2: # Potential redundant path being used
-                         status = DeviceStatus.ALARM
-                    
-                    if total_latency >= (device.cycle_time_ms * 2):
-                        status = DeviceStatus.ALARM
-
-                    results.append({
-                        "id": dev_id,
-                        "latency_ms": round(total_latency, 3),
-                        "jitter_ms": round(jitter, 3),
-                        "status": status,
-                        "path": path,
-                        "redundant": len(path) > 2
-                    })
-                else:
-                    results.append({
-                        "id": dev_id,
-                        "latency_ms": -1,
-                        "jitter_ms": 0,
-                        "status": DeviceStatus.OFFLINE,
-                        "path": [],
-                        "redundant": False
-                    })
-            except Exception as e:
-                print(f"Error calculating performance for {dev_id}: {e}")
+    def _build_routes(self) -> RouteTable:
+        inputs = self.route_inputs()
+        self.redundancy_index()
+        table = self.routes_from_index(inputs)
+        if table is None:
+            table = build_route_table(inputs)
+            self.annotate_routes(table)
+        return table
+
+    def calculate_performance(self) -> List[Dict]:
+        """Calculates latency and status for all devices relative to their controller.
+
+        Every non-PLC device is measured against its assigned PLC, or the nearest one
+        when unassigned; the flat result is tagged with that "controller". Paths are
+        only recomputed after a mutation; a clean tick just re-samples jitter for every
+        device in one batched draw.
+        """
+        table = self._get_routes()
+        self.apply_link_load(table)
+        with self.timer.phase("jitter"):
+            return self.evaluate_routes(table)
+
+    def evaluate_routes(self, table: RouteTable) -> List[Dict]:
+        """Draws jitter over `table` and builds the performance list (thread-safe: touches no graph)."""
+        # L = Sum(link cost: delay + propagation + transmission + processing) + Sum(queueing) + jitter
+        total, jitter, alarm = self.latency_model.evaluate(table)
+        latency_ms = np.round(total, 3).tolist()
+        jitter_ms = np.round(jitter, 3).tolist()
+        alarm = alarm.tolist()
+        protected = table.protected.tolist()
+
+        results = []
+        k = 0  # index into the reachable-only arrays
+        for dev_id, path, owner, redundant in zip(table.ids, table.paths, table.controllers, protected):
+            if path is not None:
+                # Resilience logic: running on the backup route (primary broken),
+                # or latency over 2x the configured cycle time
+                results.append({
+                    "id": dev_id,
+                    "latency_ms": latency_ms[k],
+                    "jitter_ms": jitter_ms[k],
+                    "status": DeviceStatus.ALARM if alarm[k] else DeviceStatus.ONLINE,
+                    "path": path,
+                    "redundant": redundant,
+                    "controller": owner
+                })
+                k += 1
+            else:
+                results.append({
+                    "id": dev_id,
+                    "latency_ms": -1,
+                    "jitter_ms": 0,
+                    "status": DeviceStatus.OFFLINE,
+                    "path": [],
+                    "redundant": False,
+                    "controller": owner
+                })
 
         return results
 
     def get_topology(self) -> Dict:
-        """Returns JSON-friendly topology for D3.js."""
+        """Returns JSON-friendly topology for D3.js (cached by version, treat as read-only)."""
+        if self._topology_cache is not None and self._topology_cache[0] == self.version:
+            self.cache_stats["topology_hits"] += 1
+            return self._topology_cache[1]
+        self.cache_stats["topology_misses"] += 1
+
+        with self.timer.phase("topology"):
+            topology = self._build_topology()
+        self._topology_cache = (self.version, topology)
+        return topology
+
+    def _build_topology(self) -> Dict:
         nodes = []
-        for dev_id, device in self.devices.items():
-            nodes.append({
-                "id": dev_id,
-                "type": device.type,
-                "protocol": device.protocol,
-                "status": device.status,
-                "display_name": device.display_name or device.id
-            })
+        if self.device_table is not None:
+            table = self.device_table
+            types = table.types.tolist()
+            protocols = table.protocols.tolist()
+            statuses = table.statuses.tolist()
+            for i in table.rows().tolist():
+                dev_id = table.ids[i]
+                nodes.append({
+                    "id": dev_id,
+                    "type": DEVICE_TYPES[types[i]],
+                    "protocol": PROTOCOLS[protocols[i]],
+                    "status": DEVICE_STATUSES[statuses[i]],
+                    "display_name": table.display_names[i] or dev_id
+                })
+        else:
+            for dev_id, device in self.devices.items():
+                nodes.append({
+                    "id": dev_id,
+                    "type": device.type,
+                    "protocol": device.protocol,
+                    "status": device.status,
+                    "display_name": device.display_name or device.id
+                })
         
+        csr = self.csr_view()
+        if csr is not None:
+            return {"nodes": nodes, "links": csr.links()}
+
         links = []
         for u, v, d in self.graph.edges(data=True):
             links.append({
@@ -0,0 +1,279 @@
+"""
+Simulated OPC UA server publishing live engine state.
+
+Every device is an object under Objects/Devices with three variables, Status,
+LatencyMs and JitterMs (string node ids "<device>.Status" etc. in the simulator
+namespace), so SCADA clients can browse the plant and subscribe instead of polling
+the Socket.IO stream.
+
+The server is an asyncua (asyncio) process of its own: asyncio does not mix with
+eventlet's monkey patching in app.py. The app side is OpcUaFeed, which diffs each
+published result against what the server already holds and pipes only the changes
+to the server's stdin as one NDJSON line per batch:
+
+    {"t": <computed_at>, "upsert": [[id, status, latency_ms, jitter_ms], ...], "remove": [id, ...]}
+
+Fields that did not change are null. `t` becomes the SourceTimestamp of every value
+written, so a client can measure publish latency end to end
+(benchmarks/opcua_load.py). Run standalone with
+
+    python -m engine.opcua_server --endpoint opc.tcp://0.0.0.0:4840/netsim/
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import subprocess
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+
+try:
+    from asyncua import Server, ua
+except ImportError:  # only the server process needs it; OpcUaFeed runs without
+    Server = ua = None
+
+from engine.models import DeviceStatus
+
+logger = logging.getLogger(__name__)
+
+NAMESPACE_URI = "urn:industrial-network-simulator"
+DEFAULT_ENDPOINT = "opc.tcp://0.0.0.0:4840/netsim/"
+FIELDS = ("Status", "LatencyMs", "JitterMs")
+# Server process exit code when asyncua is missing: the feed stops respawning it
+EXIT_MISSING_DEPENDENCY = 3
+
+_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def variable_id(device_id: str, field: str) -> str:
+    return f"{device_id}.{field}"
+
+
+class OpcUaFeed:
+    """
+    App side of the OPC UA server: keeps the server process running and streams changes to it.
+
+    publish() is cheap (a dict diff per tick) and never blocks on the server. Changes
+    that pile up while a line is being written coalesce per device, latest value
+    wins, so a slow server costs at most one pending entry per device, never a
+    growing backlog. Latency and jitter changes within `deadband_ms` of the value
+    the server holds are not sent.
+    """
+
+    def __init__(self, endpoint: str = DEFAULT_ENDPOINT, deadband_ms: float = 0.0, restart_delay_s: float = 1.0):
+        self.endpoint = endpoint
+        self.deadband_ms = deadband_ms
+        self.restart_delay_s = restart_delay_s
+        # Values the server holds or has queued, and the changes not written yet (None = remove)
+        self._sent: Dict[str, Tuple[str, float, float]] = {}
+        self._pending: Dict[str, Optional[List]] = {}
+        self._pending_at = 0.0
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopped = False
+        self._process = None
+        self.lines_sent = 0
+        self.items_sent = 0
+
+    def publish(self, topology: Dict, performance: List[Dict], computed_at: float):
+        """Queues what changed in one result; controllers (no performance entry) report 0 ms."""
+        measured = {p["id"]: p for p in performance}
+        deadband = self.deadband_ms
+        with self._lock:
+            seen = set()
+            for node in topology["nodes"]:
+                dev_id = node["id"]
+                seen.add(dev_id)
+                perf = measured.get(dev_id)
+                status = DeviceStatus(perf["status"] if perf else node["status"]).value
+                latency = float(perf["latency_ms"]) if perf else 0.0
+                jitter = float(perf["jitter_ms"]) if perf else 0.0
+
+                previous = self._sent.get(dev_id)
+                if previous is None:
+                    change = [dev_id, status, latency, jitter]
+                    self._sent[dev_id] = (status, latency, jitter)
+                else:
+                    old_status, old_latency, old_jitter = previous
+                    change = [dev_id,
+                              status if status != old_status else None,
+                              latency if abs(latency - old_latency) > deadband else None,
+                              jitter if abs(jitter - old_jitter) > deadband else None]
+                    if change[1] is None and change[2] is None and change[3] is None:
+                        continue
+                    self._sent[dev_id] = (status if change[1] is not None else old_status,
+                                          latency if change[2] is not None else old_latency,
+                                          jitter if change[3] is not None else old_jitter)
+                self._merge(change)
+            for dev_id in [d for d in self._sent if d not in seen]:
+                del self._sent[dev_id]
+                self._pending[dev_id] = None
+            if self._pending:
+                self._pending_at = computed_at
+                self._wakeup.set()
+
+    def _merge(self, change: List):
+        queued = self._pending.get(change[0])
+        if queued is None:
+            # Nothing queued, or re-added after a queued removal (then `change` is complete)
+            self._pending[change[0]] = change
+            return
+        for i in range(1, 4):
+            if change[i] is not None:
+                queued[i] = change[i]
+
+    def take(self) -> Optional[str]:
+        """All pending changes as one NDJSON line (without the newline), or None."""
+        with self._lock:
+            if not self._pending:
+                return None
+            upsert = [c for c in self._pending.values() if c is not None]
+            remove = [d for d, c in self._pending.items() if c is None]
+            message = {"t": self._pending_at, "upsert": upsert, "remove": remove}
+            self._pending = {}
+        self.lines_sent += 1
+        self.items_sent += len(upsert) + len(remove)
+        return json.dumps(message, separators=(",", ":"))
+
+    def resync(self):
+        """The server (re)started empty: everything it should hold is sent again."""
+        with self._lock:
+            self._pending = {dev_id: [dev_id, *values] for dev_id, values in self._sent.items()}
+            if self._pending:
+                self._wakeup.set()
+
+    # --- Server process ---
+
+    def _spawn(self):
+        return subprocess.Popen([sys.executable, "-m", "engine.opcua_server", "--endpoint", self.endpoint],
+                                stdin=subprocess.PIPE, cwd=_ROOT)
+
+    def run(self):
+        """Blocking loop (run as a background task): spawns the server, restarts it if it dies."""
+        while not self._stopped:
+            self._process = process = self._spawn()
+            self.resync()
+            try:
+                while not self._stopped and process.poll() is None:
+                    self._wakeup.wait(1.0)
+                    self._wakeup.clear()
+                    line = self.take()
+                    if line is not None:
+                        process.stdin.write(line.encode() + b"\n")
+                        process.stdin.flush()
+            except OSError:
+                pass  # broken pipe: the server died mid-write
+            if self._stopped:
+                break
+            code = process.wait()
+            if code == EXIT_MISSING_DEPENDENCY:
+                logger.warning("OPC UA server disabled: asyncua is not installed")
+                return
+            logger.warning("OPC UA server exited with code %s, restarting", code)
+            time.sleep(self.restart_delay_s)
+
+    def stop(self):
+        """Closes the server's stdin (it shuts down on EOF) and ends run()."""
+        self._stopped = True
+        self._wakeup.set()
+        process = self._process
+        if process is not None and process.poll() is None:
+            try:
+                process.stdin.close()
+            except OSError:
+                pass
+            process.wait()
+
+
+class DeviceNodeServer:
+    """asyncua server holding one object per device; apply() writes a feed line into it."""
+
+    def __init__(self, endpoint: str = DEFAULT_ENDPOINT, yield_every: int = 1000):
+        self.endpoint = endpoint
+        # Writes between yields to the loop, so subscriptions keep publishing during big batches
+        self.yield_every = yield_every
+        self.server = None
+        self.ns = None
+        self._folder = None
+        self._objects: Dict[str, object] = {}
+
+    async def start(self):
+        self.server = Server()
+        await self.server.init()
+        self.server.set_endpoint(self.endpoint)
+        self.server.set_server_name("Industrial Network Simulator")
+        self.ns = await self.server.register_namespace(NAMESPACE_URI)
+        self._folder = await self.server.nodes.objects.add_folder(ua.NodeId("Devices", self.ns), "Devices")
+        await self.server.start()
+
+    async def stop(self):
+        await self.server.stop()
+
+    async def _add_device(self, device_id: str, values: Tuple):
+        obj = await self._folder.add_object(ua.NodeId(device_id, self.ns), device_id)
+        for field, value, vtype in zip(FIELDS, values, (ua.VariantType.String, ua.VariantType.Double,
+                                                         ua.VariantType.Double)):
+            await obj.add_variable(ua.NodeId(variable_id(device_id, field), self.ns), field,
+                                   ua.Variant(value, vtype))
+        self._objects[device_id] = obj
+
+    async def apply(self, message: Dict):
+        source_ts = datetime.fromtimestamp(message["t"], timezone.utc)
+        for device_id in message["remove"]:
+            obj = self._objects.pop(device_id, None)
+            if obj is not None:
+                await self.server.delete_nodes([obj], recursive=True)
+
+        types = (ua.VariantType.String, ua.VariantType.Double, ua.VariantType.Double)
+        writes = 0
+        for device_id, *values in message["upsert"]:
+            if device_id not in self._objects:
+                await self._add_device(device_id, values)
+            server_ts = datetime.now(timezone.utc)
+            for field, value, vtype in zip(FIELDS, values, types):
+                if value is None:
+                    continue
+                await self.server.write_attribute_value(
+                    ua.NodeId(variable_id(device_id, field), self.ns),
+                    ua.DataValue(ua.Variant(value, vtype), SourceTimestamp=source_ts, ServerTimestamp=server_ts))
+                writes += 1
+                if writes % self.yield_every == 0:
+                    await asyncio.sleep(0)
+
+
+async def serve(endpoint: str):
+    """Runs the server, applying feed lines from stdin until EOF."""
+    nodes = DeviceNodeServer(endpoint)
+    await nodes.start()
+    print(f"OPC UA server listening on {endpoint}")
+    loop = asyncio.get_running_loop()
+    # One line carries a whole batch (10k devices ~ 500 KB)
+    reader = asyncio.StreamReader(limit=64 << 20)
+    await loop.connect_read_pipe(lambda: asyncio.StreamReaderProtocol(reader), sys.stdin)
+    try:
+        while True:
+            line = await reader.readline()
+            if not line:
+                break
+            await nodes.apply(json.loads(line))
+    finally:
+        await nodes.stop()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="OPC UA server fed with engine results on stdin.")
+    parser.add_argument("--endpoint", default=os.environ.get("NETSIM_OPCUA_ENDPOINT", DEFAULT_ENDPOINT))
+    args = parser.parse_args(argv)
+    if Server is None:
+        print("asyncua is not installed (pip install asyncua)", file=sys.stderr)
+        return EXIT_MISSING_DEPENDENCY
+    asyncio.run(serve(args.endpoint))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
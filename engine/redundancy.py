@@ -0,0 +1,315 @@
+import networkx as nx
+import numpy as np
+from typing import Dict, Hashable, List, Optional, Set, Tuple
+
+from engine.latency_model import RouteTable
+
+# Fault elements: a device id (str) or an undirected link key (tuple)
+Element = Hashable
+
+
+def edge_key(u: str, v: str) -> Tuple[str, str]:
+    return (u, v) if u <= v else (v, u)
+
+
+def _latency(graph: nx.Graph, path: List[str]) -> float:
+    return sum(graph[u][v]['cost'] for u, v in zip(path, path[1:]))
+
+
+class RedundancyIndex:
+    """
+    Primary and backup route of every device on the physical cabling.
+
+    Built from the cabling with every link and device up, so it only changes with
+    the structure (devices, links, link costs, controller assignment) and not with
+    faults. Primary routes are the design-time shortest-path trees from the
+    controllers. The backup is the shortest path once the primary's links are
+    removed; bridges cannot be avoided, so a drive hanging off a ring switch uses
+    the switch's backup plus its own bridge tail, and only devices whose primary
+    crosses no bridge count as protected.
+
+    Every tree position gets an Euler-tour interval, so a fault is a range update
+    over the subtree it affects (no per-path bookkeeping), and resolve() picks
+    primary, backup, unreachable or "needs a real search" for every device with
+    one cumulative sum instead of a shortest-path search.
+    """
+
+    def __init__(self, structure_version: int, graph: nx.Graph, controllers: List[str], ids: List[str],
+                 owners: List[Optional[str]], sole_owner: List[bool], primary: List[Optional[List[str]]],
+                 trees: List[Hashable]):
+        self.structure_version = structure_version
+        self.controllers = controllers
+        self.ids = ids
+        self.owners = owners
+        self.primary = primary
+        self.sole_owner = np.array(sole_owner, dtype=bool)
+        self.has_primary = np.array([p is not None for p in primary], dtype=bool)
+        self.bridges = {edge_key(u, v) for u, v in nx.bridges(graph)}
+        # Biconnected component of every link
+        self.blocks = {
+            edge_key(u, v): block
+            for block, edges in enumerate(nx.biconnected_component_edges(graph))
+            for u, v in edges
+        }
+
+        # Tree positions keyed by (tree, node); paths of one Dijkstra run share
+        # prefixes, so every path only adds the positions not seen yet
+        position: Dict[Tuple[Hashable, str], int] = {}
+        self.nodes: List[str] = []
+        self.parent: List[int] = []
+        for path, tree in zip(primary, trees):
+            if path is None:
+                continue
+            k = len(path) - 1
+            while k >= 0 and (tree, path[k]) not in position:
+                k -= 1
+            for j in range(k + 1, len(path)):
+                position[(tree, path[j])] = len(self.nodes)
+                self.nodes.append(path[j])
+                self.parent.append(position[(tree, path[j - 1])] if j > 0 else -1)
+        self.row_pos = np.array([position[(t, p[-1])] if p is not None else -1 for p, t in zip(primary, trees)],
+                                dtype=np.int64)
+
+        # Parents always precede their children, so one forward pass fills every
+        # per-position column. Anchor: deepest ancestor-or-self not reached over a
+        # bridge (a root means no backup)
+        size = len(self.nodes)
+        self.children: List[List[int]] = [[] for _ in range(size)]
+        self.depth = np.zeros(size, dtype=np.int64)
+        self.distance = np.zeros(size, dtype=np.float64)
+        self.anchor = np.arange(size, dtype=np.int64)
+        bridged = np.zeros(size, dtype=bool)
+        self.node_positions: Dict[str, List[int]] = {}
+        self.edge_positions: Dict[Tuple[str, str], List[int]] = {}
+        for pos, (node, par) in enumerate(zip(self.nodes, self.parent)):
+            self.node_positions.setdefault(node, []).append(pos)
+            if par < 0:
+                continue
+            edge = edge_key(self.nodes[par], node)
+            self.children[par].append(pos)
+            self.edge_positions.setdefault(edge, []).append(pos)
+            self.depth[pos] = self.depth[par] + 1
+            self.distance[pos] = self.distance[par] + graph[self.nodes[par]][node]['cost']
+            if edge in self.bridges:
+                bridged[pos] = True
+                self.anchor[pos] = self.anchor[par]
+            else:
+                bridged[pos] = bridged[par]
+        self.tin = np.zeros(size, dtype=np.int64)
+        self.tout = np.zeros(size, dtype=np.int64)
+        self._euler()
+
+        rows = np.flatnonzero(self.row_pos >= 0)
+        self.protected = np.zeros(len(ids), dtype=bool)
+        self.protected[rows] = ~bridged[self.row_pos[rows]] & (self.depth[self.row_pos[rows]] > 0)
+
+        # Backup per anchor: owner -> anchor avoiding the anchor's primary links
+        self.backup: Dict[int, Optional[List[str]]] = {}
+        for pos in sorted(set(self.anchor[self.row_pos[rows]].tolist())):
+            if self.depth[pos] > 0:
+                self.backup[pos] = self._backup_to(graph, pos)
+        self.backup_latency = {pos: _latency(graph, p) for pos, p in self.backup.items() if p is not None}
+
+        # Fault state: down elements plus two difference arrays in Euler order, one
+        # for anything on the primary and one for separators only
+        self.down: Set[Element] = set()
+        self._primary_diff = np.zeros(size + 1, dtype=np.int64)
+        self._cut_diff = np.zeros(size + 1, dtype=np.int64)
+
+    @classmethod
+    def build(cls, structure_version: int, graph: nx.Graph, controllers: List[str],
+              ids: List[str], owners: List[Optional[str]]) -> "RedundancyIndex":
+        """Pure function of its arguments (pass a frozen copy to run it on another thread)."""
+        # Same rule as build_route_table: nearest controller, or the pinned PLC's own
+        # tree when it is not the nearest one
+        paths = nx.multi_source_dijkstra_path(graph, controllers, weight='cost') if controllers else {}
+        pinned_paths = {}
+        primary, resolved, trees = [], [], []
+        for dev_id, owner in zip(ids, owners):
+            path, tree = paths.get(dev_id), "*"
+            if owner is not None and (path is None or path[0] != owner):
+                if owner not in pinned_paths:
+                    pinned_paths[owner] = nx.single_source_dijkstra_path(graph, owner, weight='cost')
+                path, tree = pinned_paths[owner].get(dev_id), owner
+            primary.append(path)
+            resolved.append(path[0] if path else owner)
+            trees.append(tree)
+        # An unassigned device in a multi-PLC plant may still be reached by another PLC
+        sole_owner = [owner is not None or len(controllers) == 1 for owner in owners]
+        return cls(structure_version, graph, list(controllers), ids, resolved, sole_owner, primary, trees)
+
+    def _euler(self):
+        counter = 0
+        for root in [pos for pos, par in enumerate(self.parent) if par < 0]:
+            stack = [(root, False)]
+            while stack:
+                pos, done = stack.pop()
+                if done:
+                    self.tout[pos] = counter - 1
+                    continue
+                self.tin[pos] = counter
+                counter += 1
+                stack.append((pos, True))
+                stack.extend((child, False) for child in self.children[pos])
+
+    def _edge_above(self, pos: int) -> Tuple[str, str]:
+        return edge_key(self.nodes[self.parent[pos]], self.nodes[pos])
+
+    def _path_to(self, pos: int) -> List[str]:
+        path = []
+        while pos >= 0:
+            path.append(self.nodes[pos])
+            pos = self.parent[pos]
+        return path[::-1]
+
+    def _backup_to(self, graph: nx.Graph, pos: int) -> Optional[List[str]]:
+        path = self._path_to(pos)
+        excluded = {edge_key(u, v) for u, v in zip(path, path[1:])} - self.bridges
+
+        def weight(u, v, d):
+            return None if edge_key(u, v) in excluded else d['cost']
+        try:
+            return nx.dijkstra_path(graph, path[0], path[-1], weight=weight)
+        except nx.NetworkXNoPath:
+            return None
+
+    def _separates(self, pos: int, child: int) -> bool:
+        """A node cuts off `child`'s subtree iff the path enters and leaves it in different biconnected components."""
+        return self.parent[pos] >= 0 and self.blocks[self._edge_above(pos)] != self.blocks[self._edge_above(child)]
+
+    @staticmethod
+    def _add(diff: np.ndarray, start: int, end: int, delta: int):
+        if start <= end:
+            diff[start] += delta
+            diff[end + 1] -= delta
+
+    def sync(self, down: Set[Element]):
+        """Sets the initial fault state (elements currently down)."""
+        self._primary_diff[:] = 0
+        self._cut_diff[:] = 0
+        self.down = set()
+        for element in down:
+            self.set_down(element, True)
+
+    def set_down(self, element: Element, down: bool):
+        """A device went OFFLINE/ONLINE or a link was disconnected/reconnected."""
+        if (element in self.down) == down:
+            return
+        if down:
+            self.down.add(element)
+        else:
+            self.down.discard(element)
+        delta = 1 if down else -1
+        tin, tout = self.tin, self.tout
+        if isinstance(element, tuple):
+            cut = element in self.bridges
+            for pos in self.edge_positions.get(element, ()):
+                self._add(self._primary_diff, tin[pos], tout[pos], delta)
+                if cut:
+                    self._add(self._cut_diff, tin[pos], tout[pos], delta)
+        else:
+            for pos in self.node_positions.get(element, ()):
+                # The device itself counts as "device down"; only what hangs below depends on it
+                self._add(self._primary_diff, tin[pos] + 1, tout[pos], delta)
+                for child in self.children[pos]:
+                    if self._separates(pos, child):
+                        self._add(self._cut_diff, tin[child], tout[child], delta)
+
+    def _broken_counts(self, diff: np.ndarray):
+        """(per position, per device row) number of down elements above each."""
+        per_position = np.cumsum(diff[:-1])[self.tin] if len(self.nodes) else np.zeros(0, dtype=np.int64)
+        per_row = np.zeros(len(self.ids), dtype=np.int64)
+        rows = self.row_pos >= 0
+        per_row[rows] = per_position[self.row_pos[rows]]
+        return per_position, per_row
+
+    def backup_of(self, row: int) -> Optional[List[str]]:
+        """Full backup path of one device row (None when it has none)."""
+        pos = self.row_pos[row]
+        anchor = int(self.anchor[pos]) if pos >= 0 else -1
+        if self.backup.get(anchor) is None:
+            return None
+        return self.backup[anchor] + self.primary[row][self.depth[anchor] + 1:]
+
+    def _backup_ok(self, pos: int) -> bool:
+        path = self.backup.get(pos)
+        if path is None:
+            return False
+        down = self.down
+        return not any(node in down for node in path[:-1]) and \
+            not any(edge_key(u, v) in down for u, v in zip(path, path[1:]))
+
+    def resolve(self, ids: List[str]):
+        """
+        (paths, base_latency, owners, failover) for the current fault state, or None
+        when some device lost both routes and needs a real shortest-path search.
+        """
+        if ids != self.ids or all(c in self.down for c in self.controllers):
+            # Changed device set, or every controller down (build_route_table reports nothing then)
+            return None
+        broken, broken_rows = self._broken_counts(self._primary_diff)
+        _, cut_rows = self._broken_counts(self._cut_diff)
+        device_down = np.fromiter((dev_id in self.down for dev_id in ids), dtype=bool, count=len(ids))
+        unreachable = device_down | ~self.has_primary | (self.sole_owner & (cut_rows > 0))
+        failover = ~unreachable & (broken_rows > 0)
+
+        paths, latency = [], []
+        distance = self.distance
+        backup_ok: Dict[int, bool] = {}
+        for row, pos in enumerate(self.row_pos.tolist()):
+            if unreachable[row]:
+                paths.append(None)
+                latency.append(np.nan)
+            elif not failover[row]:
+                paths.append(self.primary[row])
+                latency.append(distance[pos])
+            else:
+                anchor = int(self.anchor[pos])
+                if anchor not in backup_ok:
+                    backup_ok[anchor] = self._backup_ok(anchor)
+                # Backup reaches the anchor; the bridge tail below it must be intact too
+                if not backup_ok[anchor] or broken_rows[row] != broken[anchor]:
+                    return None
+                paths.append(self.backup_of(row))
+                latency.append(self.backup_latency[anchor] + distance[pos] - distance[anchor])
+        return paths, latency, self.owners, failover
+
+    def annotate(self, table: RouteTable):
+        """Sets failover/protected on a table found by a full search (reachable with a broken primary = failover)."""
+        if table.ids != self.ids:
+            return
+        _, broken_rows = self._broken_counts(self._primary_diff)
+        table.failover = table.reachable & (broken_rows > 0)
+        table.protected = self.protected
+
+    def report(self) -> Dict:
+        """Single points of failure: links and devices whose loss cuts devices off their controller."""
+        rows = np.flatnonzero(self.row_pos >= 0)
+        order = rows[np.argsort(self.tin[self.row_pos[rows]], kind='stable')]
+        sorted_tin = self.tin[self.row_pos[order]]
+
+        def victims(pos):
+            lo, hi = np.searchsorted(sorted_tin, [self.tin[pos], self.tout[pos] + 1])
+            return [self.ids[r] for r in order[lo:hi].tolist()]
+
+        link_victims: Dict[Tuple[str, str], List[str]] = {}
+        device_victims: Dict[str, List[str]] = {}
+        for pos, par in enumerate(self.parent):
+            if par < 0:
+                continue
+            edge = self._edge_above(pos)
+            if edge in self.bridges:
+                link_victims.setdefault(edge, []).extend(victims(pos))
+            if self._separates(par, pos):
+                device_victims.setdefault(self.nodes[par], []).extend(victims(pos))
+        return {
+            "protected_devices": [d for d, p in zip(self.ids, self.protected.tolist()) if p],
+            "unprotected_devices": [d for d, p, q in zip(self.ids, self.protected.tolist(), self.has_primary.tolist())
+                                    if q and not p],
+            "single_points_of_failure": {
+                "links": [{"source": u, "target": v, "isolates": isolated}
+                          for (u, v), isolated in sorted(link_victims.items(), key=lambda kv: -len(kv[1]))],
+                "devices": [{"id": node, "isolates": isolated}
+                            for node, isolated in sorted(device_victims.items(), key=lambda kv: -len(kv[1]))],
+            },
+        }
@@ -0,0 +1,211 @@
+"""
+Scripted "what happens if" scenarios, run headless against a NetworkEngine.
+
+A scenario is a JSON document with timed actions (plant time, in seconds):
+
+    {
+      "name": "SW1 uplink loss",
+      "duration_s": 10, "sample_interval_s": 1, "seed": 0,
+      "actions": [
+        {"t": 2, "action": "set_link_status", "u": "SW1", "v": "PLC", "active": false},
+        {"t": 4, "action": "fault", "device_id": "DR1"},
+        {"t": 6, "action": "restore", "device_id": "DR1"},
+        {"t": 7, "action": "add_device", "device": {"id": "IO9", "type": "IO-Link"}, "connect_to": "SW2"},
+        {"t": 8, "action": "remove_device", "device_id": "IO9"},
+        {"t": 9, "action": "restore"}
+      ],
+      "expect": [{"t": 4, "id": "DR1", "status": "Offline"}]
+    }
+
+The clock is virtual: the runner jumps from one sample/action time to the next, so
+a scenario runs as fast as the engine computes. Batches run on a process pool,
+each worker rebuilding the plant once from a to_state() dump.
+
+    python -m engine.scenario plant.json scenarios/*.json --workers 8
+"""
+import argparse
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional
+
+from engine.bulk_io import as_bool
+from engine.network_engine import NetworkEngine, Device, DeviceStatus
+from engine.validation_engine import ValidationEngine
+
+ACTIONS = ("set_link_status", "fault", "restore", "add_device", "remove_device")
+
+# Plant shared by every scenario of a batch (set once per worker by _init_worker)
+_worker_plant: Optional[Dict] = None
+
+
+def _init_worker(plant: Optional[Dict]):
+    global _worker_plant
+    _worker_plant = plant
+
+
+def _apply(engine: NetworkEngine, action: Dict):
+    """Applies one action the same way the Socket.IO/REST handlers do."""
+    kind = action["action"]
+    if kind == "set_link_status":
+        for node in (action["u"], action["v"]):
+            if node not in engine.devices:
+                raise ValueError(f"Unknown device: {node}")
+        engine.set_link_status(action["u"], action["v"], as_bool(action.get("active", False)))
+    elif kind == "fault":
+        if not engine.set_device_status(action["device_id"], DeviceStatus.OFFLINE):
+            raise ValueError(f"Unknown device: {action['device_id']}")
+        engine.safety_active = True
+    elif kind == "restore":
+        if action.get("device_id") is None:
+            engine.restore_all()
+        elif engine.set_device_status(action["device_id"], DeviceStatus.ONLINE):
+            engine.safety_active = engine.has_offline_devices()
+        else:
+            raise ValueError(f"Unknown device: {action['device_id']}")
+    elif kind == "add_device":
+        device = Device(**action["device"])
+        if device.id in engine.devices:
+            raise ValueError(f"Duplicate device id: {device.id}")
+        connect_to = action.get("connect_to")
+        if connect_to and connect_to not in engine.devices:
+            raise ValueError(f"connect_to references unknown device: {connect_to}")
+        validation = ValidationEngine.validate_connection(
+            engine.graph, device.id, connect_to, device.type, index=engine.connectivity
+        )
+        if not validation["is_valid"]:
+            raise ValueError(validation["errors"][0])
+        engine.add_device(device, connect_to=connect_to)
+    elif kind == "remove_device":
+        if action["device_id"] not in engine.devices:
+            raise ValueError(f"Unknown device: {action['device_id']}")
+        engine.remove_device(action["device_id"])
+    else:
+        raise ValueError(f"Unknown action: {kind} (expected one of {', '.join(ACTIONS)})")
+
+
+class ScenarioRunner:
+    """Runs one scenario on its own engine built from `plant` (a to_state() dict)."""
+
+    def __init__(self, scenario: Dict, plant: Optional[Dict] = None):
+        self.scenario = scenario
+        self.plant = scenario.get("plant", plant)
+        if self.plant is None:
+            raise ValueError("Scenario has no plant")
+
+    def run(self) -> Dict:
+        scenario = self.scenario
+        start = time.perf_counter()
+        engine = NetworkEngine.from_state(self.plant, seed=scenario.get("seed", 0))
+        actions = sorted(scenario.get("actions", []), key=lambda a: float(a["t"]))
+        duration = float(scenario.get("duration_s", max([float(a["t"]) for a in actions] or [0.0])))
+        interval = float(scenario.get("sample_interval_s", 1.0))
+
+        timeline, errors = [], []
+        next_action = 0
+        ticks = int(duration // interval) if interval > 0 else 0
+        sample_times = [round(k * interval, 9) for k in range(ticks + 1)]
+        action_times = sorted({float(a["t"]) for a in actions if float(a["t"]) <= duration})
+        for t in sorted(set(sample_times) | set(action_times)):
+            # Every action due at t is applied before the state at t is sampled
+            applied = []
+            while next_action < len(actions) and float(actions[next_action]["t"]) <= t:
+                action = actions[next_action]
+                next_action += 1
+                try:
+                    _apply(engine, action)
+                    applied.append(action)
+                except (KeyError, ValueError, TypeError) as e:
+                    message = f"Missing field: {e.args[0]}" if isinstance(e, KeyError) else str(e)
+                    errors.append({"t": float(action["t"]), "action": action.get("action"), "error": message})
+            timeline.append({
+                "t": t,
+                "actions": [a["action"] for a in applied],
+                "safety_active": engine.safety_active,
+                "performance": engine.calculate_performance(),
+            })
+
+        failures = self._check(scenario.get("expect", []), timeline)
+        return {
+            "name": scenario.get("name", "scenario"),
+            "passed": not failures and not errors,
+            "failures": failures,
+            "errors": errors,
+            "samples": len(timeline),
+            "elapsed_s": round(time.perf_counter() - start, 6),
+            "timeline": timeline,
+        }
+
+    @staticmethod
+    def _check(expectations: List[Dict], timeline: List[Dict]) -> List[Dict]:
+        """Each expectation is checked against the last sample at or before its t."""
+        failures = []
+        for expect in expectations:
+            t = float(expect["t"])
+            sample = None
+            for entry in timeline:
+                if entry["t"] > t:
+                    break
+                sample = entry
+            perf = next((p for p in sample["performance"] if p["id"] == expect["id"]), None) if sample else None
+            if perf is None:
+                failures.append({**expect, "error": "no sample for device"})
+                continue
+            if "status" in expect and perf["status"] != expect["status"]:
+                failures.append({**expect, "actual": DeviceStatus(perf["status"]).value})
+            elif "max_latency_ms" in expect:
+                if perf["latency_ms"] < 0:
+                    # Offline or unreachable devices report -1: no frame arrives at all
+                    failures.append({**expect, "actual": perf["latency_ms"], "error": "device unreachable"})
+                elif perf["latency_ms"] > expect["max_latency_ms"]:
+                    failures.append({**expect, "actual": perf["latency_ms"]})
+        return failures
+
+
+def _run_one(scenario: Dict) -> Dict:
+    return ScenarioRunner(scenario, _worker_plant).run()
+
+
+def run_batch(scenarios: List[Dict], plant: Optional[Dict] = None, workers: Optional[int] = None) -> List[Dict]:
+    """Runs every scenario (in input order) on a process pool; one worker = inline."""
+    workers = workers or os.cpu_count() or 1
+    if workers <= 1 or len(scenarios) <= 1:
+        _init_worker(plant)
+        return [_run_one(s) for s in scenarios]
+    chunksize = max(1, len(scenarios) // (workers * 4))
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(plant,)) as pool:
+        return list(pool.map(_run_one, scenarios, chunksize=chunksize))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run scripted plant scenarios headless.")
+    parser.add_argument("plant", help="JSON file with a NetworkEngine.to_state() dump")
+    parser.add_argument("scenarios", nargs="+", help="scenario JSON files (a file may hold a list)")
+    parser.add_argument("--workers", type=int, default=None, help="process pool size (default: all cores)")
+    parser.add_argument("--json", action="store_true", help="print the full results, timelines included")
+    args = parser.parse_args(argv)
+
+    with open(args.plant) as f:
+        plant = json.load(f)
+    scenarios = []
+    for path in args.scenarios:
+        with open(path) as f:
+            loaded = json.load(f)
+        scenarios.extend(loaded if isinstance(loaded, list) else [loaded])
+
+    results = run_batch(scenarios, plant, workers=args.workers)
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        print(f"{'result':<6} {'samples':>7} {'errors':>6} {'elapsed':>9}  name")
+        for r in results:
+            print(f"{'PASS' if r['passed'] else 'FAIL':<6} {r['samples']:>7} {len(r['errors']):>6} "
+                  f"{r['elapsed_s']:>8.3f}s  {r['name']}")
+            for failure in r["failures"]:
+                print(f"       expected {failure}")
+    return 0 if all(r["passed"] for r in results) else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
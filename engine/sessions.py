@@ -0,0 +1,299 @@
+"""
+Named plant sessions sharing one server process.
+
+A Session bundles one NetworkEngine with the per-plant state the app builds around
+it: delta stream, compute worker, broadcast scheduler, history, topology view and
+tick metrics. SessionManager creates sessions on explicit request (create(); the
+default session always exists), reloads them from their snapshot on demand and
+evicts them back to it once idle (no connected clients and no request for
+`idle_timeout_s`), so memory follows the plants actually in use.
+
+All sessions are driven by one scheduler loop instead of one 1 s loop each:
+run_due() starts the tick of every session whose period or debounce window has
+elapsed, at most `max_concurrent` at a time; the rest wait for a free slot.
+"""
+import logging
+import os
+import re
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from engine.broadcast_scheduler import BroadcastScheduler
+from engine.compute_worker import ComputeWorker
+from engine.delta_stream import DeltaStream
+from engine.history import HistoryStore, DEFAULT_TIERS
+from engine.metrics import TickMetrics
+from engine.network_engine import NetworkEngine
+from engine.snapshot import save_snapshot, load_snapshot
+from engine.topology_view import TopologyView
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SESSION = "default"
+SNAPSHOT_SUFFIX = ".nsnap"
+# Doubles as the snapshot file name, so nothing that could leave the session directory
+SESSION_NAME = re.compile(r"^[A-Za-z0-9_-]{1,64}$")
+
+
+class SessionNameError(ValueError):
+    pass
+
+
+class SessionLimitError(RuntimeError):
+    pass
+
+
+class SessionNotFoundError(LookupError):
+    pass
+
+
+class SessionExistsError(ValueError):
+    pass
+
+
+def check_name(name: str) -> str:
+    if not isinstance(name, str) or not SESSION_NAME.match(name):
+        raise SessionNameError(f"Invalid session name {name!r} (1-64 characters: letters, digits, '_' or '-')")
+    return name
+
+
+class Session:
+    """One named plant and everything the app keeps per plant."""
+
+    def __init__(self, name: str, engine: NetworkEngine, snapshot_path: str, execute: Optional[Callable] = None,
+                 wakeup: Optional[threading.Event] = None, broadcast_options: Optional[Dict] = None,
+                 history_tiers=DEFAULT_TIERS, view_auto_expand: int = 300, tick_interval_s: float = 1.0,
+                 profile_ticks: bool = False, saved_version: Optional[Tuple[int, int]] = None,
+                 clock: Callable[[], float] = time.monotonic):
+        self.name = name
+        self.engine = engine
+        self.snapshot_path = snapshot_path
+        self.update_stream = DeltaStream()
+        self.compute = ComputeWorker(engine, execute=execute, wakeup=wakeup)
+        self.broadcasts = BroadcastScheduler(clock=clock, **(broadcast_options or {}))
+        self.history = HistoryStore(history_tiers)
+        self.topology_view = TopologyView(engine, auto_expand_max=view_auto_expand)
+        self.tick_metrics = TickMetrics(engine.timer, budget_s=tick_interval_s, profile_slowest=profile_ticks)
+        # engine.state_version on disk (None: never saved)
+        self.saved_version = saved_version
+        self.last_active = clock()
+        self.next_tick = self.last_active
+        self.running = False
+
+    @property
+    def room(self) -> str:
+        """Socket.IO room of the session's clients."""
+        return f"session:{self.name}"
+
+    def due(self, now: float) -> bool:
+        """Periodic tick elapsed, or the debounce window of a mutation burst has closed."""
+        pending = self.broadcasts.due_in()
+        return now >= self.next_tick or (pending is not None and pending <= 0)
+
+    def next_tick_in(self, now: float) -> float:
+        """Seconds until the session is due (periodic tick or end of the debounce window)."""
+        pending = self.broadcasts.due_in()
+        return self.next_tick - now if pending is None else min(self.next_tick - now, pending)
+
+    def save_if_changed(self) -> bool:
+        """Writes a snapshot when the engine changed since the last save."""
+        if self.engine.state_version == self.saved_version:
+            return False
+        with self.engine.timer.phase("snapshot"):
+            os.makedirs(os.path.dirname(self.snapshot_path) or ".", exist_ok=True)
+            save_snapshot(self.engine, self.snapshot_path)
+        self.saved_version = self.engine.state_version
+        return True
+
+
+class SessionManager:
+    """
+    Named sessions, loaded on demand and evicted to snapshots when idle.
+
+    `new_engine` builds the plant of a session that has no snapshot yet; `paths`
+    pins the snapshot file of particular sessions (e.g. the default one), the others
+    live in `snapshot_dir`. The default session and the pinned ones always exist;
+    any other must be create()d first, up to `max_stored` sessions (in memory or
+    on disk). `spawn(fn, *args)` starts a tick (e.g. eventlet.spawn_n);
+    by default ticks run inline.
+    """
+
+    def __init__(self, snapshot_dir: str, new_engine: Optional[Callable[[], NetworkEngine]] = None,
+                 paths: Optional[Dict[str, str]] = None, idle_timeout_s: float = 600.0,
+                 max_concurrent: int = 4, max_sessions: int = 500, max_stored: int = 1000,
+                 tick_interval_s: float = 1.0,
+                 spawn: Optional[Callable] = None, execute: Optional[Callable] = None,
+                 session_options: Optional[Dict] = None, clock: Callable[[], float] = time.monotonic):
+        self.snapshot_dir = snapshot_dir
+        self.new_engine = new_engine or NetworkEngine
+        self.paths = dict(paths or {})
+        self.idle_timeout_s = idle_timeout_s
+        self.max_concurrent = max(1, max_concurrent)
+        self.max_sessions = max_sessions
+        self.max_stored = max_stored
+        self.tick_interval_s = tick_interval_s
+        self.spawn = spawn or (lambda fn, *args: fn(*args))
+        self.execute = execute
+        self.session_options = dict(session_options or {})
+        self.clock = clock
+        self.sessions: Dict[str, Session] = {}
+        # Shared by every session's ComputeWorker: any mutation wakes the one loop
+        self.wakeup = threading.Event()
+        self.in_flight = 0
+        self.loads = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+
+    def snapshot_path(self, name: str) -> str:
+        return self.paths.get(name) or os.path.join(self.snapshot_dir, name + SNAPSHOT_SUFFIX)
+
+    def get(self, name: str) -> Session:
+        """The session called `name`: in memory or reloaded from its snapshot."""
+        session = self.sessions.get(check_name(name))
+        if session is None:
+            with self._lock:
+                session = self.sessions.get(name)
+                if session is None:
+                    if not self._pinned(name) and not os.path.exists(self.snapshot_path(name)):
+                        raise SessionNotFoundError(f"Unknown session {name!r}")
+                    session = self._open(name)
+        session.last_active = self.clock()
+        return session
+
+    def create(self, name: str) -> Session:
+        """Opens a new, empty session called `name` (new_engine() plant)."""
+        check_name(name)
+        with self._lock:
+            if self._pinned(name) or name in self.sessions or os.path.exists(self.snapshot_path(name)):
+                raise SessionExistsError(f"Session {name!r} already exists")
+            if len(self.names()) >= self.max_stored:
+                raise SessionLimitError(f"All {self.max_stored} stored sessions are in use")
+            return self._open(name)
+
+    def _pinned(self, name: str) -> bool:
+        return name == DEFAULT_SESSION or name in self.paths
+
+    def _open(self, name: str) -> Session:
+        if len(self.sessions) >= self.max_sessions and not self._evict_least_recent():
+            raise SessionLimitError(f"All {self.max_sessions} sessions are in use")
+        path = self.snapshot_path(name)
+        if os.path.exists(path):
+            # Off the hub when `execute` is a thread pool: a large plant takes a while to map
+            engine = self.execute(load_snapshot, path) if self.execute else load_snapshot(path)
+            saved_version = engine.state_version
+            self.loads += 1
+        else:
+            engine = self.new_engine()
+            saved_version = None
+        session = Session(name, engine, path, execute=self.execute, wakeup=self.wakeup,
+                          tick_interval_s=self.tick_interval_s, saved_version=saved_version, clock=self.clock,
+                          **self.session_options)
+        self.sessions[name] = session
+        return session
+
+    def active(self) -> List[Session]:
+        return list(self.sessions.values())
+
+    def names(self) -> List[str]:
+        """Sessions in memory plus the ones evicted to `snapshot_dir`."""
+        stored = set(self.sessions) | {name for name, path in self.paths.items() if os.path.exists(path)}
+        if os.path.isdir(self.snapshot_dir):
+            stored.update(entry[:-len(SNAPSHOT_SUFFIX)] for entry in os.listdir(self.snapshot_dir)
+                          if entry.endswith(SNAPSHOT_SUFFIX) and SESSION_NAME.match(entry[:-len(SNAPSHOT_SUFFIX)]))
+        return sorted(stored)
+
+    # --- Scheduling ---
+
+    def run_due(self, tick: Callable[[Session], None]) -> int:
+        """Starts `tick` for due sessions, longest-waiting first, within the concurrency bound."""
+        now = self.clock()
+        started = 0
+        for session in sorted(self.active(), key=lambda s: s.next_tick):
+            if self.in_flight >= self.max_concurrent:
+                break
+            if session.running or not session.due(now):
+                continue
+            session.running = True
+            self.in_flight += 1
+            started += 1
+            self.spawn(self._run, tick, session)
+        return started
+
+    def _run(self, tick: Callable[[Session], None], session: Session):
+        try:
+            session.broadcasts.flushed()
+            tick(session)
+        except Exception:
+            # One broken session must not stop the loop that ticks all the others
+            logger.exception("Tick of session %s failed", session.name)
+        finally:
+            session.next_tick = self.clock() + self.tick_interval_s
+            session.running = False
+            self.in_flight -= 1
+            self.wakeup.set()
+
+    def next_event_in(self) -> float:
+        """Seconds until some session needs the loop: a tick, a debounce or a held delta."""
+        now = self.clock()
+        # With every slot busy, due sessions wait for a finishing tick (it sets `wakeup`)
+        free = self.in_flight < self.max_concurrent
+        waits = [self.tick_interval_s]
+        for session in self.active():
+            release = session.broadcasts.next_release_in()
+            if release is not None:
+                waits.append(release)
+            if free and not session.running:
+                waits.append(session.next_tick_in(now))
+        return max(0.0, min(waits))
+
+    def wait(self, timeout: float) -> bool:
+        """Sleeps until a mutation, a finished tick or `timeout`; True if woken early."""
+        woken = self.wakeup.wait(timeout)
+        self.wakeup.clear()
+        return woken
+
+    # --- Eviction ---
+
+    def _evictable(self, session: Session, now: float) -> bool:
+        return (not session.running and not session.broadcasts.clients
+                and now - session.last_active >= self.idle_timeout_s)
+
+    def evict(self, names: Iterable[str]) -> List[str]:
+        """Saves and drops the given sessions from memory; they reload from disk on next use."""
+        evicted = []
+        for name in names:
+            session = self.sessions.get(name)
+            if session is None or session.running:
+                continue
+            try:
+                session.save_if_changed()
+            except Exception:
+                # Keep it in memory (nothing is lost) and retry after another idle period
+                logger.exception("Saving session %s failed, not evicting it", name)
+                session.last_active = self.clock()
+                continue
+            del self.sessions[name]
+            self.evictions += 1
+            evicted.append(name)
+        return evicted
+
+    def evict_idle(self) -> List[str]:
+        """Evicts every session without clients that has not been used for `idle_timeout_s`."""
+        now = self.clock()
+        with self._lock:
+            return self.evict([name for name, s in self.sessions.items() if self._evictable(s, now)])
+
+    def _evict_least_recent(self) -> bool:
+        # Called with the lock held, when opening one more session would exceed max_sessions
+        idle = [s for s in self.sessions.values() if not s.running and not s.broadcasts.clients]
+        if not idle:
+            return False
+        return bool(self.evict([min(idle, key=lambda s: s.last_active).name]))
+
+    def save_all(self):
+        for session in self.active():
+            try:
+                session.save_if_changed()
+            except Exception:
+                logger.exception("Saving session %s failed", session.name)
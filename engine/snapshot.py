@@ -0,0 +1,219 @@
+"""
+Compact binary snapshots of a NetworkEngine.
+
+Layout (little-endian):
+    8 bytes   magic b"NETSNAP\\0"
+    uint32    format version
+    uint32    metadata length
+    metadata  UTF-8 JSON (controller, rings, array directory), padded to 8 bytes
+    arrays    raw column data, each 8-byte aligned, located via the directory
+
+Loading maps the file with mmap and views every column in place with
+np.frombuffer, then bulk-builds the engine with NetworkEngine.from_columns.
+With compact_devices=True a 100k-node plant reloads in about half a second.
+Files without the magic are treated as legacy JSON to_state() dumps (version 0).
+Version 2 added the owning controller per device; version 1 files load with none.
+Version 3 added per-device processing delay and link speed, length and
+utilization; older files load with the defaults.
+"""
+import gc
+import json
+import mmap
+import os
+import struct
+import numpy as np
+from typing import Dict, List, Optional
+
+from engine.models import (
+    PROTOCOL_CODES, DEVICE_TYPE_CODES, DEVICE_STATUS_CODES,
+)
+from engine.network_engine import NetworkEngine
+from engine.link_model import DEFAULT_SPEED_MBPS
+
+MAGIC = b"NETSNAP\0"
+FORMAT_VERSION = 3
+_HEADER = struct.Struct("<8sII")
+_SEPARATOR = "\x00"
+
+
+def _pack_strings(values: List[Optional[str]]):
+    """NUL-joined UTF-8 blob plus a presence mask (None vs empty string)."""
+    present = np.array([v is not None for v in values], dtype=bool)
+    blob = _SEPARATOR.join(v or "" for v in values).encode("utf-8")
+    return np.frombuffer(blob, dtype=np.uint8), present
+
+
+def _unpack_strings(blob: np.ndarray, present: Optional[np.ndarray], count: int) -> List[Optional[str]]:
+    if count == 0:
+        return []
+    values = blob.tobytes().decode("utf-8").split(_SEPARATOR)
+    if present is None:
+        return values
+    return [v if p else None for v, p in zip(values, present.tolist())]
+
+
+def _columns(engine: NetworkEngine) -> Dict[str, np.ndarray]:
+    table = engine.device_table
+    if table is not None:
+        rows = table.rows()
+        ids = [table.ids[i] for i in rows.tolist()]
+        ips = [table.ips[i] for i in rows.tolist()]
+        names = [table.display_names[i] for i in rows.tolist()]
+        owners = [table.controllers[i] for i in rows.tolist()]
+        types, protocols = table.types[rows], table.protocols[rows]
+        statuses, cycle_times = table.statuses[rows], table.cycle_times[rows]
+        processing_delays = table.processing_delays[rows]
+    else:
+        devices = [engine.devices[dev_id] for dev_id in engine.devices]
+        ids = [d.id for d in devices]
+        ips = [d.ip for d in devices]
+        names = [d.display_name for d in devices]
+        owners = [d.controller for d in devices]
+        types = np.array([DEVICE_TYPE_CODES[d.type] for d in devices], dtype=np.int8)
+        protocols = np.array([PROTOCOL_CODES[d.protocol] for d in devices], dtype=np.int8)
+        statuses = np.array([DEVICE_STATUS_CODES[d.status] for d in devices], dtype=np.int8)
+        cycle_times = np.array([d.cycle_time_ms for d in devices], dtype=np.float64)
+        processing_delays = np.array([np.nan if d.processing_delay_us is None else d.processing_delay_us
+                                      for d in devices], dtype=np.float64)
+
+    row_of = {dev_id: i for i, dev_id in enumerate(ids)}
+    edges = list(engine.graph.edges(data=True))
+    ids_blob, _ = _pack_strings(ids)
+    ips_blob, ips_present = _pack_strings(ips)
+    names_blob, names_present = _pack_strings(names)
+    owners_blob, owners_present = _pack_strings(owners)
+    return {
+        "ids": ids_blob,
+        "ips": ips_blob,
+        "ips_present": ips_present,
+        "display_names": names_blob,
+        "display_names_present": names_present,
+        "controllers": owners_blob,
+        "controllers_present": owners_present,
+        "types": np.asarray(types, dtype=np.int8),
+        "protocols": np.asarray(protocols, dtype=np.int8),
+        "statuses": np.asarray(statuses, dtype=np.int8),
+        "cycle_times": np.asarray(cycle_times, dtype=np.float64),
+        "processing_delays": np.asarray(processing_delays, dtype=np.float64),
+        "link_sources": np.array([row_of[u] for u, _, _ in edges], dtype=np.int32),
+        "link_targets": np.array([row_of[v] for _, v, _ in edges], dtype=np.int32),
+        "link_weights": np.array([d.get("weight", 0.1) for _, _, d in edges], dtype=np.float64),
+        "link_active": np.array([d.get("active", True) for _, _, d in edges], dtype=bool),
+        "link_speeds": np.array([d.get("speed_mbps", DEFAULT_SPEED_MBPS) for _, _, d in edges], dtype=np.float64),
+        "link_lengths": np.array([d.get("length_m", 0.0) for _, _, d in edges], dtype=np.float64),
+        "link_utilization": np.array([d.get("utilization", 0.0) for _, _, d in edges], dtype=np.float64),
+    }
+
+
+def save_snapshot(engine: NetworkEngine, path: str):
+    """Writes `engine` to `path` atomically (temp file + rename)."""
+    arrays = _columns(engine)
+    directory = {}
+    offset = 0
+    for name, array in arrays.items():
+        directory[name] = [offset, array.dtype.str, int(array.size)]
+        offset += (array.nbytes + 7) // 8 * 8
+
+    meta = json.dumps({
+        "device_count": int(arrays["types"].size),
+        "link_count": int(arrays["link_sources"].size),
+        "controller_id": engine.controller_id,
+        "safety_active": engine.safety_active,
+        "rings": {name: {"members": ring["members"], "protocol": ring["protocol"]}
+                  for name, ring in engine.connectivity.rings.items()},
+        "arrays": directory,
+    }).encode("utf-8")
+    meta += b" " * (-(_HEADER.size + len(meta)) % 8)
+
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(_HEADER.pack(MAGIC, FORMAT_VERSION, len(meta)))
+        f.write(meta)
+        for array in arrays.values():
+            data = array.tobytes()
+            f.write(data)
+            f.write(b"\0" * (-len(data) % 8))
+    os.replace(tmp_path, path)
+
+
+def _read_arrays(buffer, meta_offset: int, meta_len: int):
+    meta = json.loads(bytes(buffer[meta_offset:meta_offset + meta_len]))
+    base = meta_offset + meta_len
+    arrays = {
+        name: np.frombuffer(buffer, dtype=np.dtype(dtype), count=count, offset=base + offset)
+        for name, (offset, dtype, count) in meta["arrays"].items()
+    }
+    return meta, arrays
+
+
+def _v1_columns(meta: Dict, arrays: Dict[str, np.ndarray]) -> Dict:
+    n = meta["device_count"]
+    return {
+        "ids": _unpack_strings(arrays["ids"], None, n),
+        "ips": _unpack_strings(arrays["ips"], arrays["ips_present"], n),
+        "display_names": _unpack_strings(arrays["display_names"], arrays["display_names_present"], n),
+        "types": arrays["types"],
+        "protocols": arrays["protocols"],
+        "statuses": arrays["statuses"],
+        "cycle_times": arrays["cycle_times"],
+        "link_sources": arrays["link_sources"],
+        "link_targets": arrays["link_targets"],
+        "link_weights": arrays["link_weights"],
+        "link_active": arrays["link_active"],
+        "controller_id": meta["controller_id"],
+        "safety_active": meta["safety_active"],
+        "rings": meta["rings"],
+    }
+
+
+def _load_v1(buffer, meta_offset: int, meta_len: int, **kwargs) -> NetworkEngine:
+    meta, arrays = _read_arrays(buffer, meta_offset, meta_len)
+    return NetworkEngine.from_columns(_v1_columns(meta, arrays), **kwargs)
+
+
+def _v2_columns(meta: Dict, arrays: Dict[str, np.ndarray]) -> Dict:
+    columns = _v1_columns(meta, arrays)
+    columns["controllers"] = _unpack_strings(arrays["controllers"], arrays["controllers_present"],
+                                             meta["device_count"])
+    return columns
+
+
+def _load_v2(buffer, meta_offset: int, meta_len: int, **kwargs) -> NetworkEngine:
+    meta, arrays = _read_arrays(buffer, meta_offset, meta_len)
+    return NetworkEngine.from_columns(_v2_columns(meta, arrays), **kwargs)
+
+
+def _load_v3(buffer, meta_offset: int, meta_len: int, **kwargs) -> NetworkEngine:
+    meta, arrays = _read_arrays(buffer, meta_offset, meta_len)
+    columns = _v2_columns(meta, arrays)
+    for name in ("processing_delays", "link_speeds", "link_lengths", "link_utilization"):
+        columns[name] = arrays[name]
+    return NetworkEngine.from_columns(columns, **kwargs)
+
+
+# One reader per format version ever written; never remove old entries
+_LOADERS = {1: _load_v1, 2: _load_v2, 3: _load_v3}
+
+
+def load_snapshot(path: str, **kwargs) -> NetworkEngine:
+    """Loads a snapshot written by any known format version. Extra kwargs go to NetworkEngine."""
+    with open(path, "rb") as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            # Version 0: plain JSON to_state() dump
+            f.seek(0)
+            return NetworkEngine.from_state(json.load(f), **kwargs)
+        f.seek(0)
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            _, version, meta_len = _HEADER.unpack_from(mm, 0)
+            loader = _LOADERS.get(version)
+            if loader is None:
+                raise ValueError(f"Unsupported snapshot version {version} (newest known: {FORMAT_VERSION})")
+            # Hundreds of thousands of small dicts get allocated and none of them are
+            # garbage; cyclic GC passes during the build would only cost time
+            gc_was_enabled = gc.isenabled()
+            gc.disable()
+            try:
+                return loader(mm, _HEADER.size, meta_len, **kwargs)
+            finally:
+                if gc_was_enabled:
+                    gc.enable()
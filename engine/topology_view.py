@@ -0,0 +1,277 @@
+import math
+from collections import deque
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from engine.models import DeviceType, DeviceStatus
+from engine.history import STATUS_SEVERITY
+
+# Devices that head a group: every other device joins its nearest head
+GROUP_ROOT_TYPES = (DeviceType.PLC, DeviceType.SWITCH)
+# Layout units (client pixels at zoom 1)
+MEMBER_SPACING = 36.0
+LAYER_GAP = 120.0
+GOLDEN_ANGLE = math.pi * (3 - math.sqrt(5))
+
+
+def group_id(root: str) -> str:
+    return f"grp:{root}"
+
+
+class _Layout:
+    """Grouping and coordinates for one structure version."""
+
+    def __init__(self, structure_version: int):
+        self.structure_version = structure_version
+        self.group_of: Dict[str, str] = {}
+        self.root_of: Dict[str, str] = {}
+        self.members: Dict[str, List[str]] = {}
+        self.position: Dict[str, Tuple[float, float]] = {}
+        self.center: Dict[str, Tuple[float, float]] = {}
+        self.radius: Dict[str, float] = {}
+        # (group a, group b) with a < b -> physical links between them
+        self.group_links: Dict[Tuple[str, str], List[Tuple[str, str]]] = {}
+
+
+class TopologyView:
+    """
+    Level-of-detail view of the plant for the browser.
+
+    Every switch and PLC heads a group; every other device joins the group of its
+    nearest head (multi-source BFS over the cabling, so a drive daisy chain stays
+    with the switch it hangs off). Groups are laid out as a radial tree around the
+    primary PLC and members as a sunflower around their head, so the client just
+    draws the groups it has open at the coordinates it is given, with no force
+    simulation. The layout only changes with the structure (cached by
+    engine.structure_version); statuses come from the per-version topology cache.
+    """
+
+    def __init__(self, engine, auto_expand_max: int = 300):
+        self.engine = engine
+        # Plants up to this many devices open every group on "expand=auto"
+        self.auto_expand_max = auto_expand_max
+        self._layout: Optional[_Layout] = None
+        self._nodes = None  # (version, {id: topology node})
+        self._status_counts = None  # (version, {group: {status: count}})
+
+    def layout(self) -> _Layout:
+        engine = self.engine
+        if self._layout is None or self._layout.structure_version != engine.structure_version:
+            self._layout = self._build_layout()
+        return self._layout
+
+    def _node_map(self) -> Dict[str, Dict]:
+        engine = self.engine
+        if self._nodes is None or self._nodes[0] != engine.version:
+            self._nodes = (engine.version, {n["id"]: n for n in engine.get_topology()["nodes"]})
+        return self._nodes[1]
+
+    # --- Layout ---
+
+    def _build_layout(self) -> _Layout:
+        engine = self.engine
+        graph = engine.graph
+        layout = _Layout(engine.structure_version)
+        nodes = self._node_map()
+
+        # Nearest head by hop count; unreachable leftovers head their own component
+        roots = [n for n, d in nodes.items() if d["type"] in GROUP_ROOT_TYPES]
+        for start in [roots] + [[n] for n in nodes]:
+            start = [n for n in start if n not in layout.root_of]
+            if not start:
+                continue
+            queue = deque(start)
+            for root in start:
+                layout.root_of[root] = root
+            while queue:
+                node = queue.popleft()
+                root = layout.root_of[node]
+                for neighbor in graph.neighbors(node):
+                    if neighbor not in layout.root_of:
+                        layout.root_of[neighbor] = root
+                        queue.append(neighbor)
+
+        for node in nodes:
+            gid = group_id(layout.root_of[node])
+            layout.group_of[node] = gid
+            layout.members.setdefault(gid, []).append(node)
+        for u, v in graph.edges():
+            gu, gv = layout.group_of[u], layout.group_of[v]
+            if gu != gv:
+                layout.group_links.setdefault((gu, gv) if gu < gv else (gv, gu), []).append((u, v))
+
+        for gid, members in layout.members.items():
+            layout.radius[gid] = MEMBER_SPACING * (math.sqrt(len(members)) + 0.5)
+        self._place_groups(layout)
+        for gid, members in layout.members.items():
+            self._place_members(layout, gid, members)
+        return layout
+
+    def _place_groups(self, layout: _Layout):
+        """Radial tree: BFS over the group graph from the primary PLC's group."""
+        adjacency: Dict[str, List[str]] = {gid: [] for gid in layout.members}
+        for a, b in layout.group_links:
+            adjacency[a].append(b)
+            adjacency[b].append(a)
+
+        primary = self.engine.controller_id
+        order = list(layout.members)
+        if primary is not None and primary in layout.group_of:
+            first = layout.group_of[primary]
+            order.remove(first)
+            order.insert(0, first)
+
+        # Components hang off a virtual root at the origin; a single one sits at the centre
+        parent: Dict[str, Optional[str]] = {}
+        children: Dict[Optional[str], List[str]] = {None: []}
+        depth: Dict[str, int] = {}
+        for start in order:
+            if start in parent:
+                continue
+            parent[start] = None
+            children[None].append(start)
+            depth[start] = 0
+            queue = deque([start])
+            while queue:
+                gid = queue.popleft()
+                children.setdefault(gid, [])
+                for other in adjacency[gid]:
+                    if other not in parent:
+                        parent[other] = gid
+                        depth[other] = depth[gid] + 1
+                        children[gid].append(other)
+                        queue.append(other)
+        offset = 0 if len(children[None]) == 1 else 1
+
+        # Angular width of each subtree, proportional to the space its groups need
+        width: Dict[str, float] = {}
+        for gid in sorted(depth, key=depth.get, reverse=True):
+            width[gid] = max(2 * layout.radius[gid], sum(width[c] for c in children[gid]))
+
+        # Ring radius per depth: clear of the previous ring and long enough for its groups
+        by_depth: Dict[int, List[str]] = {}
+        for gid, d in depth.items():
+            by_depth.setdefault(d + offset, []).append(gid)
+        rings = {0: 0.0}
+        previous_max = max((layout.radius[g] for g in by_depth.get(0, [])), default=0.0)
+        for d in range(1, max(by_depth, default=0) + 1):
+            groups = by_depth.get(d, [])
+            largest = max((layout.radius[g] for g in groups), default=0.0)
+            needed = sum(2 * layout.radius[g] for g in groups) / (2 * math.pi)
+            rings[d] = max(rings[d - 1] + previous_max + largest + LAYER_GAP, needed)
+            previous_max = largest
+
+        # Each subtree gets an arc proportional to its width (iterative: switch chains run deep)
+        if offset == 0:
+            root = children[None][0]
+            layout.center[root] = (0.0, 0.0)
+            stack = [(children[root], 0.0, 2 * math.pi)]
+        else:
+            stack = [(children[None], 0.0, 2 * math.pi)]
+        while stack:
+            gids, angle, span = stack.pop()
+            total = sum(width[g] for g in gids) or 1.0
+            for gid in gids:
+                share = span * width[gid] / total
+                r = rings[depth[gid] + offset]
+                mid = angle + share / 2
+                layout.center[gid] = (r * math.cos(mid), r * math.sin(mid))
+                if children[gid]:
+                    stack.append((children[gid], angle, share))
+                angle += share
+
+    def _place_members(self, layout: _Layout, gid: str, members: List[str]):
+        cx, cy = layout.center[gid]
+        root = gid[len("grp:"):]
+        layout.position[root] = (round(cx, 1), round(cy, 1))
+        k = 0
+        for node in members:
+            if node == root:
+                continue
+            k += 1
+            r = MEMBER_SPACING * math.sqrt(k)
+            theta = k * GOLDEN_ANGLE
+            layout.position[node] = (round(cx + r * math.cos(theta), 1), round(cy + r * math.sin(theta), 1))
+
+    # --- Views ---
+
+    def _group_statuses(self, layout: _Layout) -> Dict[str, Dict[str, int]]:
+        version = self.engine.version
+        if self._status_counts is None or self._status_counts[0] != (version, layout.structure_version):
+            counts: Dict[str, Dict[str, int]] = {gid: {} for gid in layout.members}
+            for node_id, node in self._node_map().items():
+                status = DeviceStatus(node["status"]).value
+                group = counts[layout.group_of[node_id]]
+                group[status] = group.get(status, 0) + 1
+            self._status_counts = ((version, layout.structure_version), counts)
+        return self._status_counts[1]
+
+    def summary(self, expand: Iterable[str] = ()) -> Dict:
+        """Groups with their coordinates and status counts, links aggregated per group pair, plus `expand`ed groups."""
+        layout = self.layout()
+        nodes = self._node_map()
+        statuses = self._group_statuses(layout)
+        expand = list(expand)
+        if expand == ["auto"]:
+            expand = list(layout.members) if len(nodes) <= self.auto_expand_max else []
+
+        groups = []
+        for gid, members in layout.members.items():
+            root = gid[len("grp:"):]
+            counts = statuses[gid]
+            worst = max((DeviceStatus(s) for s in counts), key=STATUS_SEVERITY.get, default=DeviceStatus.ONLINE)
+            x, y = layout.center[gid]
+            groups.append({
+                "id": gid,
+                "root": root,
+                "root_type": nodes[root]["type"],
+                "label": nodes[root]["display_name"],
+                "size": len(members),
+                "x": round(x, 1),
+                "y": round(y, 1),
+                "radius": round(layout.radius[gid], 1),
+                "status": counts,
+                "worst": worst,
+            })
+
+        graph = self.engine.graph
+        links = []
+        for (a, b), edges in layout.group_links.items():
+            active = sum(1 for u, v in edges if graph[u][v].get('active', True))
+            links.append({"source": a, "target": b, "count": len(edges), "active": active})
+
+        return {
+            "structure_version": layout.structure_version,
+            "version": self.engine.version,
+            "total_devices": len(nodes),
+            "groups": groups,
+            "links": links,
+            "expanded": {gid: self.group(gid) for gid in expand if gid in layout.members},
+        }
+
+    def group(self, gid: str) -> Optional[Dict]:
+        """Members of one group with coordinates, its internal links and the links leaving it."""
+        layout = self.layout()
+        members = layout.members.get(gid)
+        if members is None:
+            return None
+        nodes = self._node_map()
+        graph = self.engine.graph
+        member_nodes = []
+        links = []
+        for node_id in members:
+            x, y = layout.position[node_id]
+            member_nodes.append({**nodes[node_id], "x": x, "y": y, "group": gid})
+            for neighbor, d in graph[node_id].items():
+                other = layout.group_of[neighbor]
+                # Internal links once (from the lower id), boundary links always
+                if other == gid and neighbor < node_id:
+                    continue
+                links.append({
+                    "source": node_id,
+                    "target": neighbor,
+                    "active": d.get('active', True),
+                    "weight": d.get('weight', 0.1),
+                    "source_group": gid,
+                    "target_group": other,
+                })
+        return {"id": gid, "nodes": member_nodes, "links": links}
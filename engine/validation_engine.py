@@ -1,29 +1,139 @@
-import networkx as nx
+from typing import Dict, Hashable, Iterable, Optional
+
+# Redundancy protocols whose ring may legitimately close one loop (ring manager blocks a port)
+RING_PROTOCOLS = ("MRP", "HSR")
+
+
+class _UnionFind:
+    """Disjoint sets with path halving + union by size."""
+
+    def __init__(self):
+        self.parent: Dict[Hashable, Hashable] = {}
+        self.size: Dict[Hashable, int] = {}
+
+    def find(self, x):
+        parent = self.parent
+        if x not in parent:
+            return x
+        while parent[x] != x:
+            parent[x] = parent[parent[x]]
+            x = parent[x]
+        return x
+
+    def connected(self, u, v) -> bool:
+        return u in self.parent and v in self.parent and self.find(u) == self.find(v)
+
+    def union(self, u, v):
+        for x in (u, v):
+            if x not in self.parent:
+                self.parent[x] = x
+                self.size[x] = 1
+        ru, rv = self.find(u), self.find(v)
+        if ru == rv:
+            return
+        if self.size[ru] < self.size[rv]:
+            ru, rv = rv, ru
+        self.parent[rv] = ru
+        self.size[ru] += self.size[rv]
+
+
+class ConnectivityIndex:
+    """
+    Incremental answer to "would cabling u-v close a loop?" in near-constant time.
+
+    Keeps a union-find over the physical cabling. Declared MRP/HSR ring segments get
+    their own union-find over ring-internal links: one closure inside a ring is
+    allowed (the ring manager blocks it), anything else that closes a loop is not.
+    Union-find cannot delete, so removals just mark the index stale and it is
+    rebuilt from the graph on the next query.
+    """
+
+    def __init__(self):
+        self._components = _UnionFind()
+        self.rings: Dict[str, Dict] = {}
+        self._ring_of: Dict[Hashable, str] = {}
+        self.stale = False
+
+    @classmethod
+    def from_graph(cls, graph, rings: Optional[Dict[str, Dict]] = None) -> "ConnectivityIndex":
+        index = cls()
+        for name, ring in (rings or {}).items():
+            index.declare_ring(name, ring["members"], ring["protocol"])
+        index._replay(graph)
+        return index
+
+    def _replay(self, graph):
+        self._components = _UnionFind()
+        for ring in self.rings.values():
+            ring["links"] = _UnionFind()
+            ring["closed"] = False
+        for u, v in graph.edges():
+            self.add_edge(u, v)
+        self.stale = False
+
+    def refresh(self, graph):
+        """Rebuilds from `graph` if a removal made the index stale."""
+        if self.stale:
+            self._replay(graph)
+
+    def declare_ring(self, name: str, members: Iterable[Hashable], protocol: str = "MRP"):
+        if protocol not in RING_PROTOCOLS:
+            raise ValueError(f"Unsupported ring protocol: {protocol}")
+        members = list(members)
+        self.rings[name] = {"members": members, "protocol": protocol, "links": _UnionFind(), "closed": False}
+        for node in members:
+            self._ring_of[node] = name
+        # Existing ring-internal links have to be replayed into the new ring
+        self.stale = True
+
+    def check_edge(self, u, v) -> str:
+        """'ok' (tree edge), 'ring' (allowed ring closure) or 'loop' (would close a forbidden loop)."""
+        if u is None or v is None or u == v:
+            return "ok"
+        if not self._components.connected(u, v):
+            return "ok"
+        ring_name = self._ring_of.get(u)
+        if ring_name is not None and ring_name == self._ring_of.get(v):
+            ring = self.rings[ring_name]
+            # The loop stays inside the ring only if u, v are already joined by ring links
+            if ring["links"].connected(u, v) and not ring["closed"]:
+                return "ring"
+        return "loop"
+
+    def add_edge(self, u, v):
+        ring_name = self._ring_of.get(u)
+        if ring_name is not None and ring_name == self._ring_of.get(v):
+            ring = self.rings[ring_name]
+            if ring["links"].connected(u, v):
+                ring["closed"] = True
+            ring["links"].union(u, v)
+        self._components.union(u, v)
+
 
 class ValidationEngine:
     @staticmethod
-    def validate_connection(graph, source_id, target_id, device_type):
+    def validate_connection(graph, source_id, target_id, device_type, index: Optional[ConnectivityIndex] = None):
         """
         Analyzes the graph to prevent topology errors.
         - Detects infinite loops (cycles) in non-ring protocols.
         - Validates industrial VLAN segments (simulated).
+
+        Pass the engine's ConnectivityIndex as `index` for O(α(N)) loop checks; without
+        it a throwaway index is built from `graph` (linear, no graph copy).
         """
         errors = []
         
         # 1. Loop Detection
-        # Industrial ethernet (except MRP/HSR rings) should typically be tree-like
+        # Industrial ethernet (except declared MRP/HSR rings) should typically be tree-like
         # If adding an edge creates a cycle, we need to flag it.
-        temp_graph = graph.copy()
-        temp_graph.add_edge(source_id, target_id)
-        
-        try:
-            cycles = nx.find_cycle(temp_graph, orientation='original')
-            if cycles:
-                # In this simulator, we only allow rings if explicitly configured (future expansion)
-                # For now, we flag it as a risk of broadcast storm.
-                errors.append("RIESGO: Bucle infinito detectado (Tormenta de broadcast). Use un Switch con STP/MRP.")
-        except nx.NetworkXNoCycle:
-            pass
+        if index is None:
+            index = ConnectivityIndex.from_graph(graph)
+        else:
+            index.refresh(graph)
+
+        if index.check_edge(source_id, target_id) == "loop":
+            # For now, we flag it as a risk of broadcast storm.
+            errors.append("RIESGO: Bucle infinito detectado (Tormenta de broadcast). Use un Switch con STP/MRP.")
             
         # 2. VLAN / Segment Validation
         # Rule: Servo Drives should not be connected directly to public IPs or different subnets
@@ -1,122 +1,334 @@
 /**
  * Industrial Network Visualizer — D3.js Logic
+ *
+ * The server groups devices by switch/PLC and precomputes every coordinate
+ * (/api/topology/view), so there is no force simulation here: the client only
+ * draws the groups that are open, and collapsed groups as a single node.
  */
 
+// Named plant (page opened as /?session=<name>); the socket and every API call use it
+const SESSION = new URLSearchParams(window.location.search).get('session');
+
+function apiUrl(path) {
+    if (!SESSION) return path;
+    return `${path}${path.includes('?') ? '&' : '?'}session=${encodeURIComponent(SESSION)}`;
+}
+
 const svg = d3.select("#canvas");
 const width = window.innerWidth - 320;
 const height = window.innerHeight - 180;
 
-const simulation = d3.forceSimulation()
-    .force("link", d3.forceLink().id(d => d.id).distance(150))
-    .force("charge", d3.forceManyBody().strength(-1000))
-    .force("center", d3.forceCenter(width / 2, height / 2));
-
 const container = svg.append("g");
-
-// Persistent state for D3
+const hullLayer = container.append("g");
+const linkLayer = container.append("g");
+const nodeLayer = container.append("g");
+
+// Pan/zoom over the server layout (origin = primary PLC, centred on screen)
+const zoom = d3.zoom()
+    .scaleExtent([0.02, 4])
+    .on("zoom", (event) => container.attr("transform", event.transform));
+svg.call(zoom).on("dblclick.zoom", null);
+svg.call(zoom.transform, d3.zoomIdentity.translate(width / 2, height / 2));
+
+// Persistent state for D3 (maps survive across snapshots and deltas)
+const nodeById = new Map();
+const linkByKey = new Map();
 let nodesData = [];
 let linksData = [];
 
+// Level of detail: group summary, the groups that are open and their members
+let view = null;
+let viewLoaded = false;
+let autoExpand = false;
+const openGroups = new Set();
+const groupDetails = new Map();
+// Positions moved by hand, by node or group id (kept across refreshes)
+const draggedPositions = new Map();
+const MAX_PARTICLES = 200;
+
+const STATUS_COLORS = {
+    'Online': "#58a6ff",
+    'Alarm': "#ffaa00",
+    'Safety Mode': "#ff9900",
+    'Offline': "#ff2222",
+};
+
+function linkKey(source, target) {
+    return [source, target].sort().join('_');
+}
+
+function upsertLink(l) {
+    const source = nodeById.get(l.source.id || l.source);
+    const target = nodeById.get(l.target.id || l.target);
+    if (!source || !target) return false;
+    const key = linkKey(source.id, target.id);
+    const existing = linkByKey.get(key);
+    if (existing) {
+        existing.active = l.active;
+        existing.weight = l.weight;
+        return false;
+    }
+    linkByKey.set(key, { ...l, source, target });
+    return true;
+}
+
+function getTopologyNodes() {
+    return nodesData;
+}
+
+// Full snapshot: replace state and reload the grouped view
 function updateTopology(topology) {
     const { nodes: newNodes, links: newLinks } = topology;
 
-    // 1. Object Constancy: Merge new data into existing node objects to preserve x/y/vx/vy
-    const nodeMap = new Map(nodesData.map(d => [d.id, d]));
-    nodesData = newNodes.map(d => {
-        const existing = nodeMap.get(d.id);
-        return existing ? Object.assign(existing, d) : d;
+    const incoming = new Set(newNodes.map(d => d.id));
+    for (const id of Array.from(nodeById.keys())) {
+        if (!incoming.has(id)) nodeById.delete(id);
+    }
+    newNodes.forEach(d => {
+        const existing = nodeById.get(d.id);
+        if (existing) Object.assign(existing, d);
+        else nodeById.set(d.id, d);
     });
 
-    // 2. Map links to the actual node objects (D3 requirement)
-    const activeNodeMap = new Map(nodesData.map(d => [d.id, d]));
-    const processedLinks = newLinks.map(l => ({
-        ...l,
-        source: activeNodeMap.get(l.source.id || l.source),
-        target: activeNodeMap.get(l.target.id || l.target)
-    })).filter(l => l.source && l.target);
+    linkByKey.clear();
+    newLinks.forEach(upsertLink);
+    nodesData = Array.from(nodeById.values());
 
-    const topologyChanged = nodesData.length !== nodeMap.size || processedLinks.length !== linksData.length;
-    linksData = processedLinks;
+    scheduleViewRefresh(true);
+}
 
-    // ── Links ──
-    const link = container.selectAll(".link")
-        .data(linksData, d => {
-            const ids = [d.source.id || d.source, d.target.id || d.target];
-            return ids.sort().join('_');
+// Delta: patch the persistent maps in place
+function patchTopology(nodesDelta, linksDelta) {
+    let changed = false;
+
+    nodesDelta.remove.forEach(id => {
+        changed = nodeById.delete(id) || changed;
+    });
+    nodesDelta.upsert.forEach(d => {
+        const existing = nodeById.get(d.id);
+        if (existing) {
+            Object.assign(existing, d);
+        } else {
+            nodeById.set(d.id, d);
+            changed = true;
+        }
+    });
+
+    linksDelta.remove.forEach(([source, target]) => {
+        changed = linkByKey.delete(linkKey(source, target)) || changed;
+    });
+    linksDelta.upsert.forEach(l => {
+        changed = upsertLink(l) || changed;
+    });
+
+    // Drop links whose endpoints disappeared
+    for (const [key, l] of linkByKey) {
+        if (!nodeById.has(l.source.id) || !nodeById.has(l.target.id)) {
+            linkByKey.delete(key);
+            changed = true;
+        }
+    }
+    nodesData = Array.from(nodeById.values());
+
+    if (changed) {
+        // New grouping and coordinates from the server
+        scheduleViewRefresh(true);
+    } else if (nodesDelta.upsert.length || linksDelta.upsert.length) {
+        // Open groups read status straight from the maps; group counters refresh lazily
+        renderTopology();
+        scheduleViewRefresh(false);
+    }
+}
+
+// ── Grouped view ──
+
+let refreshTimer = null;
+let refreshStructure = false;
+
+function scheduleViewRefresh(structural) {
+    refreshStructure = refreshStructure || structural;
+    if (refreshTimer) return;
+    refreshTimer = setTimeout(() => {
+        refreshTimer = null;
+        const structuralRefresh = refreshStructure;
+        refreshStructure = false;
+        refreshView(structuralRefresh);
+    }, structural ? 200 : 1000);
+}
+
+async function refreshView(structural) {
+    // Small plants open every group ("auto"); otherwise keep what the user opened
+    const reload = structural || !viewLoaded;
+    const expand = !viewLoaded || autoExpand ? ['auto'] : Array.from(openGroups);
+    const query = reload ? `?expand=${encodeURIComponent(expand.join(','))}` : '';
+    const response = await fetch(apiUrl(`/api/topology/view${query}`));
+    if (!response.ok) return;
+    const data = await response.json();
+
+    view = data;
+    if (reload) {
+        openGroups.clear();
+        groupDetails.clear();
+        Object.entries(data.expanded).forEach(([gid, detail]) => {
+            openGroups.add(gid);
+            groupDetails.set(gid, detail);
         });
+        if (!viewLoaded) {
+            autoExpand = data.groups.length > 0 && openGroups.size === data.groups.length;
+        }
+        viewLoaded = true;
+    }
+    renderTopology();
+}
 
-    link.exit().remove();
+async function toggleGroup(gid) {
+    autoExpand = false;
+    if (openGroups.has(gid)) {
+        openGroups.delete(gid);
+        groupDetails.delete(gid);
+        renderTopology();
+        return;
+    }
+    const response = await fetch(apiUrl(`/api/topology/groups/${encodeURIComponent(gid)}`));
+    if (!response.ok) return;
+    groupDetails.set(gid, await response.json());
+    openGroups.add(gid);
+    renderTopology();
+}
+
+function visibleElements() {
+    // Open groups show their members, closed ones a single group node
+    const visible = new Map();
+    view.groups.forEach(g => {
+        const detail = groupDetails.get(g.id);
+        if (openGroups.has(g.id) && detail) {
+            detail.nodes.forEach(n => {
+                const pos = draggedPositions.get(n.id) || n;
+                visible.set(n.id, { ...(nodeById.get(n.id) || n), id: n.id, group: g.id, x: pos.x, y: pos.y });
+            });
+        } else {
+            const pos = draggedPositions.get(g.id) || g;
+            visible.set(g.id, { ...g, isGroup: true, x: pos.x, y: pos.y });
+        }
+    });
+
+    // A link end is the device when its group is open, otherwise the group node
+    const links = new Map();
+    groupDetails.forEach((detail, gid) => {
+        if (!openGroups.has(gid)) return;
+        detail.links.forEach(l => {
+            const source = visible.get(l.source) || visible.get(l.source_group);
+            const target = visible.get(l.target) || visible.get(l.target_group);
+            if (!source || !target) return;
+            const live = linkByKey.get(linkKey(l.source, l.target));
+            const active = live ? live.active : l.active;
+            const aggregated = !!(source.isGroup || target.isGroup);
+            const key = linkKey(source.id, target.id);
+            const existing = links.get(key);
+            if (existing) {
+                // Links between two open groups show up in both; group ends add up
+                if (aggregated) {
+                    existing.count += 1;
+                    existing.active = existing.active && active;
+                }
+                return;
+            }
+            links.set(key, { source, target, active, aggregated, count: 1 });
+        });
+    });
+    view.links.forEach(l => {
+        if (openGroups.has(l.source) || openGroups.has(l.target)) return;
+        const source = visible.get(l.source);
+        const target = visible.get(l.target);
+        if (!source || !target) return;
+        links.set(linkKey(source.id, target.id), {
+            source, target, active: l.active === l.count, aggregated: true, count: l.count
+        });
+    });
+    return { nodes: Array.from(visible.values()), links: Array.from(links.values()) };
+}
+
+function nodeColor(d) {
+    if (d.isGroup) return STATUS_COLORS[d.worst] || "#58a6ff";
+    if (d.status === 'Offline') return "#666"; // Induced failure/Fault
+    if (d.type === 'PLC') return "#fff";
+    if (d.type === 'Drive') return "#ff2222";
+    if (d.type === 'IO-Link') return "#22ff44";
+    if (d.type === 'SCADA') return "#ff9900";  // OPC-UA / SCADA gateway
+    return "#58a6ff";
+}
 
-    const linkEnter = link.enter().append("line")
-        .attr("class", d => `link ${d.active ? '' : 'inactive'}`)
-        .on("click", (event, d) => toggleLink(d));
+function nodeRadius(d) {
+    if (d.isGroup) return 16 + 3 * Math.log2(d.size);
+    return d.type === 'PLC' ? 20 : 14;
+}
+
+function renderTopology() {
+    if (!view) return;
+    const visible = visibleElements();
+    linksData = visible.links;
+
+    // ── Open group outlines (click to collapse) ──
+    const hull = hullLayer.selectAll(".group-hull")
+        .data(view.groups.filter(g => openGroups.has(g.id) && g.size > 1), d => d.id);
+
+    hull.exit().remove();
+
+    hull.enter().append("circle")
+        .attr("class", "group-hull")
+        .on("click", (event, d) => toggleGroup(d.id))
+        .merge(hull)
+        .attr("cx", d => d.x)
+        .attr("cy", d => d.y)
+        .attr("r", d => d.radius);
 
-    const linkUpdate = link.merge(linkEnter)
-        .attr("class", d => `link ${d.active ? '' : 'inactive'}`);
+    // ── Links ──
+    const link = linkLayer.selectAll(".link")
+        .data(linksData, d => linkKey(d.source.id, d.target.id));
+
+    link.exit().remove();
+
+    link.enter().append("line")
+        .on("click", (event, d) => {
+            if (!d.aggregated) toggleLink(d);
+        })
+        .merge(link)
+        .attr("class", d => `link ${d.active ? '' : 'inactive'} ${d.aggregated ? 'aggregated' : ''}`)
+        .style("stroke-width", d => d.aggregated ? `${Math.min(2 + Math.log2(d.count), 8)}px` : null)
+        .attr("x1", d => d.source.x)
+        .attr("y1", d => d.source.y)
+        .attr("x2", d => d.target.x)
+        .attr("y2", d => d.target.y);
 
     // ── Nodes ──
-    const node = container.selectAll(".node")
-        .data(nodesData, d => d.id);
+    const node = nodeLayer.selectAll(".node")
+        .data(visible.nodes, d => d.id);
 
     node.exit().remove();
 
     const nodeEnter = node.enter().append("g")
         .attr("class", "node")
-        .call(d3.drag()
-            .on("start", dragstarted)
-            .on("drag", dragged)
-            .on("end", dragended));
+        .call(d3.drag().on("drag", dragged));
 
     nodeEnter.append("circle")
-        .attr("r", d => d.type === 'PLC' ? 20 : 14)
-        .attr("fill", d => {
-            if (d.status === 'Offline') return "#666"; // Induced failure/Fault
-            if (d.type === 'PLC') return "#fff";
-            if (d.type === 'Drive') return "#ff2222";
-            if (d.type === 'IO-Link') return "#22ff44";
-            if (d.type === 'SCADA') return "#ff9900";  // OPC-UA / SCADA gateway
-            return "#58a6ff";
-        })
         .style("filter", "drop-shadow(0 0 8px rgba(255,255,255,0.2))");
 
     nodeEnter.append("text")
-        .attr("dy", 35)
         .attr("text-anchor", "middle")
-        .attr("class", "node-label")
-        .text(d => d.display_name || d.id);
+        .attr("class", "node-label");
 
     nodeEnter.append("text")
-        .attr("dy", 48)
         .attr("text-anchor", "middle")
         .attr("class", "node-status")
         .style("font-size", "8px")
         .style("font-weight", "bold");
 
-    const nodeUpdate = node.merge(nodeEnter);
-
-    // Update colors and labels if status/name changed
-    nodeUpdate.select("circle")
-        .attr("fill", d => {
-            if (d.status === 'Offline') return "#666";
-            if (d.type === 'PLC') return "#fff";
-            if (d.type === 'Drive') return "#ff2222";
-            if (d.type === 'IO-Link') return "#22ff44";
-            if (d.type === 'SCADA') return "#ff9900";  // OPC-UA / SCADA gateway
-            return "#58a6ff";
-        });
-
-    nodeUpdate.select(".node-label")
-        .text(d => d.display_name || d.id);
-
-    nodeUpdate.select(".node-status")
-        .text(d => d.status === 'Online' ? '' : d.status.toUpperCase())
-        .attr("fill", d => d.status === 'Offline' ? '#ff2222' : '#ffaa00');
-
     nodeEnter.on("dblclick", (event, d) => {
         event.stopPropagation();
+        if (d.isGroup) return;
         const newName = prompt(`Renombrar dispositivo ${d.id}:`, d.display_name || d.id);
         if (newName) {
-            fetch(`/api/devices/${d.id}`, {
+            fetch(apiUrl(`/api/devices/${d.id}`), {
                 method: 'PATCH',
                 headers: { 'Content-Type': 'application/json' },
                 body: JSON.stringify({ display_name: newName })
@@ -125,6 +337,10 @@ function updateTopology(topology) {
     });
 
     nodeEnter.on("click", (event, d) => {
+        if (d.isGroup) {
+            toggleGroup(d.id);
+            return;
+        }
         // Toggle fault if it's already offline (Repair) or just confirm
         const action = d.status === 'Offline' ? 'Restaurar' : 'Inducir fallo en';
         if (confirm(`¿${action} ${d.display_name || d.id}?`)) {
@@ -134,30 +350,32 @@ function updateTopology(topology) {
 
     nodeEnter.on("contextmenu", (event, d) => {
         event.preventDefault();
+        if (d.isGroup) return;
         if (confirm(`¿Inducir/Restaurar fallo en ${d.display_name || d.id}?`)) {
             socket.emit('trigger_fault', { device_id: d.id });
         }
     });
 
-    // ── Simulation Update ──
-    simulation.nodes(nodesData);
-    simulation.force("link").links(linksData);
+    const nodeUpdate = node.merge(nodeEnter)
+        .classed("group-node", d => !!d.isGroup)
+        .attr("transform", d => `translate(${d.x},${d.y})`);
 
-    // Only "shake" the graph if something new was added
-    if (topologyChanged) {
-        simulation.alpha(0.3).restart();
-    }
+    // Update colors and labels if status/name changed
+    nodeUpdate.select("circle")
+        .attr("r", nodeRadius)
+        .attr("fill", nodeColor);
 
-    simulation.on("tick", () => {
-        linkUpdate
-            .attr("x1", d => d.source.x)
-            .attr("y1", d => d.source.y)
-            .attr("x2", d => d.target.x)
-            .attr("y2", d => d.target.y);
+    nodeUpdate.select(".node-label")
+        .attr("dy", d => nodeRadius(d) + 15)
+        .text(d => d.isGroup ? `${d.label} (${d.size})` : (d.display_name || d.id));
 
-        nodeUpdate
-            .attr("transform", d => `translate(${d.x},${d.y})`);
-    });
+    nodeUpdate.select(".node-status")
+        .attr("dy", d => nodeRadius(d) + 28)
+        .text(d => {
+            if (d.isGroup) return d.worst === 'Online' ? '' : `${d.status[d.worst]} ${d.worst.toUpperCase()}`;
+            return d.status === 'Online' ? '' : d.status.toUpperCase();
+        })
+        .attr("fill", d => (d.isGroup ? d.worst : d.status) === 'Offline' ? '#ff2222' : '#ffaa00');
 
     // ── Traffic Simulation ──
     startTrafficParticles();
@@ -167,7 +385,7 @@ function startTrafficParticles() {
     // Periodically spawn particles
     if (!window.trafficTimer) {
         window.trafficTimer = setInterval(() => {
-            spawnParticles(linksData.filter(l => l.active));
+            spawnParticles(linksData.filter(l => l.active && !l.aggregated).slice(0, MAX_PARTICLES));
         }, 800);
     }
 }
@@ -194,7 +412,7 @@ function toggleLink(link) {
     const sourceId = link.source.id || link.source;
     const targetId = link.target.id || link.target;
 
-    fetch('/api/link', {
+    fetch(apiUrl('/api/link'), {
         method: 'POST',
         headers: { 'Content-Type': 'application/json' },
         body: JSON.stringify({
@@ -205,20 +423,10 @@ function toggleLink(link) {
     });
 }
 
-// ── Drag Helpers ──
-function dragstarted(event, d) {
-    if (!event.active) simulation.alphaTarget(0.3).restart();
-    d.fx = d.x;
-    d.fy = d.y;
-}
+// ── Drag: moves a node by hand (no physics) ──
 function dragged(event, d) {
-    d.fx = event.x;
-    d.fy = event.y;
-}
-function dragended(event, d) {
-    if (!event.active) simulation.alphaTarget(0);
-    d.fx = null;
-    d.fy = null;
+    draggedPositions.set(d.id, { x: event.x, y: event.y });
+    renderTopology();
 }
 
 window.addEventListener('resize', () => {
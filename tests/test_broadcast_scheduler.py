@@ -0,0 +1,102 @@
+import os
+import sys
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from engine.network_engine import NetworkEngine, Device, DeviceType, DeviceStatus
+from engine.delta_stream import DeltaStream
+from engine.broadcast_scheduler import BroadcastScheduler, merge_deltas
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+def _apply(state, delta):
+    """Client-side application of a delta, as in templates/index.html."""
+    for node_id in delta["nodes"]["remove"]:
+        state["nodes"].pop(node_id, None)
+    for node in delta["nodes"]["upsert"]:
+        state["nodes"][node["id"]] = node
+    for dev_id in delta["performance"]["remove"]:
+        state["performance"].pop(dev_id, None)
+    for entry in delta["performance"]["upsert"]:
+        state["performance"].setdefault(entry["id"], {}).update(entry)
+    return state
+
+
+def test_debounce_window_and_max_delay():
+    clock = FakeClock()
+    scheduler = BroadcastScheduler(window_s=0.05, max_delay_s=0.2, clock=clock)
+    assert scheduler.due_in() is None
+    for _ in range(10):
+        scheduler.note_mutation()
+        clock.now += 0.01
+        assert scheduler.due_in() > 0
+    # A continuous stream still flushes once max_delay_s has passed
+    clock.now += 0.1
+    for _ in range(5):
+        scheduler.note_mutation()
+    assert scheduler.due_in() <= 0
+    scheduler.flushed()
+    assert scheduler.due_in() is None
+    assert scheduler.mutations == 15 and scheduler.flushes == 1
+
+
+def test_slow_client_gets_merged_deltas():
+    clock = FakeClock()
+    scheduler = BroadcastScheduler(client_max_rate_hz=10.0, clock=clock)
+    engine = NetworkEngine(seed=0)
+    stream = DeltaStream()
+    engine.add_device(Device(id="PLC", type=DeviceType.PLC))
+    engine.add_device(Device(id="DR", type=DeviceType.DRIVE), connect_to="PLC")
+    stream.publish(engine.get_topology(), engine.calculate_performance(), False)
+    snapshot = stream.snapshot()
+    client_state = {
+        "nodes": {n["id"]: n for n in snapshot["topology"]["nodes"]},
+        "performance": {p["id"]: dict(p) for p in snapshot["performance"]},
+    }
+    scheduler.add_client("fast", max_rate_hz=None)
+    scheduler.add_client("slow", max_rate_hz=2.0)
+
+    clock.now += 0.2
+    engine.add_device(Device(id="IO", type=DeviceType.IOLINK), connect_to="DR")
+    sends = scheduler.dispatch(stream.publish(engine.get_topology(), engine.calculate_performance(), False))
+    assert [sid for sid, _ in sends] == ["fast"]
+
+    clock.now += 0.15
+    engine.set_device_status("DR", DeviceStatus.OFFLINE)
+    engine.remove_device("IO")
+    sends = scheduler.dispatch(stream.publish(engine.get_topology(), engine.calculate_performance(), True))
+    assert [sid for sid, _ in sends] == ["fast"]
+    assert scheduler.release_held() == []
+    assert 0 < scheduler.next_release_in() <= 0.2
+
+    clock.now += 0.2
+    (sid, merged), = scheduler.release_held()
+    assert sid == "slow"
+    assert merged["base_seq"] == snapshot["seq"] and merged["seq"] == stream.seq
+    _apply(client_state, merged)
+    expected = stream.snapshot()
+    assert client_state["nodes"] == {n["id"]: n for n in expected["topology"]["nodes"]}
+    assert client_state["performance"] == {p["id"]: p for p in expected["performance"]}
+    assert merged["safety_active"] is True
+
+    # Everyone caught up: next delta is a single broadcast
+    clock.now += 1.0
+    engine.set_device_status("DR", DeviceStatus.ONLINE)
+    sends = scheduler.dispatch(stream.publish(engine.get_topology(), engine.calculate_performance(), False))
+    assert [sid for sid, _ in sends] == [None]
+
+
+def test_merge_keeps_latest_link_state():
+    older = {"seq": 5, "nodes": {"upsert": [], "remove": []},
+             "links": {"upsert": [{"source": "A", "target": "B", "active": False}], "remove": []},
+             "performance": {"upsert": [], "remove": []}, "safety_active": False, "timestamp": 1}
+    newer = dict(older, seq=6, links={"upsert": [], "remove": [["B", "A"]]}, timestamp=2)
+    merged = merge_deltas(older, newer)
+    assert merged["links"] == {"upsert": [], "remove": [["B", "A"]]}
+    assert merged["base_seq"] == 4 and merged["seq"] == 6
@@ -0,0 +1,63 @@
+import os
+import sys
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from engine.network_engine import NetworkEngine, Device, DeviceType
+from engine.bulk_io import BulkImporter, iter_rows, export_lines
+
+CSV_IMPORT = """kind,id,type,protocol,connect_to,source,target,active,weight,name,members
+device,PLC,PLC,PROFINET_IRT,,,,,,,
+device,SW1,Switch,,PLC,,,,,,
+device,SW2,Switch,,SW1,,,,,,
+link,,,,,SW2,PLC,true,0.25,,
+device,IO1,IO-Link,Modbus TCP,SW2,,,,,,
+device,IO1,IO-Link,,SW2,,,,,,
+device,IO2,Drive,,MISSING,,,,,,
+"""
+
+
+def test_csv_import_reports_row_errors_and_applies_the_rest():
+    engine = NetworkEngine()
+    report = BulkImporter(engine).apply(iter_rows(CSV_IMPORT.splitlines(keepends=True), "csv"))
+
+    assert report['applied'] == {"devices": 4, "links": 0, "rings": 0}
+    # The SW2-PLC link closes an undeclared loop; IO1 is duplicated; IO2 has no uplink
+    assert [e['row'] for e in report['errors']] == [5, 7, 8]
+    assert "Bucle" in report['errors'][0]['error']
+    assert set(engine.devices) == {"PLC", "SW1", "SW2", "IO1"}
+
+
+def test_ndjson_export_round_trips():
+    engine = NetworkEngine()
+    engine.add_device(Device(id="PLC", type=DeviceType.PLC))
+    engine.add_device(Device(id="SW1", type=DeviceType.SWITCH), connect_to="PLC")
+    engine.add_device(Device(id="SW2", type=DeviceType.SWITCH), connect_to="SW1")
+    engine.declare_ring("ring_a", ["PLC", "SW1", "SW2"], "MRP")
+    engine.set_link_status("SW2", "PLC", False)
+    engine.set_link_weight("SW2", "PLC", 0.3)
+
+    for fmt in ("ndjson", "csv"):
+        copy = NetworkEngine()
+        report = BulkImporter(copy).apply(iter_rows(export_lines(engine, fmt), fmt))
+        assert report['errors'] == []
+        assert copy.to_state() == engine.to_state()
+
+
+def test_invalid_link_row_changes_nothing():
+    engine = NetworkEngine()
+    engine.add_device(Device(id="PLC", type=DeviceType.PLC))
+    engine.add_device(Device(id="SW1", type=DeviceType.SWITCH), connect_to="PLC")
+    engine.add_device(Device(id="SW2", type=DeviceType.SWITCH), connect_to="PLC")
+    before, version = engine.to_state(), engine.version
+    rows = [
+        '{"source": "SW1", "target": "SW2", "weight": 0.5, "speed_mbps": 42}',
+        '{"source": "PLC", "target": "SW1", "active": false, "weight": 0.5, "utilization": 1.5}',
+        '{"source": "PLC", "target": "SW1", "length_m": -3}',
+        '{"source": "PLC", "target": "SW1", "weight": -0.5}',
+        '{"source": "PLC", "target": "SW1", "weight": "nan"}',
+        '{"source": "PLC", "target": "SW1", "weight": "inf"}',
+    ]
+    report = BulkImporter(engine).apply(iter_rows(rows))
+
+    assert [e['row'] for e in report['errors']] == [1, 2, 3, 4, 5, 6]
+    assert engine.to_state() == before and engine.version == version
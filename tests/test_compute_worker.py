@@ -0,0 +1,53 @@
+import os
+import sys
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from engine.network_engine import NetworkEngine, Device, DeviceType, DeviceStatus
+from engine.compute_worker import ComputeWorker
+
+
+def _plant():
+    engine = NetworkEngine(seed=3)
+    engine.add_device(Device(id="PLC", type=DeviceType.PLC))
+    engine.add_device(Device(id="SW", type=DeviceType.SWITCH), connect_to="PLC")
+    for i in range(3):
+        engine.add_device(Device(id=f"DR{i}", type=DeviceType.DRIVE), connect_to="SW")
+    return engine
+
+
+def test_bursts_coalesce_into_one_recompute():
+    engine = _plant()
+    worker = ComputeWorker(engine)
+    first = worker.current()
+    assert [p['path'] for p in first.performance] == [p['path'] for p in engine.calculate_performance()]
+
+    for i in range(3):
+        engine.set_device_status(f"DR{i}", DeviceStatus.OFFLINE)
+        worker.request()
+    assert worker.wait(0) is True
+    result = worker.refresh()
+    assert worker.recomputes == 2 and worker.coalesced == 2
+    assert result.version == engine.version
+    assert all(p['status'] == DeviceStatus.OFFLINE for p in result.performance if p['id'].startswith("DR"))
+
+    # Clean tick: jitter is re-sampled but paths are reused
+    worker.refresh()
+    assert worker.recomputes == 2
+    assert worker.wait(0) is False
+
+
+def test_worker_reads_a_frozen_copy():
+    engine = _plant()
+
+    def mutate_while_running(fn, *args):
+        # A handler cutting the link mid-computation must not affect this run
+        engine.set_link_status("PLC", "SW", False)
+        return fn(*args)
+
+    worker = ComputeWorker(engine, execute=mutate_while_running)
+    result = worker.refresh()
+    assert result.version < engine.version
+    assert all(p['status'] != DeviceStatus.OFFLINE for p in result.performance)
+
+    worker.execute = lambda fn, *args: fn(*args)
+    assert all(p['status'] == DeviceStatus.OFFLINE for p in worker.refresh().performance)
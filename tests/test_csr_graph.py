@@ -0,0 +1,131 @@
+import os
+import sys
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import numpy as np
+import pytest
+
+import engine.csr_graph as csr_graph
+from engine.network_engine import NetworkEngine, Device, DeviceType, DeviceStatus, build_route_table
+
+
+@pytest.fixture(params=["compiled", "heap"])
+def kernel(request, monkeypatch):
+    if request.param == "heap":
+        monkeypatch.setattr(csr_graph, "csgraph_dijkstra", None)
+    elif csr_graph.csgraph_dijkstra is None:
+        pytest.skip("SciPy not installed")
+    return request.param
+
+
+def _random_plant(seed, devices=120, csr_min_nodes=0, distinct_lengths=True):
+    """Two PLCs, a random switch fabric with cross links, random cable lengths and pinned devices."""
+    rng = np.random.default_rng(seed)
+    engine = NetworkEngine(seed=seed, csr_min_nodes=csr_min_nodes)
+    engine.add_device(Device(id="PLC_A", type=DeviceType.PLC))
+    engine.add_device(Device(id="PLC_B", type=DeviceType.PLC))
+    switches = ["PLC_A", "PLC_B"]
+    for i in range(devices):
+        parent = switches[int(rng.integers(len(switches)))]
+        if i % 4 == 0:
+            engine.add_device(Device(id=f"SW{i}", type=DeviceType.SWITCH), connect_to=parent)
+            switches.append(f"SW{i}")
+        else:
+            owner = ["PLC_A", "PLC_B"][i % 2] if i % 7 == 0 else None
+            engine.add_device(Device(id=f"DR{i}", type=DeviceType.DRIVE, controller=owner), connect_to=parent)
+    for _ in range(devices // 10):
+        u, v = rng.choice(switches, 2, replace=False)
+        engine.set_link_status(str(u), str(v), True)
+    # Distinct lengths: no two routes tie. Default lengths tie all over the fabric
+    if distinct_lengths:
+        for u, v in list(engine.graph.edges()):
+            engine.set_link_properties(u, v, length_m=float(rng.uniform(1, 100)))
+    return engine, rng
+
+
+def _routes(engine, csr):
+    inputs = engine.route_inputs()
+    table = build_route_table(inputs if csr else inputs._replace(csr=None))
+    return {dev_id: (path, owner, latency) for dev_id, path, owner, latency
+            in zip(table.ids, table.paths, table.controllers, table.base_latency.tolist())}
+
+
+def _assert_same_routes(engine):
+    expected, actual = _routes(engine, csr=False), _routes(engine, csr=True)
+    assert actual.keys() == expected.keys()
+    for dev_id, (path, owner, latency) in expected.items():
+        assert actual[dev_id][:2] == (path, owner), dev_id
+        if path is None:
+            assert np.isnan(actual[dev_id][2])
+        else:
+            assert actual[dev_id][2] == pytest.approx(latency, rel=1e-12)
+
+
+@pytest.mark.parametrize("seed", [1, 2, 3])
+def test_routes_match_networkx_through_faults(kernel, seed):
+    engine, rng = _random_plant(seed)
+    _assert_same_routes(engine)
+    csr = engine.csr_view()
+    links = list(engine.graph.edges())
+    for _ in range(15):
+        if rng.random() < 0.5:
+            u, v = links[int(rng.integers(len(links)))]
+            engine.set_link_status(u, v, not engine.graph[u][v]['active'])
+        else:
+            dev_id = list(engine.devices)[int(rng.integers(len(engine.devices)))]
+            status = engine.devices[dev_id].status
+            engine.set_device_status(dev_id, DeviceStatus.ONLINE if status == DeviceStatus.OFFLINE
+                                     else DeviceStatus.OFFLINE)
+        _assert_same_routes(engine)
+    # Faults only flipped masks; the arrays were never rebuilt
+    assert engine.csr_view() is csr
+
+    engine.add_device(Device(id="LATE", type=DeviceType.DRIVE), connect_to="PLC_B")
+    assert engine.csr_view() is not csr
+    _assert_same_routes(engine)
+
+
+@pytest.mark.parametrize("seed", [5, 6])
+def test_equal_cost_routes_match_networkx(kernel, seed):
+    engine, rng = _random_plant(seed, distinct_lengths=False)
+    _assert_same_routes(engine)
+    for dev_id in list(engine.devices)[2:40:3]:
+        engine.set_device_status(dev_id, DeviceStatus.OFFLINE)
+        _assert_same_routes(engine)
+
+
+def test_kernels_break_ties_like_networkx(kernel):
+    # Equal-cost ring of 8: both directions tie for SW3 and DR3
+    engine = NetworkEngine(seed=1, csr_min_nodes=0)
+    engine.add_device(Device(id="PLC", type=DeviceType.PLC))
+    previous = "PLC"
+    for i in range(7):
+        engine.add_device(Device(id=f"SW{i}", type=DeviceType.SWITCH), connect_to=previous)
+        engine.add_device(Device(id=f"DR{i}", type=DeviceType.DRIVE), connect_to=f"SW{i}")
+        previous = f"SW{i}"
+    engine.set_link_status(previous, "PLC", True)
+    _assert_same_routes(engine)
+    assert _routes(engine, csr=True)["DR3"][0] == ["PLC", "SW0", "SW1", "SW2", "SW3", "DR3"]
+    engine.set_device_status("DR6", DeviceStatus.OFFLINE)
+    _assert_same_routes(engine)
+    assert _routes(engine, csr=True)["DR3"][0] == ["PLC", "SW0", "SW1", "SW2", "SW3", "DR3"]
+    if kernel == "compiled":
+        # Ties are detected and rerun on the heap kernel
+        csr = engine.csr_view()
+        csr.shortest_paths(["PLC"])
+        assert csr.tied_searches == 1
+    engine.set_device_status("SW0", DeviceStatus.OFFLINE)
+    _assert_same_routes(engine)
+
+
+def test_engine_switches_backend_at_threshold(kernel):
+    small, _ = _random_plant(4, devices=40, csr_min_nodes=200)
+    large, _ = _random_plant(4, devices=40, csr_min_nodes=10)
+    assert small.csr_view() is None and large.csr_view() is not None
+    for engine in (small, large):
+        engine.set_link_status("PLC_A", "SW0", False)
+        engine.set_device_status("SW4", DeviceStatus.OFFLINE)
+
+    # Same seed, same jitter draws: the whole tick output matches
+    assert large.calculate_performance() == small.calculate_performance()
+    assert large.get_topology() == small.get_topology()
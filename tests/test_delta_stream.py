@@ -0,0 +1,53 @@
+import os
+import sys
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from engine.network_engine import NetworkEngine, Device, DeviceType, DeviceStatus
+from engine.delta_stream import DeltaStream
+
+
+def _publish(stream, engine):
+    return stream.publish(engine.get_topology(), engine.calculate_performance(), engine.safety_active)
+
+
+def test_deltas_rebuild_snapshot_state():
+    engine = NetworkEngine(seed=3)
+    engine.add_device(Device(id="PLC", type=DeviceType.PLC))
+    engine.add_device(Device(id="DR", type=DeviceType.DRIVE), connect_to="PLC")
+    stream = DeltaStream()
+
+    topology, performance = engine.get_topology(), engine.calculate_performance()
+    first = stream.publish(topology, performance, engine.safety_active)
+    assert first['seq'] == 1
+    assert {n['id'] for n in first['nodes']['upsert']} == {"PLC", "DR"}
+
+    # Idle tick (same result republished): no delta, the stream stays at seq 1
+    assert stream.publish(topology, performance, engine.safety_active) is None
+    assert stream.seq == first['seq']
+
+    # Clean tick: same topology object, only the re-sampled jitter fields change
+    twin = NetworkEngine(seed=3)
+    twin.add_device(Device(id="PLC", type=DeviceType.PLC))
+    twin.add_device(Device(id="DR", type=DeviceType.DRIVE), connect_to="PLC")
+    twin.calculate_performance()
+    expected = {p['id']: p for p in twin.calculate_performance()}
+    second = _publish(stream, engine)
+    # Applies on the previous seq (base_seq defaults to seq - 1)
+    assert second['seq'] - 1 == first['seq'] == 1
+    assert second['nodes'] == {"upsert": [], "remove": []}
+    assert second['links'] == {"upsert": [], "remove": []}
+    assert second['performance']['remove'] == [] and second['performance']['upsert']
+    for change in second['performance']['upsert']:
+        assert set(change) <= {"id", "latency_ms", "jitter_ms"}
+        assert all(change[k] == expected[change['id']][k] for k in change)
+
+    engine.set_device_status("DR", DeviceStatus.OFFLINE)
+    engine.remove_device("PLC")
+    delta = _publish(stream, engine)
+    assert delta['nodes']['remove'] == ["PLC"]
+    assert delta['links']['remove'] == [["DR", "PLC"]] or delta['links']['remove'] == [["PLC", "DR"]]
+
+    snap = stream.snapshot()
+    assert snap['seq'] == delta['seq']
+    assert [n['id'] for n in snap['topology']['nodes']] == ["DR"]
+    assert snap['topology']['links'] == []
@@ -0,0 +1,43 @@
+import os
+import sys
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from engine.network_engine import NetworkEngine, Device, DeviceType, Protocol, DeviceStatus
+from engine.device_table import DeviceTable
+
+
+def _build(compact):
+    engine = NetworkEngine(seed=3, compact_devices=compact)
+    engine.add_device(Device(id="PLC", type=DeviceType.PLC, protocol=Protocol.PROFINET_IRT))
+    engine.add_device(Device(id="SW", type=DeviceType.SWITCH), connect_to="PLC")
+    for i in range(40):
+        engine.add_device(Device(id=f"IO_{i}", type=DeviceType.IOLINK, protocol=Protocol.MODBUS_TCP,
+                                 cycle_time_ms=4.0), connect_to="SW")
+    for i in range(0, 40, 2):
+        engine.remove_device(f"IO_{i}")
+    engine.set_device_status("IO_1", DeviceStatus.OFFLINE)
+    engine.rename_device("IO_3", "Valve bank")
+    return engine
+
+
+def test_compact_store_matches_dict_store():
+    dict_engine, compact_engine = _build(False), _build(True)
+    assert compact_engine.get_topology() == dict_engine.get_topology()
+    assert compact_engine.calculate_performance() == dict_engine.calculate_performance()
+    assert compact_engine.has_offline_devices() is True
+    assert compact_engine.trigger_random_fault() == dict_engine.trigger_random_fault()
+
+
+def test_table_materializes_devices_and_compacts():
+    table = DeviceTable(capacity=4)
+    for i in range(100):
+        table.add(Device(id=f"D{i}", type=DeviceType.DRIVE, cycle_time_ms=float(i)))
+    for i in range(60):
+        table.remove(f"D{i}")
+
+    assert len(table) == 40
+    assert list(table)[:2] == ["D60", "D61"]
+    assert table["D75"].cycle_time_ms == 75.0
+    assert table["D75"].type == DeviceType.DRIVE
+    table.set_status("D75", DeviceStatus.ALARM)
+    assert table.status_of("D75") == DeviceStatus.ALARM
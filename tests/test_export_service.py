@@ -0,0 +1,62 @@
+import os
+import sys
+import threading
+import time
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from engine.network_engine import NetworkEngine, Device, DeviceType
+from engine.export_service import ExportService, ReportCache
+
+
+def _plant(n):
+    engine = NetworkEngine(seed=0)
+    engine.add_device(Device(id="PLC", type=DeviceType.PLC))
+    for i in range(n):
+        engine.add_device(Device(id=f"DR{i}", type=DeviceType.DRIVE), connect_to="PLC")
+    return engine
+
+
+def test_report_renders_in_memory_across_pages():
+    engine = _plant(450)
+    pdf = ExportService.render_pdf(engine.get_topology(), engine.calculate_performance())
+    assert pdf.startswith(b"%PDF-") and pdf.count(b"/Type /Page\n") > 10
+    # A plant without reachable devices must not divide by zero
+    assert ExportService.render_pdf(_plant(0).get_topology(), []).startswith(b"%PDF-")
+
+
+def test_cache_shares_concurrent_builds():
+    engine = _plant(5)
+    calls = []
+
+    def slow_execute(fn, *args):
+        calls.append(fn)
+        time.sleep(0.05)
+        return fn(*args)
+
+    cache = ReportCache(execute=slow_execute, max_entries=1)
+    topo, perf = engine.get_topology(), engine.calculate_performance()
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.get((1, 1), topo, perf))) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len(calls) == 1 and cache.hits == 3
+    assert len(set(results)) == 1
+
+    cache.get((1, 2), topo, perf)
+    cache.get((1, 1), topo, perf)  # evicted by the newer key
+    assert cache.builds == 3
+
+
+def test_cache_rebuilds_reports_older_than_max_age():
+    engine = _plant(2)
+    topo, perf = engine.get_topology(), engine.calculate_performance()
+    cache = ReportCache(max_age_s=0.05)
+
+    cache.get(("main", 1), topo, perf)
+    cache.get(("main", 1), topo, perf)
+    assert cache.builds == 1 and cache.hits == 1
+    time.sleep(0.06)
+    cache.get(("main", 1), topo, perf)
+    assert cache.builds == 2
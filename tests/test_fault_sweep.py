@@ -0,0 +1,45 @@
+import os
+import sys
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from engine.network_engine import NetworkEngine, Device, DeviceType, DeviceStatus
+from engine.fault_sweep import FaultSweep
+
+
+def _plant():
+    engine = NetworkEngine(seed=0)
+    engine.add_device(Device(id="PLC", type=DeviceType.PLC))
+    engine.add_device(Device(id="SW1", type=DeviceType.SWITCH, cycle_time_ms=10.0), connect_to="PLC")
+    engine.add_device(Device(id="SW2", type=DeviceType.SWITCH, cycle_time_ms=10.0), connect_to="SW1")
+    engine.add_device(Device(id="DR1", type=DeviceType.DRIVE, cycle_time_ms=10.0), connect_to="SW1")
+    engine.add_device(Device(id="DR2", type=DeviceType.DRIVE, cycle_time_ms=10.0), connect_to="SW2")
+    return engine
+
+
+def test_sweep_ranks_failures_without_touching_live_engine():
+    engine = _plant()
+    version = engine.version
+    report = FaultSweep(engine, workers=1).run(n2_samples=1000)
+
+    assert engine.version == version
+    assert all(d.status == DeviceStatus.ONLINE for d in engine.devices.values())
+    # 4 devices + 4 links, all pairs
+    assert report['scenarios_evaluated'] == 8 + 28
+    # Worst double failure cuts off every device
+    assert report['ranking'][0]['offline_count'] == 4
+    single = {tuple(r['failures'][0]): r for r in report['ranking'] if r['order'] == "N-1"}
+    assert single[("device", "SW1")]['offline'] == ["SW2", "DR1", "DR2"]
+    assert ["device", "SW1"] in report['single_points_of_failure']
+    assert ["link", "SW1", "PLC"] in report['single_points_of_failure'] or \
+        ["link", "PLC", "SW1"] in report['single_points_of_failure']
+
+
+def test_process_pool_matches_in_process_run():
+    engine = _plant()
+    engine.set_link_status("SW2", "PLC", True)  # ring: the PLC-SW1 cable is no longer critical
+    serial = FaultSweep(engine, workers=1).run(n2_samples=10)
+    parallel = FaultSweep(engine, workers=2).run(n2_samples=10)
+    assert serial == parallel
+    spof = [tuple(f) for f in serial['single_points_of_failure']]
+    assert ("link", "PLC", "SW1") not in spof and ("link", "SW1", "PLC") not in spof
+    assert ("device", "SW1") in spof  # DR1 still hangs off SW1 only
@@ -0,0 +1,73 @@
+import os
+import sys
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from engine.network_engine import DeviceStatus
+from engine.history import DEFAULT_TIERS, SLOT_BYTES, HistoryStore
+
+
+def _sample(latency, status=DeviceStatus.ONLINE, jitter=0.01):
+    return [{"id": "Servo_2", "latency_ms": latency, "jitter_ms": jitter, "status": status},
+            {"id": "DR", "latency_ms": 0.2, "jitter_ms": 0.02, "status": DeviceStatus.ONLINE}]
+
+
+def test_tiers_downsample_and_find_status_change():
+    store = HistoryStore(tiers=((1, 120), (60, 10)))
+    t0 = 6000.0
+    for s in range(90):
+        status = DeviceStatus.ALARM if s >= 70 else DeviceStatus.ONLINE
+        store.record(_sample(0.1 + s * 0.01, status), t0 + s)
+
+    fine = store.query("Servo_2", t0, t0 + 89, now=t0 + 90)
+    assert fine["resolution_s"] == 1 and len(fine["points"]) == 90
+    assert fine["transitions"] == [{"t": 6070, "from": DeviceStatus.ONLINE, "to": DeviceStatus.ALARM}]
+
+    coarse = store.query("Servo_2", t0, t0 + 89, resolution=60, now=t0 + 90)
+    first, second = coarse["points"]
+    assert first["t"] == 6000 and first["status"] == DeviceStatus.ONLINE
+    assert first["latency_ms"] == round(sum(0.1 + s * 0.01 for s in range(60)) / 60, 3)
+    assert second["status"] == DeviceStatus.ALARM  # worst status in the minute
+    assert second["latency_max_ms"] == 0.99
+
+
+def test_memory_is_bounded_and_old_buckets_expire():
+    store = HistoryStore(tiers=((1, 10),))
+    size = store.nbytes()
+    for s in range(1000):
+        status = DeviceStatus.OFFLINE if s == 995 else DeviceStatus.ONLINE
+        store.record(_sample(-1 if status == DeviceStatus.OFFLINE else 0.3, status), float(s))
+    assert store.nbytes() == size
+
+    points = store.query("Servo_2", 0, 999, now=1000)["points"]
+    assert [p["t"] for p in points] == list(range(990, 1000))
+    offline = next(p for p in points if p["t"] == 995)
+    assert offline["status"] == DeviceStatus.OFFLINE and offline["latency_ms"] is None
+    assert store.query("unknown", 0, 999, now=1000)["points"] == []
+
+
+def test_default_tiers_cost_slot_bytes_per_device():
+    slots = sum(n for _, n in DEFAULT_TIERS)
+    epochs = slots * 8
+    store = HistoryStore(capacity=100)
+    assert store.nbytes() == epochs + 100 * slots * SLOT_BYTES
+    # Peaks above the float16 range saturate instead of turning into inf
+    store.record(_sample(1e6), 0.0)
+    assert store.query("Servo_2", 0, 0, now=1)["points"][0]["latency_max_ms"] == 65504.0
+
+
+def test_columns_of_removed_devices_are_recycled():
+    store = HistoryStore(tiers=((1, 10), (60, 5)), capacity=4)
+    size = store.nbytes()
+    # Device churn: a new id every 400 s, each outliving the 300 s retention of the longest tier
+    for n in range(50):
+        t0 = n * 400.0
+        for s in range(5):
+            store.record([{"id": "PLC", "latency_ms": 0.1, "jitter_ms": 0.0, "status": DeviceStatus.ONLINE},
+                          {"id": f"DR{n}", "latency_ms": 0.2, "jitter_ms": 0.0, "status": DeviceStatus.ALARM}],
+                         t0 + s)
+    assert store.nbytes() == size and len(store.index) <= 4
+    assert store.query("DR0", 0, 10, now=20000)["points"] == []
+    # A recycled column starts empty: the newest device only shows its own samples
+    latest = store.query("DR49", 19600, 19610, resolution=60, now=19610)["points"]
+    assert [p["status"] for p in latest] == [DeviceStatus.ALARM]
+    assert store.query("PLC", 19600, 19604, now=19605)["points"][0]["latency_ms"] == 0.1
@@ -0,0 +1,101 @@
+import os
+import sys
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import pytest
+
+from engine.network_engine import NetworkEngine, Device, DeviceType
+from engine.link_model import link_cost, queue_delay_ms, REFERENCE_FRAME_BITS
+
+
+def _fabric():
+    """PLC -> SW1 -> SW2, and a parallel path PLC -> SW3 -> SW2; drive DR on SW2, DR3 on SW3."""
+    engine = NetworkEngine(seed=1)
+    engine.add_device(Device(id="PLC", type=DeviceType.PLC))
+    engine.add_device(Device(id="SW1", type=DeviceType.SWITCH), connect_to="PLC")
+    engine.add_device(Device(id="SW2", type=DeviceType.SWITCH), connect_to="SW1")
+    engine.add_device(Device(id="SW3", type=DeviceType.SWITCH), connect_to="PLC")
+    engine.set_link_status("SW3", "SW2", True)
+    engine.add_device(Device(id="DR", type=DeviceType.DRIVE), connect_to="SW2")
+    engine.add_device(Device(id="DR3", type=DeviceType.DRIVE), connect_to="SW3")
+    return engine
+
+
+def test_cost_combines_delay_length_speed_and_processing():
+    # 0.1 ms fixed + 100 m of cable + one cyclic frame at 100M + half of a 3 us switch
+    expected = 0.1 + 100 * 5e-6 + REFERENCE_FRAME_BITS / 100e3 + 0.003 / 2
+    assert link_cost(0.1, 100.0, 100.0, 0.0, 0.003) == pytest.approx(expected)
+    assert link_cost(0.1, 0.0, 1000.0, 0.0, 0.0) < link_cost(0.1, 0.0, 100.0, 0.0, 0.0)
+    assert queue_delay_ms(0.0, 100.0) == 0.0
+    assert queue_delay_ms(0.5, 100.0) > queue_delay_ms(0.5, 1000.0) > 0
+    # Saturation is clamped, not infinite
+    assert queue_delay_ms(1.0, 100.0) == queue_delay_ms(2.0, 100.0)
+
+
+def test_gigabit_and_short_links_win_the_route():
+    engine = _fabric()
+    route = {p['id']: p['path'] for p in engine.calculate_performance()}["DR"]
+    # Equal hop counts: the tie goes to the first path found
+    assert route in (["PLC", "SW1", "SW2", "DR"], ["PLC", "SW3", "SW2", "DR"])
+
+    engine.set_link_properties("PLC", "SW3", speed_mbps=1000)
+    engine.set_link_properties("SW3", "SW2", speed_mbps=1000)
+    assert {p['id']: p['path'] for p in engine.calculate_performance()}["DR"] == ["PLC", "SW3", "SW2", "DR"]
+
+    engine.set_link_properties("SW3", "SW2", length_m=5000)
+    assert {p['id']: p['path'] for p in engine.calculate_performance()}["DR"] == ["PLC", "SW1", "SW2", "DR"]
+
+
+def test_switch_processing_delay_adds_latency():
+    engine = _fabric()
+    base = engine.route_inputs().graph["SW1"]["SW2"]["weight"]
+    structure = engine.structure_version
+    engine.set_processing_delay("SW1", 50.0)
+    assert engine.route_inputs().graph["SW1"]["SW2"]["weight"] == pytest.approx(base + (0.050 - 0.003) / 2)
+    assert engine.structure_version > structure
+    # Only SW1's links were re-costed
+    assert engine.graph["SW3"]["SW2"]["cost"] == pytest.approx(base)
+
+
+def test_utilization_adds_queueing_only_to_routes_through_the_link():
+    engine = _fabric()
+    before = {p['id']: p['latency_ms'] - p['jitter_ms'] for p in engine.calculate_performance()}
+    version, routes = engine.version, engine._routes_cache[1]
+    path = {p['id']: p['path'] for p in engine.calculate_performance()}["DR"]
+
+    engine.set_link_utilization(path[1], path[2], 0.5)
+    after = {p['id']: p['latency_ms'] - p['jitter_ms'] for p in engine.calculate_performance()}
+    # No re-route and no route recompute, just the queueing delay on DR's path
+    assert engine.version == version and engine._routes_cache[1] is routes
+    queue = queue_delay_ms(0.5, 100.0)
+    assert after["DR"] == pytest.approx(before["DR"] + queue, abs=2e-3)
+    assert after["DR3"] == pytest.approx(before["DR3"], abs=2e-3)
+
+    engine.set_link_utilization(path[1], path[2], 0.0)
+    assert engine.link_load == {}
+    engine.calculate_performance()
+    assert routes.load_delay.max() == 0.0
+
+
+def test_incremental_load_matches_fresh_table():
+    engine = _fabric()
+    engine.calculate_performance()
+    table = engine._routes_cache[1]
+    links = list(engine.graph.edges())
+    for step in range(40):
+        u, v = links[step % len(links)]
+        engine.set_link_loads([(u, v, (step % 7) / 10)])
+        engine.apply_link_load(table)
+
+    fresh = engine._build_routes()
+    engine.apply_link_load(fresh)
+    assert table.load_delay.tolist() == pytest.approx(fresh.load_delay.tolist())
+
+
+def test_link_to_unknown_device_is_refused():
+    engine = _fabric()
+    version = engine.version
+    assert engine.set_link_status("SW1", "GHOST", True) is False
+    assert "GHOST" not in engine.graph and engine.version == version
+    # Every edge still carries a cost
+    assert all('cost' in d for _, _, d in engine.graph.edges(data=True))
@@ -76,3 +76,118 @@ def test_iot_link_propagation(engine):
     
     # Expected latency: 0.1ms (PLC-SW) + 0.1ms (SW-DR) + Jitter
     assert dr_perf['latency_ms'] > 0.2
+
+def test_single_pass_paths_match_shortest_path(engine):
+    engine.add_device(Device(id="PLC", type=DeviceType.PLC))
+    engine.add_device(Device(id="SW1", type=DeviceType.SWITCH), connect_to="PLC")
+    engine.add_device(Device(id="SW2", type=DeviceType.SWITCH), connect_to="SW1")
+    engine.add_device(Device(id="DR", type=DeviceType.DRIVE, cycle_time_ms=10.0), connect_to="SW2")
+    engine.set_link_status("SW2", "PLC", True)  # close the ring
+
+    perf = {p['id']: p for p in engine.calculate_performance()}
+    assert perf["DR"]['path'] == ["PLC", "SW2", "DR"]
+    # Ring members have an edge-disjoint backup; DR hangs off a single link
+    assert perf["SW1"]['redundant'] is True and perf["SW2"]['redundant'] is True
+    assert perf["DR"]['redundant'] is False
+    assert perf["DR"]['status'] == DeviceStatus.ONLINE
+    assert perf["SW1"]['path'] == ["PLC", "SW1"]
+
+    # Break the short side of the ring: DR must reroute the long way
+    engine.set_link_status("SW2", "PLC", False)
+    perf = {p['id']: p for p in engine.calculate_performance()}
+    assert perf["DR"]['path'] == ["PLC", "SW1", "SW2", "DR"]
+    assert perf["DR"]['latency_ms'] > 0.3
+    # Running off its primary route => ALARM
+    assert perf["DR"]['status'] == DeviceStatus.ALARM
+    assert perf["SW1"]['status'] == DeviceStatus.ONLINE
+
+def test_active_view_tracks_mutations(engine):
+    engine.add_device(Device(id="PLC", type=DeviceType.PLC))
+    engine.add_device(Device(id="SW", type=DeviceType.SWITCH), connect_to="PLC")
+    engine.add_device(Device(id="DR", type=DeviceType.DRIVE), connect_to="SW")
+    assert set(engine.active_graph.edges()) == {("PLC", "SW"), ("SW", "DR")}
+
+    engine.set_device_status("SW", DeviceStatus.OFFLINE)
+    assert "SW" not in engine.active_graph
+    assert engine.active_graph.number_of_edges() == 0
+
+    engine.set_link_status("SW", "DR", False)
+    engine.set_device_status("SW", DeviceStatus.ONLINE)
+    assert set(map(frozenset, engine.active_graph.edges())) == {frozenset(("PLC", "SW"))}
+
+    engine.remove_device("DR")
+    assert "DR" not in engine.active_graph
+    engine.restore_all()
+    assert engine.safety_active is False
+
+def test_result_cache_hits_until_mutation(engine):
+    engine.add_device(Device(id="PLC", type=DeviceType.PLC))
+    engine.add_device(Device(id="DR", type=DeviceType.DRIVE, protocol=Protocol.MODBUS_TCP), connect_to="PLC")
+
+    first = engine.calculate_performance()
+    second = engine.calculate_performance()
+    engine.get_topology()
+    engine.get_topology()
+    assert engine.cache_stats["performance_misses"] == 1
+    assert engine.cache_stats["performance_hits"] == 1
+    assert engine.cache_stats["topology_hits"] == 1
+    # Only the jitter term is re-sampled on a clean tick
+    assert first[0]['path'] == second[0]['path']
+
+    engine.set_link_status("PLC", "DR", False)
+    perf = engine.calculate_performance()
+    assert perf[0]['status'] == DeviceStatus.OFFLINE
+    assert engine.cache_stats["performance_misses"] == 2
+
+    engine.rename_device("DR", "Servo")
+    assert engine.get_topology()['nodes'][1]['display_name'] == "Servo"
+
+def _seeded_plant(seed):
+    engine = NetworkEngine(seed=seed)
+    engine.add_device(Device(id="PLC", type=DeviceType.PLC))
+    for i, protocol in enumerate(Protocol):
+        engine.add_device(Device(id=f"D{i}", type=DeviceType.DRIVE, protocol=protocol), connect_to="PLC")
+    return engine
+
+def test_seeded_engine_is_reproducible():
+    a, b = _seeded_plant(7), _seeded_plant(7)
+    for _ in range(3):
+        assert a.calculate_performance() == b.calculate_performance()
+    assert a.trigger_random_fault() == b.trigger_random_fault()
+
+def _two_cell_plant(compact=False):
+    # PLC_A - SW_A - SW_B - PLC_B, with one drive on each switch
+    engine = NetworkEngine(compact_devices=compact)
+    engine.add_device(Device(id="PLC_A", type=DeviceType.PLC))
+    engine.add_device(Device(id="SW_A", type=DeviceType.SWITCH), connect_to="PLC_A")
+    engine.add_device(Device(id="SW_B", type=DeviceType.SWITCH), connect_to="SW_A")
+    engine.add_device(Device(id="PLC_B", type=DeviceType.PLC), connect_to="SW_B")
+    engine.add_device(Device(id="DR_A", type=DeviceType.DRIVE), connect_to="SW_A")
+    engine.add_device(Device(id="DR_B", type=DeviceType.DRIVE), connect_to="SW_B")
+    return engine
+
+def test_multi_controller_performance():
+    for compact in (False, True):
+        engine = _two_cell_plant(compact)
+        # Adding a second PLC no longer replaces the primary controller
+        assert engine.controller_id == "PLC_A"
+        perf = {p['id']: p for p in engine.calculate_performance()}
+        assert set(perf) == {"SW_A", "SW_B", "DR_A", "DR_B"}
+        assert perf["DR_A"]['controller'] == "PLC_A" and perf["DR_A"]['path'] == ["PLC_A", "SW_A", "DR_A"]
+        assert perf["DR_B"]['controller'] == "PLC_B" and perf["DR_B"]['path'] == ["PLC_B", "SW_B", "DR_B"]
+
+        # Pinned to the far PLC: measured against it, not the nearest one
+        assert engine.assign_controller("DR_B", "PLC_A")
+        assert not engine.assign_controller("DR_B", "SW_A")
+        perf = {p['id']: p for p in engine.calculate_performance()}
+        assert perf["DR_B"]['controller'] == "PLC_A"
+        assert perf["DR_B"]['path'] == ["PLC_A", "SW_A", "SW_B", "DR_B"]
+
+        # Owner down: its pinned devices go OFFLINE, unassigned ones fail over to the other PLC
+        engine.set_device_status("PLC_A", DeviceStatus.OFFLINE)
+        perf = {p['id']: p for p in engine.calculate_performance()}
+        assert perf["DR_B"]['status'] == DeviceStatus.OFFLINE and perf["DR_B"]['controller'] == "PLC_A"
+        assert perf["DR_A"]['controller'] == "PLC_B"
+
+        engine.remove_device("PLC_A")
+        assert engine.controller_id == "PLC_B"
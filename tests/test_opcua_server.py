@@ -0,0 +1,99 @@
+import json
+import logging
+import os
+import sys
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from engine.network_engine import NetworkEngine, Device, DeviceType, DeviceStatus
+from engine.opcua_server import OpcUaFeed, EXIT_MISSING_DEPENDENCY
+
+
+def _plant():
+    engine = NetworkEngine(seed=1)
+    engine.add_device(Device(id="PLC", type=DeviceType.PLC))
+    engine.add_device(Device(id="SW", type=DeviceType.SWITCH), connect_to="PLC")
+    engine.add_device(Device(id="DR", type=DeviceType.DRIVE), connect_to="SW")
+    return engine
+
+
+def _publish(feed, engine, at=1.0):
+    feed.publish(engine.get_topology(), engine.calculate_performance(), at)
+    line = feed.take()
+    return json.loads(line) if line is not None else None
+
+
+def test_first_publish_sends_every_device():
+    engine = _plant()
+    feed = OpcUaFeed()
+    message = _publish(feed, engine, at=12.5)
+
+    rows = {row[0]: row for row in message["upsert"]}
+    assert set(rows) == {"PLC", "SW", "DR"}
+    assert message["t"] == 12.5 and message["remove"] == []
+    # Controllers have no performance entry: online, 0 ms
+    assert rows["PLC"][1:] == ["Online", 0.0, 0.0]
+    assert rows["DR"][1] == "Online" and rows["DR"][2] > 0
+
+
+def test_only_changed_fields_are_sent():
+    engine = _plant()
+    feed = OpcUaFeed(deadband_ms=1000.0)
+    _publish(feed, engine)
+    # Jitter moves within the deadband: nothing to send
+    assert _publish(feed, engine) is None
+
+    engine.set_device_status("DR", DeviceStatus.OFFLINE)
+    message = _publish(feed, engine)
+    assert message["upsert"] == [["DR", "Offline", None, None]]
+
+
+def test_changes_coalesce_until_taken():
+    engine = _plant()
+    feed = OpcUaFeed(deadband_ms=1000.0)
+    _publish(feed, engine)
+
+    engine.set_device_status("DR", DeviceStatus.OFFLINE)
+    feed.publish(engine.get_topology(), engine.calculate_performance(), 2.0)
+    engine.set_device_status("DR", DeviceStatus.ONLINE)
+    engine.remove_device("SW")
+    feed.publish(engine.get_topology(), engine.calculate_performance(), 3.0)
+
+    message = json.loads(feed.take())
+    assert message["t"] == 3.0
+    assert message["remove"] == ["SW"]
+    # Latest status wins (the drive is cut off once its switch is gone)
+    assert [row[:2] for row in message["upsert"]] == [["DR", "Offline"]]
+    assert feed.take() is None
+
+
+def test_resync_resends_everything():
+    engine = _plant()
+    feed = OpcUaFeed()
+    _publish(feed, engine)
+    feed.resync()
+    message = json.loads(feed.take())
+    assert {row[0] for row in message["upsert"]} == {"PLC", "SW", "DR"}
+    assert all(None not in row for row in message["upsert"])
+
+
+class _ExitedProcess:
+    def __init__(self, code):
+        self.code = code
+
+    def poll(self):
+        return self.code
+
+    def wait(self):
+        return self.code
+
+
+def test_run_logs_restarts_and_stops_without_asyncua(caplog):
+    feed = OpcUaFeed(restart_delay_s=0.0)
+    exits = [_ExitedProcess(1), _ExitedProcess(EXIT_MISSING_DEPENDENCY)]
+    feed._spawn = lambda: exits.pop(0)
+    with caplog.at_level(logging.WARNING, logger="engine.opcua_server"):
+        feed.run()
+    assert [r.getMessage() for r in caplog.records] == [
+        "OPC UA server exited with code 1, restarting",
+        "OPC UA server disabled: asyncua is not installed",
+    ]
@@ -0,0 +1,105 @@
+import os
+import sys
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from engine.network_engine import NetworkEngine, Device, DeviceType, DeviceStatus, build_route_table
+
+
+def _ring_plant(switches=5):
+    """PLC closed into a ring of switches, one drive hanging off each switch."""
+    engine = NetworkEngine(seed=1)
+    engine.add_device(Device(id="PLC", type=DeviceType.PLC))
+    previous = "PLC"
+    for i in range(switches):
+        engine.add_device(Device(id=f"SW{i}", type=DeviceType.SWITCH, cycle_time_ms=10.0), connect_to=previous)
+        engine.add_device(Device(id=f"DR{i}", type=DeviceType.DRIVE, cycle_time_ms=10.0), connect_to=f"SW{i}")
+        previous = f"SW{i}"
+    engine.set_link_status(previous, "PLC", True)
+    return engine
+
+
+def test_primary_and_edge_disjoint_backup():
+    engine = _ring_plant()
+    index = engine.redundancy_index()
+    row = index.ids.index("SW1")
+    assert index.primary[row] == ["PLC", "SW0", "SW1"]
+    assert index.backup_of(row) == ["PLC", "SW4", "SW3", "SW2", "SW1"]
+    assert index.protected[row]
+    # Drives hang off a bridge: unprotected, but still fail over around the ring above it
+    row = index.ids.index("DR1")
+    assert not index.protected[row]
+    assert index.backup_of(row) == ["PLC", "SW4", "SW3", "SW2", "SW1", "DR1"]
+
+
+def test_link_failure_switches_to_backup_without_search():
+    engine = _ring_plant()
+    engine.calculate_performance()
+    index = engine.redundancy
+
+    engine.set_link_status("SW0", "SW1", False)
+    # Resolved straight from the index: no rebuild, no shortest-path search
+    table = engine.routes_from_index(engine.route_inputs())
+    assert table is not None and engine.redundancy is index
+    perf = {p['id']: p for p in engine.calculate_performance()}
+    assert perf["DR1"]['path'] == ["PLC", "SW4", "SW3", "SW2", "SW1", "DR1"]
+    assert perf["DR1"]['status'] == DeviceStatus.ALARM
+    assert perf["DR0"]['status'] == DeviceStatus.ONLINE
+
+    engine.set_link_status("SW0", "SW1", True)
+    perf = {p['id']: p for p in engine.calculate_performance()}
+    assert perf["DR1"]['path'] == ["PLC", "SW0", "SW1", "DR1"]
+    assert perf["DR1"]['status'] == DeviceStatus.ONLINE
+
+
+def test_single_points_of_failure():
+    engine = _ring_plant(switches=3)
+    engine.add_device(Device(id="SW_SPUR", type=DeviceType.SWITCH), connect_to="SW1")
+    engine.add_device(Device(id="IO", type=DeviceType.IOLINK), connect_to="SW_SPUR")
+    report = engine.redundancy_index().report()
+
+    assert set(report["protected_devices"]) == {"SW0", "SW1", "SW2"}
+    assert "IO" in report["unprotected_devices"]
+    spof_devices = {d["id"]: set(d["isolates"]) for d in report["single_points_of_failure"]["devices"]}
+    # SW1 cuts its drive, the spur switch and what hangs off it; other ring switches only their drive
+    assert spof_devices["SW1"] == {"DR1", "SW_SPUR", "IO"}
+    assert spof_devices["SW_SPUR"] == {"IO"}
+    assert "SW0" in spof_devices and spof_devices["SW0"] == {"DR0"}
+    links = {(l["source"], l["target"]): set(l["isolates"]) for l in report["single_points_of_failure"]["links"]}
+    assert links[("SW1", "SW_SPUR")] == {"SW_SPUR", "IO"}
+    assert ("PLC", "SW0") not in links and ("SW0", "PLC") not in links
+
+
+def test_failover_matches_full_recompute():
+    engine = _ring_plant()
+    engine.redundancy_index()
+    links = [(u, v) for u, v in engine.graph.edges()]
+    switches = [f"SW{i}" for i in range(5)]
+    for kind, target in [("link", l) for l in links] + [("device", s) for s in switches]:
+        if kind == "link":
+            engine.set_link_status(*target, False)
+        else:
+            engine.set_device_status(target, DeviceStatus.OFFLINE)
+
+        inputs = engine.route_inputs()
+        fast = engine.routes_from_index(inputs)
+        full = build_route_table(inputs)
+        assert fast is not None, target
+        assert fast.paths == full.paths, target
+        assert fast.reachable.tolist() == full.reachable.tolist()
+
+        if kind == "link":
+            engine.set_link_status(*target, True)
+        else:
+            engine.set_device_status(target, DeviceStatus.ONLINE)
+
+
+def test_structural_change_rebuilds_index():
+    engine = _ring_plant()
+    index = engine.redundancy_index()
+    engine.set_device_status("DR0", DeviceStatus.OFFLINE)
+    assert engine.redundancy_index() is index
+    engine.add_device(Device(id="DR_NEW", type=DeviceType.DRIVE), connect_to="SW2")
+    rebuilt = engine.redundancy_index()
+    assert rebuilt is not index and "DR_NEW" in rebuilt.ids
+    # Current faults are loaded into the new index
+    assert "DR0" in rebuilt.down
@@ -0,0 +1,88 @@
+import os
+import sys
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from engine.network_engine import NetworkEngine, Device, DeviceType, DeviceStatus
+from engine.scenario import ScenarioRunner, run_batch
+
+
+def _plant():
+    engine = NetworkEngine()
+    engine.add_device(Device(id="PLC", type=DeviceType.PLC))
+    engine.add_device(Device(id="SW1", type=DeviceType.SWITCH, cycle_time_ms=10.0), connect_to="PLC")
+    engine.add_device(Device(id="SW2", type=DeviceType.SWITCH, cycle_time_ms=10.0), connect_to="SW1")
+    engine.add_device(Device(id="DR1", type=DeviceType.DRIVE, cycle_time_ms=10.0), connect_to="SW2")
+    engine.set_link_status("SW2", "PLC", True)
+    return engine.to_state()
+
+
+SCENARIO = {
+    "name": "ring failover",
+    "duration_s": 6,
+    "sample_interval_s": 2,
+    "actions": [
+        {"t": 1, "action": "set_link_status", "u": "SW2", "v": "PLC", "active": False},
+        {"t": 3, "action": "fault", "device_id": "SW1"},
+        {"t": 3, "action": "add_device", "device": {"id": "IO", "type": "IO-Link"}, "connect_to": "SW1"},
+        {"t": 5, "action": "restore"},
+        {"t": 5, "action": "fault", "device_id": "nope"},
+    ],
+    "expect": [
+        {"t": 0, "id": "DR1", "status": "Online"},
+        {"t": 1.5, "id": "DR1", "max_latency_ms": 0.5},
+        {"t": 4, "id": "DR1", "status": "Offline"},
+        {"t": 6, "id": "DR1", "status": "Online"},
+    ],
+}
+
+
+def test_scenario_timeline_and_expectations():
+    result = ScenarioRunner(SCENARIO, _plant()).run()
+    assert [entry["t"] for entry in result["timeline"]] == [0, 1, 2, 3, 4, 5, 6]
+    assert result["timeline"][3]["actions"] == ["fault", "add_device"]
+    assert result["timeline"][3]["safety_active"] is True
+    perf = {p["id"]: p for p in result["timeline"][1]["performance"]}
+    assert perf["DR1"]["path"] == ["PLC", "SW1", "SW2", "DR1"]
+    assert result["failures"] == [{"t": 6, "id": "DR1", "status": "Online", "actual": DeviceStatus.ALARM}]
+    assert result["errors"] == [{"t": 5.0, "action": "fault", "error": "Unknown device: nope"}]
+    assert result["passed"] is False
+
+
+def test_batch_runs_in_parallel_in_input_order():
+    plant = _plant()
+    scenarios = [dict(SCENARIO, name=f"s{i}", seed=i) for i in range(4)]
+    serial = run_batch(scenarios, plant, workers=1)
+    parallel = run_batch(scenarios, plant, workers=2)
+    assert [r["name"] for r in parallel] == ["s0", "s1", "s2", "s3"]
+    for a, b in zip(serial, parallel):
+        assert a["timeline"] == b["timeline"]
+
+
+def test_actions_parse_flags_and_validate_like_the_api():
+    scenario = {
+        "duration_s": 2,
+        "actions": [
+            {"t": 1, "action": "set_link_status", "u": "SW2", "v": "PLC", "active": "false"},
+            {"t": 1, "action": "add_device", "device": {"id": "Servo_2", "type": "Drive"}, "connect_to": "SW1"},
+            {"t": 1, "action": "add_device", "device": {"id": "IO", "type": "IO-Link"}, "connect_to": "MISSING"},
+        ],
+    }
+    result = ScenarioRunner(scenario, _plant()).run()
+    assert result["timeline"][1]["actions"] == ["set_link_status"]
+    # "false" takes the SW2-PLC link down: DR1 goes the long way round
+    perf = {p["id"]: p for p in result["timeline"][1]["performance"]}
+    assert perf["DR1"]["path"] == ["PLC", "SW1", "SW2", "DR1"]
+    assert [e["error"][:13] for e in result["errors"]] == ["ENTRENAMIENTO", "connect_to re"]
+
+
+def test_unreachable_device_fails_a_latency_bound():
+    scenario = {
+        "duration_s": 2,
+        "actions": [{"t": 1, "action": "fault", "device_id": "DR1"}],
+        "expect": [{"t": 0, "id": "DR1", "max_latency_ms": 5}, {"t": 1, "id": "DR1", "max_latency_ms": 5}],
+    }
+    result = ScenarioRunner(scenario, _plant()).run()
+    assert result["failures"] == [
+        {"t": 1, "id": "DR1", "max_latency_ms": 5, "actual": -1, "error": "device unreachable"}
+    ]
+    assert result["passed"] is False
@@ -0,0 +1,185 @@
+import os
+import sys
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import pytest
+
+from engine.network_engine import NetworkEngine, Device, DeviceType, DeviceStatus
+from engine.sessions import (SessionManager, SessionNameError, SessionLimitError, SessionNotFoundError,
+                             SessionExistsError)
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def _plant():
+    engine = NetworkEngine(seed=4)
+    engine.add_device(Device(id="PLC", type=DeviceType.PLC))
+    return engine
+
+
+def _manager(tmp_path, **kwargs):
+    clock = _Clock()
+    manager = SessionManager(str(tmp_path / "sessions"), new_engine=_plant, clock=clock, **kwargs)
+    return manager, clock
+
+
+def test_sessions_have_their_own_engine(tmp_path):
+    manager, _ = _manager(tmp_path)
+    line_a, line_b = manager.create("line-a"), manager.create("line-b")
+    line_a.engine.add_device(Device(id="SW", type=DeviceType.SWITCH), connect_to="PLC")
+
+    assert manager.get("line-a") is line_a
+    assert set(line_a.engine.devices) == {"PLC", "SW"}
+    assert set(line_b.engine.devices) == {"PLC"}
+    assert line_a.room != line_b.room
+    assert manager.names() == ["line-a", "line-b"]
+    for bad in ("", "../etc", "a/b", "x" * 65):
+        with pytest.raises(SessionNameError):
+            manager.get(bad)
+
+
+def test_idle_sessions_are_evicted_to_snapshots_and_reloaded(tmp_path):
+    manager, clock = _manager(tmp_path, idle_timeout_s=60)
+    session = manager.create("cell")
+    session.engine.add_device(Device(id="DR", type=DeviceType.DRIVE), connect_to="PLC")
+    session.engine.set_device_status("DR", DeviceStatus.OFFLINE)
+    watched = manager.create("watched")
+    watched.broadcasts.add_client("sid-1")
+
+    clock.now += 30
+    assert manager.evict_idle() == []
+    clock.now += 31
+    # A session with a connected client stays loaded however long it is idle
+    assert manager.evict_idle() == ["cell"]
+    assert list(manager.sessions) == ["watched"]
+    assert os.path.exists(manager.snapshot_path("cell"))
+    assert manager.names() == ["cell", "watched"]
+
+    reloaded = manager.get("cell")
+    assert reloaded is not session and manager.loads == 1
+    assert reloaded.engine.devices["DR"].status == DeviceStatus.OFFLINE
+    # Nothing changed since the reload, so evicting it again writes nothing
+    assert reloaded.save_if_changed() is False
+
+
+def test_one_loop_ticks_many_sessions_within_the_bound(tmp_path):
+    started = []
+    manager, clock = _manager(tmp_path, max_concurrent=3, spawn=lambda fn, *args: started.append((fn, args)))
+    for i in range(10):
+        manager.create(f"s{i}")
+    ticked = []
+
+    assert manager.run_due(ticked.append) == 3
+    assert manager.in_flight == 3 and manager.run_due(ticked.append) == 0
+    for fn, args in started[:2]:
+        fn(*args)
+    assert manager.in_flight == 1 and manager.wait(0) is True
+    assert manager.run_due(ticked.append) == 2
+    for fn, args in started[2:]:
+        fn(*args)
+    assert manager.run_due(ticked.append) == 3
+    for fn, args in started[5:]:
+        fn(*args)
+    manager.run_due(ticked.append)
+    for fn, args in started[8:]:
+        fn(*args)
+    assert len(ticked) == 10 and len({s.name for s in ticked}) == 10
+
+    # All ticked: nothing is due until the next period, unless a mutation opens a debounce window
+    assert manager.run_due(ticked.append) == 0
+    assert manager.next_event_in() == pytest.approx(1.0)
+    mutated = manager.get("s4")
+    mutated.broadcasts.note_mutation()
+    mutated.compute.request()
+    assert manager.wait(0) is True
+    clock.now += 0.1
+    assert manager.run_due(ticked.append) == 1
+    started[-1][0](*started[-1][1])
+    assert ticked[-1] is mutated
+
+
+def test_session_limit_evicts_the_least_recent_idle_session(tmp_path):
+    manager, clock = _manager(tmp_path, max_sessions=2)
+    manager.create("old").broadcasts.add_client("sid-1")
+    clock.now += 1
+    manager.create("idle")
+    clock.now += 1
+    manager.create("new")
+    assert sorted(manager.sessions) == ["new", "old"]
+
+    manager.get("new").broadcasts.add_client("sid-2")
+    with pytest.raises(SessionLimitError):
+        manager.create("another")
+
+
+def test_failed_save_or_tick_does_not_stop_the_loop(tmp_path, monkeypatch):
+    manager, clock = _manager(tmp_path, idle_timeout_s=60)
+    broken, healthy = manager.create("broken"), manager.create("healthy")
+    broken.engine.add_device(Device(id="DR", type=DeviceType.DRIVE), connect_to="PLC")
+
+    def fail(session):
+        raise OSError("disk full")
+    monkeypatch.setattr(broken, "save_if_changed", lambda: fail(broken))
+    clock.now += 61
+    # The unsaved session stays in memory; the others are still evicted
+    assert manager.evict_idle() == ["healthy"]
+    assert list(manager.sessions) == ["broken"] and manager.evict_idle() == []
+
+    ticked = []
+    manager.get("healthy")
+    assert manager.run_due(lambda s: fail(s) if s is broken else ticked.append(s)) == 2
+    assert ticked == [manager.sessions["healthy"]] and manager.in_flight == 0
+    assert not broken.running
+
+
+def test_snapshot_with_dangling_link_loads_without_it(tmp_path):
+    state = _plant().to_state()
+    state["links"].append({"source": "PLC", "target": "GHOST", "active": True, "weight": 0.1})
+    engine = NetworkEngine.from_state(state)
+    assert "GHOST" not in engine.graph and engine.graph.number_of_edges() == 0
+
+
+def test_only_created_sessions_are_opened(tmp_path):
+    manager, _ = _manager(tmp_path, max_stored=3)
+    with pytest.raises(SessionNotFoundError):
+        manager.get("typo")
+    assert manager.names() == [] and not os.path.exists(manager.snapshot_path("typo"))
+
+    assert manager.get("default") is manager.get("default")
+    manager.create("line-a")
+    for taken in ("default", "line-a"):
+        with pytest.raises(SessionExistsError):
+            manager.create(taken)
+    manager.evict(["line-a"])
+    with pytest.raises(SessionExistsError):
+        manager.create("line-a")
+    assert manager.get("line-a").engine.devices.keys() == {"PLC"}
+
+    manager.create("line-b")
+    # Three stored sessions (default, line-a, line-b): a fourth is refused
+    with pytest.raises(SessionLimitError):
+        manager.create("line-c")
+
+
+def test_utilization_change_is_saved_and_survives_reload(tmp_path):
+    manager, clock = _manager(tmp_path, idle_timeout_s=60)
+    session = manager.create("cell")
+    session.engine.add_device(Device(id="SW", type=DeviceType.SWITCH), connect_to="PLC")
+    assert session.save_if_changed() is True
+    version = session.engine.version
+
+    # Traffic alone leaves `version` alone but must still reach the snapshot
+    assert session.engine.set_link_utilization("PLC", "SW", 0.4)
+    assert session.engine.version == version
+    clock.now += 61
+    assert manager.evict_idle() == ["cell"]
+
+    reloaded = manager.get("cell")
+    assert reloaded.engine.graph["PLC"]["SW"]["utilization"] == 0.4
+    assert reloaded.save_if_changed() is False
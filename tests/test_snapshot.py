@@ -0,0 +1,87 @@
+import json
+import os
+import sys
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from engine.network_engine import NetworkEngine, Device, DeviceType, DeviceStatus, Protocol
+from engine.snapshot import save_snapshot, load_snapshot
+
+
+def _plant(compact=False):
+    engine = NetworkEngine(compact_devices=compact)
+    engine.add_device(Device(id="PLC", type=DeviceType.PLC, ip="10.0.0.1", protocol=Protocol.PROFINET_IRT))
+    engine.add_device(Device(id="SW", type=DeviceType.SWITCH), connect_to="PLC")
+    engine.add_device(Device(id="Válvula_1", type=DeviceType.IOLINK, protocol=Protocol.MODBUS_TCP,
+                             cycle_time_ms=8.0), connect_to="SW")
+    engine.add_device(Device(id="DR", type=DeviceType.DRIVE, display_name=""), connect_to="SW")
+    engine.set_link_status("DR", "PLC", False)
+    engine.set_link_weight("SW", "PLC", 0.25)
+    engine.set_device_status("DR", DeviceStatus.OFFLINE)
+    engine.declare_ring("r1", ["PLC", "SW", "DR"], "MRP")
+    engine.add_device(Device(id="PLC2", type=DeviceType.PLC), connect_to="SW")
+    engine.assign_controller("Válvula_1", "PLC2")
+    engine.set_link_properties("SW", "Válvula_1", speed_mbps=1000, length_m=80)
+    engine.set_link_utilization("SW", "PLC", 0.4)
+    engine.set_processing_delay("SW", 5.0)
+    engine.safety_active = True
+    return engine
+
+
+def test_binary_snapshot_round_trip(tmp_path):
+    for compact in (False, True):
+        engine = _plant(compact)
+        path = str(tmp_path / "plant.nsnap")
+        save_snapshot(engine, path)
+        loaded = load_snapshot(path, compact_devices=compact)
+
+        assert loaded.to_state() == engine.to_state()
+        assert loaded.link_load == engine.link_load
+        assert sorted(map(sorted, loaded.active_graph.edges())) == sorted(map(sorted, engine.active_graph.edges()))
+        assert [p['path'] for p in loaded.calculate_performance()] == \
+            [p['path'] for p in engine.calculate_performance()]
+        # Loop index is rebuilt lazily from the loaded cabling
+        loaded.connectivity.refresh(loaded.graph)
+        assert loaded.connectivity.check_edge("Válvula_1", "PLC") == "loop"
+
+
+def test_empty_engine_and_legacy_json_snapshot(tmp_path):
+    path = str(tmp_path / "empty.nsnap")
+    save_snapshot(NetworkEngine(), path)
+    assert load_snapshot(path).to_state()["devices"] == []
+
+    legacy = tmp_path / "plant.json"
+    legacy.write_text(json.dumps(_plant().to_state()))
+    assert load_snapshot(str(legacy)).to_state() == _plant().to_state()
+
+
+FIXTURES = os.path.join(os.path.dirname(__file__), "fixtures")
+
+
+def _legacy_plant():
+    """The plant in fixtures/plant_v1.nsnap and plant_v2.nsnap, written by the v1 and v2 writers."""
+    engine = NetworkEngine()
+    engine.add_device(Device(id="PLC", type=DeviceType.PLC, ip="10.0.0.1", protocol=Protocol.PROFINET_IRT))
+    engine.add_device(Device(id="SW", type=DeviceType.SWITCH), connect_to="PLC")
+    engine.add_device(Device(id="Válvula_1", type=DeviceType.IOLINK, protocol=Protocol.MODBUS_TCP,
+                             cycle_time_ms=8.0), connect_to="SW")
+    engine.add_device(Device(id="DR", type=DeviceType.DRIVE, display_name=""), connect_to="SW")
+    engine.set_link_status("DR", "PLC", False)
+    engine.set_link_weight("SW", "PLC", 0.25)
+    engine.set_device_status("DR", DeviceStatus.OFFLINE)
+    engine.declare_ring("r1", ["PLC", "SW", "DR"], "MRP")
+    engine.add_device(Device(id="PLC2", type=DeviceType.PLC), connect_to="SW")
+    engine.assign_controller("Válvula_1", "PLC2")
+    engine.safety_active = True
+    return engine
+
+
+def test_older_format_versions_still_load():
+    expected = _legacy_plant().to_state()
+    # Version 1 predates controller assignment: every device falls back to the nearest PLC
+    expected_v1 = {**expected, "devices": [{**d, "controller": None} for d in expected["devices"]]}
+    for compact in (False, True):
+        v2 = load_snapshot(os.path.join(FIXTURES, "plant_v2.nsnap"), compact_devices=compact)
+        assert v2.to_state() == expected
+        assert v2.connectivity.rings["r1"]["members"] == ["PLC", "SW", "DR"]
+        v1 = load_snapshot(os.path.join(FIXTURES, "plant_v1.nsnap"), compact_devices=compact)
+        assert v1.to_state() == expected_v1
@@ -0,0 +1,74 @@
+import os
+import sys
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from engine.network_engine import NetworkEngine, Device, DeviceType, DeviceStatus
+from engine.topology_view import TopologyView
+
+
+def _cell_plant():
+    """PLC -> SW1 -> SW2, a daisy chain of drives on SW1 and one IO-Link on SW2."""
+    engine = NetworkEngine(seed=1)
+    engine.add_device(Device(id="PLC", type=DeviceType.PLC))
+    engine.add_device(Device(id="SW1", type=DeviceType.SWITCH), connect_to="PLC")
+    engine.add_device(Device(id="SW2", type=DeviceType.SWITCH), connect_to="SW1")
+    engine.add_device(Device(id="DR1", type=DeviceType.DRIVE), connect_to="SW1")
+    engine.add_device(Device(id="DR2", type=DeviceType.DRIVE), connect_to="DR1")
+    engine.add_device(Device(id="IO1", type=DeviceType.IOLINK), connect_to="SW2")
+    return engine
+
+
+def test_devices_grouped_under_nearest_switch():
+    view = TopologyView(_cell_plant())
+    summary = view.summary()
+    groups = {g["id"]: g for g in summary["groups"]}
+
+    assert set(groups) == {"grp:PLC", "grp:SW1", "grp:SW2"}
+    # The drive chain stays with the switch it hangs off
+    assert groups["grp:SW1"]["size"] == 3
+    assert groups["grp:SW2"]["size"] == 2
+    assert groups["grp:SW1"]["status"] == {"Online": 3}
+    links = {(l["source"], l["target"]): l["count"] for l in summary["links"]}
+    assert links == {("grp:PLC", "grp:SW1"): 1, ("grp:SW1", "grp:SW2"): 1}
+    assert summary["expanded"] == {}
+
+
+def test_expand_returns_members_with_coordinates_and_boundary_links():
+    view = TopologyView(_cell_plant())
+    detail = view.group("grp:SW1")
+
+    nodes = {n["id"]: n for n in detail["nodes"]}
+    assert set(nodes) == {"SW1", "DR1", "DR2"}
+    assert all(isinstance(n["x"], float) and isinstance(n["y"], float) for n in nodes.values())
+    # The head sits at the group centre
+    group = next(g for g in view.summary()["groups"] if g["id"] == "grp:SW1")
+    assert (nodes["SW1"]["x"], nodes["SW1"]["y"]) == (group["x"], group["y"])
+
+    links = {(l["source"], l["target"]): l["target_group"] for l in detail["links"]}
+    assert links[("SW1", "PLC")] == "grp:PLC"
+    assert links[("SW1", "SW2")] == "grp:SW2"
+    # Internal links appear once
+    assert len([l for l in detail["links"] if {l["source"], l["target"]} == {"DR1", "DR2"}]) == 1
+    assert view.group("grp:UNKNOWN") is None
+
+
+def test_layout_cached_until_structure_changes():
+    engine = _cell_plant()
+    view = TopologyView(engine)
+    layout = view.layout()
+
+    engine.set_device_status("DR2", DeviceStatus.OFFLINE)
+    assert view.layout() is layout
+    group = next(g for g in view.summary()["groups"] if g["id"] == "grp:SW1")
+    assert group["status"] == {"Online": 2, "Offline": 1}
+    assert group["worst"] == DeviceStatus.OFFLINE
+
+    engine.add_device(Device(id="DR3", type=DeviceType.DRIVE), connect_to="SW2")
+    rebuilt = view.layout()
+    assert rebuilt is not layout and rebuilt.group_of["DR3"] == "grp:SW2"
+
+
+def test_auto_expand_only_for_small_plants():
+    engine = _cell_plant()
+    assert set(TopologyView(engine).summary(["auto"])["expanded"]) == {"grp:PLC", "grp:SW1", "grp:SW2"}
+    assert TopologyView(engine, auto_expand_max=3).summary(["auto"])["expanded"] == {}
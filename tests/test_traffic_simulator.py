@@ -0,0 +1,70 @@
+import os
+import sys
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import pytest
+
+from engine.network_engine import NetworkEngine, Device, DeviceType, Protocol
+from engine.traffic_simulator import TrafficSimulator
+
+
+def _cell(cycle_times=None, compact_devices=False):
+    """PLC -> SW -> 24 drives; `cycle_times` overrides the cycle of some drives by id."""
+    cycle_times = cycle_times or {}
+    engine = NetworkEngine(compact_devices=compact_devices)
+    engine.add_device(Device(id="PLC", type=DeviceType.PLC, protocol=Protocol.PROFINET_IRT))
+    engine.add_device(Device(id="SW", type=DeviceType.SWITCH), connect_to="PLC")
+    protocols = [Protocol.PROFINET_IRT, Protocol.PROFINET_RT, Protocol.MODBUS_TCP, Protocol.OPC_UA]
+    for i in range(24):
+        engine.add_device(Device(id=f"D{i}", type=DeviceType.DRIVE, protocol=protocols[i % 4],
+                                 cycle_time_ms=cycle_times.get(f"D{i}", [1.0, 2.0, 4.0][i % 3])), connect_to="SW")
+    return engine
+
+
+def test_fast_forward_matches_full_simulation():
+    engine = _cell()
+    fast = TrafficSimulator(engine, seed=1)
+    full = TrafficSimulator(engine, seed=1, fast_forward=False)
+    fast_results = fast.run(0.5)
+    assert fast.periods_skipped > 0
+    assert fast_results == full.run(0.5)
+
+
+def test_latency_includes_queueing_by_priority():
+    results = {r['id']: r for r in TrafficSimulator(_cell(), seed=1).run(0.2)}
+    # D0 is 1 ms cycle => 200 frames in 0.2 s
+    assert results["D0"]['frames'] == 200
+    # Two hops of 0.1 ms propagation plus transmission and switch delay
+    assert results["D0"]['min_ms'] > 0.2
+    # SW hangs directly off the PLC: one hop, no forwarding delay
+    assert results["SW"]['max_ms'] < results["D0"]['min_ms']
+    for r in results.values():
+        assert r['min_ms'] <= r['p50_ms'] <= r['p99_ms'] <= r['max_ms']
+
+
+@pytest.mark.parametrize("compact_devices", [False, True])
+def test_without_fast_forward_every_frame_is_simulated_within_the_budget(compact_devices):
+    engine = _cell({"D0": 1.5, "D1": 3.1, "D2": 7.3}, compact_devices=compact_devices)
+    # Hyperperiod of 1.5/3.1/7.3 ms with 1/2/4 ms is far longer than the run: nothing repeats
+    sim = TrafficSimulator(engine, seed=1)
+    results = {r['id']: r for r in sim.run(0.3)}
+    assert sim.periods_skipped == 0 and not sim.truncated and sim.simulated_s == 0.3
+    assert results["D0"]['frames'] == 200 and results["D2"]['frames'] in (41, 42)
+    assert results == {r['id']: r for r in TrafficSimulator(engine, seed=1, fast_forward=False).run(0.3)}
+
+    bounded = TrafficSimulator(engine, seed=1, max_events=2000)
+    partial = {r['id']: r for r in bounded.run(0.3)}
+    assert bounded.truncated and 0 < bounded.simulated_s < 0.3
+    assert bounded.events_processed < 2100
+    assert partial["D0"]['frames'] == pytest.approx(bounded.simulated_s / 0.0015, abs=1)
+
+
+@pytest.mark.parametrize("compact_devices", [False, True])
+def test_forwarding_delay_follows_the_switch_processing_delay(compact_devices):
+    engine = _cell(compact_devices=compact_devices)
+    default = {r['id']: r for r in TrafficSimulator(engine, seed=1).run(0.05)}
+    assert engine.set_processing_delay("SW", 53.0)
+    slow = {r['id']: r for r in TrafficSimulator(engine, seed=1).run(0.05)}
+    # Default switch delay is 3 us: 50 us more per frame through SW, nothing for SW itself
+    assert slow["D0"]['min_ms'] - default["D0"]['min_ms'] == pytest.approx(0.05, abs=1e-6)
+    assert slow["SW"]['min_ms'] == default["SW"]['min_ms']
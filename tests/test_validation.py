@@ -0,0 +1,42 @@
+import os
+import sys
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from engine.network_engine import NetworkEngine, Device, DeviceType
+from engine.validation_engine import ValidationEngine
+
+
+def _is_loop(engine, u, v):
+    result = ValidationEngine.validate_connection(engine.graph, u, v, "Switch", index=engine.connectivity)
+    return any("Bucle" in e for e in result['errors'])
+
+
+def _ring_plant():
+    engine = NetworkEngine()
+    engine.add_device(Device(id="PLC", type=DeviceType.PLC))
+    for i, uplink in enumerate(["PLC", "SW0", "SW1"]):
+        engine.add_device(Device(id=f"SW{i}", type=DeviceType.SWITCH), connect_to=uplink)
+    return engine
+
+
+def test_index_flags_loops_and_allows_declared_ring_once():
+    engine = _ring_plant()
+    assert not _is_loop(engine, "NEW_IO", "SW2")
+    assert _is_loop(engine, "SW2", "SW0")
+
+    engine.declare_ring("cell_1", ["SW0", "SW1", "SW2"], "MRP")
+    assert not _is_loop(engine, "SW2", "SW0")
+    engine.set_link_status("SW2", "SW0", True)
+    # The ring is closed now: a second redundant link is a real loop again
+    assert _is_loop(engine, "SW1", "SW0")
+    # So is a loop that leaves the ring through the PLC
+    assert _is_loop(engine, "SW2", "PLC")
+
+
+def test_index_rebuilds_after_removal():
+    engine = _ring_plant()
+    engine.remove_device("SW1")
+    assert not _is_loop(engine, "SW2", "SW0")
+    # Static call without an index still works on a bare graph
+    result = ValidationEngine.validate_connection(engine.graph, "SW0", "PLC", "Switch")
+    assert not result['is_valid']